@@ -0,0 +1,569 @@
+"""Headless HTTP/JSON API over the library modules, served with asyncio."""
+
+import argparse
+import asyncio
+import functools
+import inspect
+import json
+import re
+import signal
+from datetime import date
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from autocomplete import Autocomplete
+from book import Book
+from circulation import Circulation, CirculationError
+import logs
+import metrics
+from library import LibraryManagementModule
+from parallel_scan import FIELDS, ShardedScan, compile_pattern
+from search import (full_text_search, fuzzy_search_by_author, fuzzy_search_by_title,
+                    scan_books, search_by_author, search_by_isbn, search_by_title)
+
+MAX_HEADER_LINES = 100
+MAX_BODY_BYTES = 1 << 20
+MAX_PATTERN_LENGTH = 256  # Scan patterns are matched against every book
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large",
+           500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    """An error response with a status code and message."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def book_json(book):
+    return {"isbn": book.isbn, "title": book.title, "author": book.author,
+            "copies": book.copies}
+
+
+def member_json(member):
+    return {"member_id": member.member_id, "name": member.name, "email": member.email,
+            "phone": member.phone, "borrowed_books": member.borrowed_books}
+
+
+def loan_json(loan):
+    return {"loan_id": loan.loan_id, "isbn": loan.isbn, "member_id": loan.member_id,
+            "issue_date": loan.issue_date.isoformat(),
+            "due_date": loan.due_date.isoformat()}
+
+
+def report_json(report):
+    return {"member_id": report.member_id,
+            "succeeded": len(report.succeeded),
+            "failed": len(report.failed),
+            "items": [{"isbn": item.isbn,
+                       "ok": item.ok,
+                       "reason": item.reason,
+                       "message": item.message,
+                       "loan": loan_json(item.loan) if item.loan is not None else None}
+                      for item in report.items]}
+
+
+class LibraryAPI:
+    """
+    Route JSON requests to BookManager, search, MemberModule, IssueReturn and LibraryManagementModule.
+
+    Handlers run on the event loop thread, so requests from any number of
+    connections are applied one at a time and the managers need no locking.
+    Slow clients only hold their own connection's coroutine. The one exception
+    is a pattern scan, which reads every book: its handler returns a coroutine
+    that runs the scan in an executor thread, under the book manager's read
+    lock, so other requests keep being served meanwhile. main() always attaches
+    a ShardedScan, so that thread only waits for the scan workers and changes
+    are not held up behind it.
+    """
+
+    def __init__(self, book_manager, member_module, issue_return, library_module=None,
+                 circulation=None):
+        self.book_manager = book_manager
+        self.member_module = member_module
+        self.issue_return = issue_return
+        self.library_module = library_module or LibraryManagementModule()
+        self.circulation = circulation or Circulation(book_manager, member_module, issue_return)
+        self.routes = [
+            ("GET", r"/books", self.list_books),
+            ("POST", r"/books", self.add_book),
+            ("GET", r"/books/(?P<isbn>[^/]+)", self.get_book),
+            ("DELETE", r"/books/(?P<isbn>[^/]+)", self.remove_book),
+            ("GET", r"/search", self.search),
+            ("GET", r"/suggest", self.suggest),
+            ("GET", r"/members", self.list_members),
+            ("POST", r"/members", self.register_member),
+            ("GET", r"/members/(?P<member_id>[^/]+)", self.get_member),
+            ("PATCH", r"/members/(?P<member_id>[^/]+)", self.update_member),
+            ("DELETE", r"/members/(?P<member_id>[^/]+)", self.remove_member),
+            ("GET", r"/loans", self.list_loans),
+            ("POST", r"/loans", self.issue_book),
+            ("POST", r"/returns", self.return_book),
+            ("POST", r"/loans/batch", self.issue_batch),
+            ("POST", r"/returns/batch", self.return_batch),
+            ("GET", r"/fines", self.fine),
+            ("GET", r"/overview", self.overview),
+            ("GET", r"/settings", self.settings),
+            ("GET", r"/cache", self.cache_info),
+        ]
+        self.routes = [(method, re.compile(pattern + "$"), handler)
+                       for method, pattern, handler in self.routes]
+
+    def dispatch(self, method, target, body):
+        """
+        Handle one request.
+
+        Returns:
+            tuple: (status code, JSON-serializable payload), or an awaitable of one
+        """
+        url = urlsplit(target)
+        path = unquote(url.path).rstrip("/") or "/"
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        path_matched = False
+        for route_method, pattern, handler in self.routes:
+            match = pattern.match(path)
+            if match is None:
+                continue
+            path_matched = True
+            if route_method == method:
+                return handler(query=query, body=body, **match.groupdict())
+        if path_matched:
+            raise HTTPError(405, f"{method} not allowed on {path}")
+        raise HTTPError(404, f"No route for {path}")
+
+    # Books
+
+    def list_books(self, query, body):
+        offset, limit = _page(query)
+        books = []
+        for index, book in enumerate(self.book_manager.books.values()):
+            if index >= offset + limit:
+                break
+            if index >= offset:
+                books.append(book_json(book))
+        return 200, {"books": books, "offset": offset, "limit": limit}
+
+    def add_book(self, query, body):
+        data = _strings(_require(body, "isbn", "title", "author", "copies"), "isbn", "title", "author")
+        copies = _count(data["copies"], "copies")
+        self.book_manager.add_book(Book(data["isbn"], data["title"], data["author"], copies))
+        return 201, book_json(self.book_manager.books[data["isbn"]])
+
+    def get_book(self, query, body, isbn):
+        book = search_by_isbn(self.book_manager, isbn)
+        if book is None:
+            raise HTTPError(404, "Book not found.")
+        return 200, book_json(book)
+
+    def remove_book(self, query, body, isbn):
+        if not self.book_manager.remove_book(isbn):
+            raise HTTPError(404, "Book not found.")
+        return 200, {"removed": isbn}
+
+    def search(self, query, body):
+        if query.get("q"):
+            # Ranked over title and author; only the requested page is selected
+            offset, limit = _page(query)
+            page = full_text_search(self.book_manager, query["q"], limit, offset)
+            return 200, {"total": page.total,
+                         "books": [dict(book_json(b), score=round(s, 4))
+                                   for b, s in zip(page.books, page.scores)]}
+        if query.get("pattern"):
+            # Full scan for substrings/regexes no index serves, in catalog order
+            offset, limit = _page(query)
+            regex = query.get("regex") in ("1", "true")
+            if len(query["pattern"]) > MAX_PATTERN_LENGTH:
+                raise HTTPError(400, f"pattern must be at most {MAX_PATTERN_LENGTH} characters.")
+            try:
+                compile_pattern(query["pattern"], regex)
+            except re.error as error:
+                raise HTTPError(400, f"Invalid regex: {error}") from None
+            scan = functools.partial(scan_books, self.book_manager, query["pattern"], regex=regex,
+                                     fields=_fields(query.get("field")), limit=offset + limit)
+            return self._scan_in_executor(scan, offset)
+        fuzzy = query.get("fuzzy") in ("1", "true")
+        if fuzzy and (query.get("title") or query.get("author")):
+            # Ranked top-k: ``limit`` bounds the candidates, so no paging
+            _, limit = _page(query)
+            if query.get("title"):
+                books = fuzzy_search_by_title(self.book_manager, query["title"], limit)
+            else:
+                books = fuzzy_search_by_author(self.book_manager, query["author"], limit)
+            return 200, {"total": len(books), "books": [book_json(b) for b in books]}
+        if query.get("title"):
+            books = search_by_title(self.book_manager, query["title"])
+        elif query.get("author"):
+            books = search_by_author(self.book_manager, query["author"])
+        elif query.get("isbn"):
+            book = search_by_isbn(self.book_manager, query["isbn"])
+            books = [book] if book else []
+        else:
+            raise HTTPError(400, "Provide q, pattern, title, author or isbn.")
+        offset, limit = _page(query)
+        return 200, {"total": len(books),
+                     "books": [book_json(b) for b in books[offset:offset + limit]]}
+
+    async def _scan_in_executor(self, scan, offset):
+        books = await asyncio.get_running_loop().run_in_executor(None, scan)
+        return 200, {"books": [book_json(b) for b in books[offset:]]}
+
+    def suggest(self, query, body):
+        text = query.get("q", "")
+        suggestions = self.book_manager.suggestions
+        if suggestions is None:  # Built on first use unless main() already attached one
+            suggestions = Autocomplete()
+            suggestions.attach(self.book_manager, self.issue_return)
+        limit = _int(query.get("limit", suggestions.top_n), "limit")
+        if not 0 < limit <= suggestions.top_n:
+            raise HTTPError(400, f"limit must be between 1 and {suggestions.top_n}.")
+        return 200, {"suggestions": [s._asdict() for s in suggestions.suggest(text, limit)]}
+
+    # Members
+
+    def list_members(self, query, body):
+        if query.get("q"):
+            members = self.member_module.search_members(query["q"])
+        else:
+            members = self.member_module.list_members()
+        offset, limit = _page(query)
+        return 200, {"total": len(members), "members": [member_json(m) for m in members[offset:offset + limit]]}
+
+    def register_member(self, query, body):
+        data = _strings(_require(body, "member_id", "name", "email", "phone"),
+                        "member_id", "name", "email", "phone")
+        if not self.member_module.register_member(data["member_id"], data["name"],
+                                                  data["email"], data["phone"]):
+            raise HTTPError(409, "Member ID already exists.")
+        return 201, member_json(self.member_module.get_member(data["member_id"]))
+
+    def get_member(self, query, body, member_id):
+        member = self.member_module.get_member(member_id)
+        if member is None:
+            raise HTTPError(404, "Member not found.")
+        return 200, member_json(member)
+
+    def update_member(self, query, body, member_id):
+        data = _strings(_require(body or {}), "name", "email", "phone")
+        if not self.member_module.update_member(member_id, data.get("name"),
+                                                data.get("email"), data.get("phone")):
+            raise HTTPError(404, "Member not found.")
+        return 200, member_json(self.member_module.get_member(member_id))
+
+    def remove_member(self, query, body, member_id):
+        if not self.member_module.remove_member(member_id):
+            raise HTTPError(404, "Member not found.")
+        return 200, {"removed": member_id}
+
+    # Loans
+
+    def list_loans(self, query, body):
+        if query.get("member_id"):
+            loans = self.issue_return.loans_for_member(query["member_id"])
+        elif query.get("isbn"):
+            loans = self.issue_return.holders_of(query["isbn"])
+        elif query.get("due_before"):
+            loans = self.issue_return.loans_due_before(_date(query["due_before"]))
+        else:
+            raise HTTPError(400, "Provide member_id, isbn or due_before.")
+        return 200, {"loans": [loan_json(loan) for loan in loans]}
+
+    def issue_book(self, query, body):
+        data = _strings(_require(body, "member_id", "isbn"), "member_id", "isbn")
+        member_id, isbn = data["member_id"], data["isbn"]
+        loan_days = int(self.library_module.get_setting("max_borrow_days"))
+        try:
+            loan = self.circulation.checkout(member_id, isbn, loan_days=loan_days)
+        except CirculationError as error:
+            raise _circulation_error(error)
+        return 201, loan_json(loan)
+
+    def return_book(self, query, body):
+        data = _strings(_require(body, "member_id", "isbn"), "member_id", "isbn")
+        member_id, isbn = data["member_id"], data["isbn"]
+        try:
+            loan = self.circulation.checkin(member_id, isbn)
+        except CirculationError as error:
+            raise _circulation_error(error)
+        return 200, loan_json(loan) if loan is not None else {"returned": isbn}
+
+    def issue_batch(self, query, body):
+        data = _strings(_require(body, "member_id", "isbns"), "member_id")
+        loan_days = int(self.library_module.get_setting("max_borrow_days"))
+        report = self.circulation.checkout_batch(
+            data["member_id"], _isbns(data["isbns"]), loan_days=loan_days,
+            atomic=_flag(data, "atomic"))
+        return 200, report_json(report)
+
+    def return_batch(self, query, body):
+        data = _strings(_require(body, "member_id", "isbns"), "member_id")
+        report = self.circulation.checkin_batch(
+            data["member_id"], _isbns(data["isbns"]), atomic=_flag(data, "atomic"))
+        return 200, report_json(report)
+
+    def fine(self, query, body):
+        member_id, isbn = query.get("member_id"), query.get("isbn")
+        loan = self.issue_return.get_loan(member_id, isbn)
+        if loan is None:
+            raise HTTPError(404, "Loan not found.")
+        return_date = _date(query.get("return_date") or date.today().isoformat())
+        fine = self.library_module.calculate_fine(loan.issue_date.isoformat(), return_date)
+        return 200, {"loan": loan_json(loan), "return_date": return_date, "fine": fine}
+
+    # Library
+
+    def overview(self, query, body):
+        return 200, self.library_module.get_library_overview(
+            self.book_manager, self.member_module, self.issue_return)
+
+    def settings(self, query, body):
+        return 200, self.library_module.list_settings()
+
+    def cache_info(self, query, body):
+        cache = self.book_manager.query_cache
+        if cache is None:
+            raise HTTPError(404, "Search cache is disabled.")
+        return 200, cache.info()._asdict()
+
+
+def _circulation_error(error):
+    status = 409 if error.reason in (CirculationError.NO_COPIES, CirculationError.NOT_BORROWED) else 404
+    return HTTPError(status, str(error))
+
+
+def _isbns(value):
+    if not isinstance(value, list):
+        raise HTTPError(400, "isbns must be a list.")
+    return [str(isbn) for isbn in value]
+
+
+def _fields(value):
+    if value in (None, "", "any"):
+        return FIELDS
+    if value not in FIELDS:
+        raise HTTPError(400, "field must be title, author or any.")
+    return (value,)
+
+
+def _page(query):
+    offset = _int(query.get("offset", 0), "offset")
+    limit = _int(query.get("limit", 100), "limit")
+    if offset < 0 or not 0 < limit <= 1000:
+        raise HTTPError(400, "offset must be >= 0 and limit between 1 and 1000.")
+    return offset, limit
+
+
+def _require(body, *fields):
+    if not isinstance(body, dict):
+        raise HTTPError(400, "Expected a JSON object body.")
+    missing = [field for field in fields if body.get(field) in (None, "")]
+    if missing:
+        raise HTTPError(400, f"Missing fields: {', '.join(missing)}")
+    return body
+
+
+def _strings(data, *fields):
+    """Reject fields that are present but not strings; the indexes and searches expect text."""
+    wrong = [field for field in fields if data.get(field) is not None and not isinstance(data[field], str)]
+    if wrong:
+        raise HTTPError(400, f"Must be strings: {', '.join(wrong)}")
+    return data
+
+
+def _flag(data, field):
+    """Read an optional JSON boolean; strings like "false" are rejected rather than taken as true."""
+    value = data.get(field)
+    if value is None:
+        return False
+    if not isinstance(value, bool):
+        raise HTTPError(400, f"{field} must be true or false.")
+    return value
+
+
+def _count(value, name):
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        raise HTTPError(400, f"{name} must be an integer >= 0.")
+    return value
+
+
+def _int(value, name):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"{name} must be an integer.") from None
+
+
+def _date(value):
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        raise HTTPError(400, "Dates must use YYYY-MM-DD.") from None
+    return value
+
+
+class HTTPServer:
+    """
+    Minimal HTTP/1.1 server with keep-alive, handing JSON requests to a LibraryAPI.
+
+    Each connection is served by its own coroutine; an idle or slow connection
+    only waits on its own reads and writes.
+    """
+
+    def __init__(self, api, idle_timeout=30.0):
+        self.api = api
+        self.idle_timeout = idle_timeout
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, target, version, headers, body = request
+                keep_alive = _keep_alive(version, headers)
+                status, payload = await self._respond(method, target, body)
+                await self._write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except HTTPError as error:  # Malformed request framing; answer and hang up
+            await self._write_response(writer, error.status, {"error": error.message}, False)
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _read_request(self, reader):
+        line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(400, "Malformed request line.") from None
+
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise HTTPError(400, "Too many headers.")
+
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise HTTPError(400, "Invalid Content-Length.")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, "Request body too large.")
+        raw = await asyncio.wait_for(reader.readexactly(length), self.idle_timeout) if length else b""
+        return method.upper(), target, version, headers, raw
+
+    async def _respond(self, method, target, raw):
+        try:
+            body = json.loads(raw) if raw else None
+        except ValueError:
+            return 400, {"error": "Body is not valid JSON."}
+        try:
+            result = self.api.dispatch(method, target, body)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+        except HTTPError as error:
+            return error.status, {"error": error.message}
+        except Exception as error:  # Keep serving other requests
+            return 500, {"error": f"{type(error).__name__}: {error}"}
+
+    async def _write_response(self, writer, status, payload, keep_alive):
+        data = json.dumps(payload).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + data)
+        await writer.drain()
+
+
+def _keep_alive(version, headers):
+    connection = headers.get("connection", "").lower()
+    if version == "HTTP/1.0":
+        return connection == "keep-alive"
+    return connection != "close"
+
+
+async def serve(api, host, port, store=None, flush_interval=1.0):
+    """Serve the API until SIGINT/SIGTERM, flushing the store periodically."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):  # Not supported on this platform/thread
+            pass
+
+    server = await asyncio.start_server(HTTPServer(api).handle_connection, host, port)
+    addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+    print(f"Serving library API on {addresses}", flush=True)
+    async with server:
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            if store is not None:
+                store.flush()
+
+
+def main(argv=None):
+    from storage import open_library
+
+    parser = argparse.ArgumentParser(description="Serve the library over HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="port to bind (default: 8080)")
+    parser.add_argument("--data-dir", help="data directory (default: $LMS_DATA_DIR or library_data)")
+    parser.add_argument("--backend", choices=("journal", "mapped", "sqlite"), help="storage backend (default: $LMS_STORAGE or journal)")
+    parser.add_argument("--metrics-file", help="keep Prometheus metrics in this file (default: $LMS_METRICS_FILE)")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on this local port (default: $LMS_METRICS_PORT)")
+    parser.add_argument("--log-level", help="minimum log level (default: $LMS_LOG_LEVEL or INFO)")
+    parser.add_argument("--scan-workers", type=int, default=0,
+                        help="processes for pattern/regex scans of the catalog (default: 0, scan on a server thread)")
+    parser.add_argument("--log-file", help="append JSON-lines logs to this file (default: $LMS_LOG_FILE or stderr)")
+    args = parser.parse_args(argv)
+
+    log_listener = logs.configure(args.log_level, args.log_file)
+    if args.metrics_file or args.metrics_port:
+        exporter = metrics.enable(args.metrics_file, args.metrics_port)
+    else:
+        exporter = metrics.enable_from_env()
+
+    store, book_manager, member_module, issue_return = open_library(args.data_dir, args.backend)
+    circulation = Circulation(book_manager, member_module, issue_return, store)
+    api = LibraryAPI(book_manager, member_module, issue_return, circulation=circulation)
+    # Built while the server starts accepting requests; /suggest answers [] until it is ready
+    Autocomplete().attach(book_manager, issue_return, background=True)
+    # Also without workers: its copy of the catalog lets scans run off the loop without locking out changes
+    scan_engine = ShardedScan(args.scan_workers)
+    scan_engine.attach(book_manager)
+    if exporter is not None and book_manager.query_cache is not None:
+        book_manager.query_cache.watch(metrics.REGISTRY)
+    try:
+        asyncio.run(serve(api, args.host, args.port, store))
+    finally:
+        scan_engine.close()
+        store.close()
+        if exporter is not None:
+            exporter.close()
+        logs.shutdown(log_listener)
+
+
+if __name__ == "__main__":
+    main()
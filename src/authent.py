@@ -1,17 +1,159 @@
-# Sample stored users
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Sample stored users (seed accounts), as salted scrypt hashes made with the parameters below
 stored_users = [
-    {"username": "john_doe", "email": "john@example.com", "password": "password123"},
-    {"username": "jane_smith", "email": "jane@example.com", "password": "secure456"},
+    {"username": "john_doe", "email": "john@example.com",
+     "salt": bytes.fromhex("3387ffe1f976ad0e81c2542363d56289"),
+     "password_hash": bytes.fromhex("b2f6b9f8b7b9df6bdd0abfd21f1727c0"
+                                    "235fb1907d5f5aa3cbc3a044c1aa11d4")},
+    {"username": "jane_smith", "email": "jane@example.com",
+     "salt": bytes.fromhex("5d1963c854ca3d2594cb9b647f88dd40"),
+     "password_hash": bytes.fromhex("3dca8df8d8517176a446374d9a7167c3"
+                                    "0e818a321cb13020d1a87add74bcef72")},
 ]
 
+# scrypt cost parameters: ~16 MiB and tens of milliseconds per hash
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+HASH_LENGTH = 32
+
+
+def hash_password(password: str, salt: bytes) -> bytes:
+    """Derive a memory-hard hash of a password with scrypt."""
+    return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=SCRYPT_N,
+                          r=SCRYPT_R, p=SCRYPT_P, dklen=HASH_LENGTH)
+
+
+class CredentialStore:
+    """
+    Staff credentials indexed by username and email, stored as salted scrypt hashes.
+
+    Lookups are O(1) dictionary hits. An optional bounded cache remembers recent
+    successful logins, keyed by a keyed digest of identity and password (never
+    the password itself), so repeat authentications within ``session_ttl``
+    seconds skip the expensive hash.
+    """
+
+    def __init__(self, session_cache_size=0, session_ttl=900.0):
+        """
+        Args:
+            session_cache_size (int): Verified sessions to remember; 0 disables the cache
+            session_ttl (float): Seconds a cached verification stays valid
+        """
+        self.users_by_username = {}
+        self.users_by_email = {}
+        self.session_cache_size = session_cache_size
+        self.session_ttl = session_ttl
+        self._sessions = OrderedDict()  # digest -> expiry time
+        self._session_key = os.urandom(32)
+        self._lock = threading.Lock()
+        self._dummy_salt = os.urandom(16)
+
+    def add_user(self, username: str, email: str, password: str) -> bool:
+        """
+        Register an account.
+
+        Returns:
+            bool: True if added, False if the username or email is taken
+        """
+        if username in self.users_by_username or email in self.users_by_email:
+            return False
+        salt = os.urandom(16)
+        return self.add_hashed_user(username, email, salt, hash_password(password, salt))
+
+    def add_hashed_user(self, username: str, email: str, salt: bytes, password_hash: bytes) -> bool:
+        """
+        Register an account from a stored salt and scrypt hash, without the password.
+
+        Returns:
+            bool: True if added, False if the username or email is taken
+        """
+        if username in self.users_by_username or email in self.users_by_email:
+            return False
+        user = {"username": username, "email": email, "salt": salt,
+                "password_hash": password_hash}
+        self.users_by_username[username] = user
+        self.users_by_email[email] = user
+        return True
+
+    def find_user(self, email: str, username: str):
+        """Return the account for an email (preferred) or username, or None."""
+        user = self.users_by_email.get(email) if email else None
+        if user is None and username:
+            user = self.users_by_username.get(username)
+        return user
+
+    def verify(self, email: str, username: str, password: str) -> bool:
+        """
+        Check a password for the account named by email or username.
+
+        Returns:
+            bool: True if the account exists and the password matches
+        """
+        user = self.find_user(email, username)
+        if user is None:
+            # Hash anyway so unknown accounts take as long as wrong passwords
+            hash_password(password, self._dummy_salt)
+            return False
+
+        session = None
+        if self.session_cache_size:
+            session = hmac.new(self._session_key,
+                               f"{user['username']}\0{password}".encode("utf-8"),
+                               hashlib.sha256).digest()
+            with self._lock:
+                expiry = self._sessions.get(session)
+                if expiry is not None:
+                    if expiry > time.monotonic():
+                        self._sessions.move_to_end(session)
+                        return True
+                    del self._sessions[session]
+
+        if not hmac.compare_digest(hash_password(password, user["salt"]),
+                                   user["password_hash"]):
+            return False
+
+        if session is not None:
+            with self._lock:
+                self._sessions[session] = time.monotonic() + self.session_ttl
+                self._sessions.move_to_end(session)
+                while len(self._sessions) > self.session_cache_size:
+                    self._sessions.popitem(last=False)
+        return True
+
+    def clear_sessions(self):
+        """Forget every cached verification (e.g. after a password change)."""
+        with self._lock:
+            self._sessions.clear()
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_credential_store() -> CredentialStore:
+    """Return the shared credential store, loading the seed accounts on first use."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            store = CredentialStore(session_cache_size=128)
+            for user in stored_users:
+                store.add_hashed_user(user["username"], user["email"], user["salt"],
+                                      user["password_hash"])
+            _default_store = store
+        return _default_store
+
 # Function to authenticate user
 
 
 def authenticate_user(email: str, username: str, password: str) -> bool:
-    for user in stored_users:
-        if ((email and user["email"] == email) or (username and user["username"] == username)) and user["password"] == password:
-            return True
-    return False
+    return get_credential_store().verify(email, username, password)
 
 # Function to get user input
 
@@ -0,0 +1,347 @@
+"""Type-ahead suggestions of titles and authors from a radix tree over their words."""
+
+import heapq
+import threading
+from bisect import bisect_left
+from collections import namedtuple
+from os.path import commonprefix
+
+from metrics import instrumented
+from text_index import tokenize
+
+Suggestion = namedtuple("Suggestion", "kind text borrows")
+
+# Suggestion keys are the normalized text behind a one-letter kind prefix, so
+# a title and an author with the same wording stay separate.
+TITLE, AUTHOR = "t", "a"
+KINDS = {TITLE: "title", AUTHOR: "author"}
+
+
+class _Node:
+    """Radix tree node: the edge label leading to it, children by first letter,
+    the suggestions whose words end here, and the best suggestions below it."""
+
+    __slots__ = ("label", "children", "entries", "top")
+
+    def __init__(self, label):
+        self.label = label
+        self.children = {}
+        self.entries = None  # Set of suggestion keys for the word ending here
+        self.top = []  # Up to top_n suggestion keys of this subtree, best first
+
+
+class Autocomplete:
+    """
+    Suggest titles and authors whose words start with what has been typed.
+
+    Every word of every title and author is a key in a compressed prefix tree
+    (radix tree). Each node caches the ``top_n`` most-borrowed suggestions of its
+    subtree, so a lookup walks at most the length of the prefix and copies one
+    cached list, whatever the size of the catalog. Books added or removed and
+    copies borrowed update only the paths of the affected words.
+
+    A title's borrow count is the lifetime borrow count of every ISBN with that
+    title; an author's is the total over their books.
+
+    Attributes:
+        top_n (int): Suggestions cached per node
+        weights (Dict[str, int]): Borrow count of each suggestion key
+        ready (bool): False while a background build is running
+    """
+
+    def __init__(self, top_n=10):
+        """
+        Args:
+            top_n (int): Suggestions cached per node, the most a lookup can return
+        """
+        self.top_n = top_n
+        self.weights = {}
+        self._root = _Node("")
+        self._terminals = {}  # Indexed word -> the node it ends at
+        self._books = {}  # Suggestion key -> number of books behind it
+        self._display = {}  # Suggestion key -> text as first added
+        self.book_manager = None
+        self.loans = None
+        self.ready = True
+        self._lock = threading.Lock()  # Serializes updates; lookups only read whole lists
+        self._queued = []  # (apply, args) reported during a background build, in order
+        self._queue_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.weights)
+
+    def attach(self, book_manager, issue_return, background=False):
+        """
+        Index the current catalog and have the managers keep the tree current.
+
+        Args:
+            book_manager (BookManager): Catalog to suggest from
+            issue_return (IssueReturn): Loans whose lifetime counts rank the suggestions
+            background (bool): Build the tree on a daemon thread and return at once.
+                ``suggest`` returns nothing until it is ready; changes reported
+                meanwhile are queued and applied in order. Call this from the
+                thread that changes the catalog.
+        """
+        self.book_manager = book_manager
+        self.loans = issue_return.loans
+        if background:
+            # Taken before the hooks are set, so the queue holds exactly the later changes
+            books, counts = _snapshot(book_manager.books), dict(self.loans.borrow_counts())
+            self.ready = False
+            threading.Thread(target=self._build, args=(books, counts),
+                             name="autocomplete-build", daemon=True).start()
+        else:
+            self._build(book_manager.books.values(), self.loans.borrow_counts())
+        book_manager.suggestions = self
+        issue_return.suggestions = self
+
+    def _build(self, books, counts):
+        with self._lock:
+            for book in books:
+                borrows = counts.get(book.isbn, 0)
+                for key, text in self._keys(book):
+                    self._add(key, text, borrows, offer=False)
+            self._rank(self._root)  # One bottom-up pass instead of offering every entry
+        while True:
+            with self._queue_lock:
+                queued, self._queued = self._queued, []
+                if not queued:
+                    self.ready = True
+                    return
+            for apply, args in queued:
+                apply(*args)
+
+    def _defer(self, apply, *args):
+        """Queue a change while a background build runs; False once the tree is ready."""
+        with self._queue_lock:
+            if self.ready:
+                return False
+            self._queued.append((apply, args))
+            return True
+
+    @instrumented
+    def suggest(self, text, limit=None):
+        """
+        Suggest titles and authors for partially typed text.
+
+        The last word may be incomplete. Earlier words must appear in full; they
+        filter the cached completions of the last word rather than widening the
+        search, so a multi-word query can return fewer than ``limit``.
+
+        Args:
+            text (str): What has been typed so far
+            limit (int, optional): Maximum suggestions, at most ``top_n``
+
+        Returns:
+            list: Suggestion(kind, text, borrows) tuples, most borrowed first
+        """
+        words = tokenize(text)
+        if not words or not self.ready:
+            return []
+        node = self._locate(words[-1])
+        if node is None:
+            return []
+        keys = node.top
+        if len(words) > 1:
+            required = set(words[:-1])
+            keys = [key for key in keys if required <= set(tokenize(key[1:]))]
+        weights, display = self.weights, self._display
+        # .get: a concurrent removal may have dropped a key still listed in this copy
+        return [Suggestion(KINDS[key[0]], display.get(key, key[1:]), weights.get(key, 0))
+                for key in keys[:limit or self.top_n]]
+
+    def add_book(self, book):
+        """Index a book's title and author (called by BookManager)."""
+        borrows = self.loans.borrow_count(book.isbn) if self.loans is not None else 0
+        if self.ready or not self._defer(self._add_book, book, borrows):
+            self._add_book(book, borrows)
+
+    def _add_book(self, book, borrows):
+        with self._lock:
+            for key, text in self._keys(book):
+                self._add(key, text, borrows)
+
+    def remove_book(self, book):
+        """Drop a removed book's share of its title and author (called by BookManager)."""
+        borrows = self.loans.borrow_count(book.isbn) if self.loans is not None else 0
+        if self.ready or not self._defer(self._remove_book, book, borrows):
+            self._remove_book(book, borrows)
+
+    def _remove_book(self, book, borrows):
+        with self._lock:
+            for key, _ in self._keys(book):
+                self._books[key] -= 1
+                if not self._books[key]:
+                    self._remove(key)
+                elif borrows:
+                    self.weights[key] -= borrows
+                    for word in set(tokenize(key[1:])):
+                        self._demote(self._path(word), key)
+
+    def borrowed(self, isbn):
+        """Count one more borrow of a book (called by IssueReturn)."""
+        book = self.book_manager.books.get(isbn) if self.book_manager is not None else None
+        if book is None:
+            return
+        if self.ready or not self._defer(self._borrowed, book):
+            self._borrowed(book)
+
+    def _borrowed(self, book):
+        with self._lock:
+            for key, _ in self._keys(book):
+                if key in self.weights:
+                    self.weights[key] += 1
+                    for word in set(tokenize(key[1:])):
+                        for node in self._path(word):
+                            self._offer(node, key)
+
+    @staticmethod
+    def _keys(book):
+        return (TITLE + book.title.lower(), book.title), (AUTHOR + book.author.lower(), book.author)
+
+    def _add(self, key, text, borrows, offer=True):
+        if key in self.weights:
+            self._books[key] += 1
+            if borrows:
+                self.weights[key] += borrows
+                if offer:
+                    for word in set(tokenize(key[1:])):
+                        for node in self._path(word):
+                            self._offer(node, key)
+            return
+        self._books[key] = 1
+        self.weights[key] = borrows
+        self._display[key] = text
+        for word in set(tokenize(key[1:])):
+            terminal = self._terminals.get(word)
+            if terminal is None:
+                terminal = self._terminals[word] = self._insert(word)[-1]
+                terminal.entries = {key}
+            else:
+                terminal.entries.add(key)
+            if offer:
+                for node in self._path(word):
+                    self._offer(node, key)
+
+    def _remove(self, key):
+        del self._books[key]
+        for word in set(tokenize(key[1:])):
+            path = self._path(word)
+            path[-1].entries.discard(key)
+            self._demote(path, key)
+            if not path[-1].entries:
+                path[-1].entries = None
+                del self._terminals[word]
+                self._prune(path)
+        del self.weights[key]
+        del self._display[key]
+
+    def _rank_key(self, key):
+        return -self.weights[key], key
+
+    def _offer(self, node, key):
+        """Place ``key``, whose weight has grown, in ``node.top`` if it now belongs there."""
+        top = node.top
+        rank = self._rank_key(key)
+        if key in top:
+            index = top.index(key)
+            if index == 0 or self._rank_key(top[index - 1]) < rank:
+                return  # Still in order
+            top = top[:index] + top[index + 1:]
+        elif len(top) >= self.top_n:
+            if rank >= self._rank_key(top[-1]):
+                return
+            top = top[:-1]
+        # A new list rather than an in-place insert, so lock-free readers never see it half done
+        index = bisect_left(top, rank, key=self._rank_key)
+        node.top = top[:index] + [key] + top[index:]
+
+    def _demote(self, path, key):
+        """Recompute the cached tops that held ``key`` after its weight fell or it left, deepest first."""
+        for node in reversed(path):
+            if key in node.top:
+                node.top = self._best(node)
+
+    def _best(self, node):
+        candidates = set(node.entries or ())
+        for child in node.children.values():
+            candidates.update(child.top)
+        return heapq.nsmallest(self.top_n, candidates, key=self._rank_key)
+
+    def _rank(self, node):
+        """Fill in ``top`` for a whole subtree, children first."""
+        stack = [(node, False)]
+        while stack:
+            current, expanded = stack.pop()
+            if expanded:
+                current.top = self._best(current)
+            else:
+                stack.append((current, True))
+                stack.extend((child, False) for child in current.children.values())
+
+    def _insert(self, word):
+        """Return the root-to-node path for ``word``, creating and splitting nodes as needed."""
+        node, rest, path = self._root, word, [self._root]
+        while rest:
+            child = node.children.get(rest[0])
+            if child is None:
+                child = _Node(rest)
+                node.children[rest[0]] = child
+                path.append(child)
+                return path
+            shared = len(commonprefix((rest, child.label)))
+            if shared < len(child.label):
+                # Split the edge; the new middle node covers the same subtree
+                middle = _Node(child.label[:shared])
+                child.label = child.label[shared:]
+                middle.children[child.label[0]] = child
+                middle.top = list(child.top)
+                node.children[rest[0]] = middle
+                child = middle
+            node, rest = child, rest[shared:]
+            path.append(node)
+        return path
+
+    def _path(self, word):
+        """Return the root-to-node path of an indexed word."""
+        node, rest, path = self._root, word, [self._root]
+        while rest:
+            node = node.children[rest[0]]
+            rest = rest[len(node.label):]
+            path.append(node)
+        return path
+
+    def _locate(self, prefix):
+        """Return the shallowest node whose subtree holds every word starting with ``prefix``."""
+        node, rest = self._root, prefix
+        while rest:
+            node = node.children.get(rest[0])
+            if node is None:
+                return None
+            label = node.label
+            if len(rest) <= len(label):
+                return node if label.startswith(rest) else None
+            if not rest.startswith(label):
+                return None
+            rest = rest[len(label):]
+        return node
+
+    def _prune(self, path):
+        """Drop nodes left without words below them, then fold a leftover pass-through node into its child."""
+        depth = len(path) - 1
+        while depth > 0 and not path[depth].entries and not path[depth].children:
+            del path[depth - 1].children[path[depth].label[0]]
+            depth -= 1
+        node = path[depth]
+        if depth > 0 and not node.entries and len(node.children) == 1:
+            # The child absorbs the edge rather than the other way round, so the
+            # nodes in ``_terminals`` stay the ones their words end at
+            (child,) = node.children.values()
+            child.label = node.label + child.label
+            path[depth - 1].children[node.label[0]] = child
+
+
+def _snapshot(books):
+    """The books as of now; stores that can copy their state cheaply (MappedBooks) do so."""
+    snapshot = getattr(books, "snapshot", None)
+    return snapshot().values() if snapshot is not None else list(books.values())
@@ -0,0 +1 @@
+"""Benchmarks for the library modules; run from src/ with ``python -m benchmarks.<name>``."""
@@ -0,0 +1,108 @@
+"""Load-test the HTTP/JSON API with concurrent keep-alive clients."""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def request(reader, writer, method, path, payload=None):
+    """Send one keep-alive request and return (status, decoded JSON body)."""
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line == b"\r\n":
+            break
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def client(port, requests, paths, latencies):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for i in range(requests):
+        start = time.perf_counter()
+        status, _ = await request(reader, writer, "GET", paths[i % len(paths)])
+        latencies.append(time.perf_counter() - start)
+        assert status == 200, status
+    writer.close()
+    await writer.wait_closed()
+
+
+async def wait_for_server(port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+async def run(args, port):
+    await wait_for_server(port)
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for i in range(args.books):
+        await request(reader, writer, "POST", "/books",
+                      {"isbn": f"{i:09d}", "title": f"Title {i} python",
+                       "author": f"Author {i % 500}", "copies": 2})
+    writer.close()
+
+    paths = ["/books/000000042", "/search?title=python&limit=20",
+             "/search?author=author%2017", "/overview"]
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, args.requests, paths, latencies)
+                           for _ in range(args.clients)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+    print(f"{args.clients} clients x {args.requests} requests over keep-alive, {args.books} books")
+    print(f"throughput: {len(latencies) / elapsed:,.0f} req/s")
+    print(f"latency ms: p50 {pct(50):.2f}  p90 {pct(90):.2f}  p99 {pct(99):.2f}  max {latencies[-1] * 1000:.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=50, help="concurrent connections (default: 50)")
+    parser.add_argument("--requests", type=int, default=200, help="requests per connection (default: 200)")
+    parser.add_argument("--books", type=int, default=2000, help="books to load first (default: 2000)")
+    args = parser.parse_args(argv)
+
+    port = free_port()
+    with tempfile.TemporaryDirectory() as data_dir:
+        server = subprocess.Popen(
+            [sys.executable, "api_server.py", "--port", str(port), "--data-dir", data_dir],
+            cwd=SRC_DIR, stdout=subprocess.DEVNULL)
+        try:
+            asyncio.run(run(args, port))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
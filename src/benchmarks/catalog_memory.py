@@ -0,0 +1,60 @@
+"""Compare catalog memory use of the __slots__ Book against a __dict__-backed record."""
+
+import argparse
+import gc
+import tracemalloc
+
+from book import Book
+
+
+class DictBook:
+    """The previous Book layout: a plain object with a per-instance __dict__."""
+
+    def __init__(self, isbn, title, author, copies):
+        self.isbn = isbn
+        self.title = title
+        self.author = author
+        self.copies = copies
+
+
+def measure(book_class, count, authors):
+    """
+    Build an ISBN -> book catalog and report the memory it holds.
+
+    Args:
+        book_class (type): Record class to instantiate
+        count (int): Number of books
+        authors (int): Number of distinct author names
+
+    Returns:
+        int: Bytes allocated by the catalog
+    """
+    gc.collect()
+    tracemalloc.start()
+    catalog = {}
+    for i in range(count):
+        isbn = f"978{i:010d}"
+        # Author names are built per row, as they would be when parsed from a feed.
+        catalog[isbn] = book_class(isbn, f"Title {i}", f"Author {i % authors}", 1 + i % 5)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del catalog
+    return size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--books", type=int, default=1_000_000, help="catalog size (default: 1,000,000)")
+    parser.add_argument("--authors", type=int, default=50_000, help="distinct authors (default: 50,000)")
+    args = parser.parse_args(argv)
+
+    dict_bytes = measure(DictBook, args.books, args.authors)
+    slots_bytes = measure(Book, args.books, args.authors)
+    print(f"{'layout':<10}{'total MiB':>12}{'bytes/book':>12}")
+    for name, size in (("__dict__", dict_bytes), ("__slots__", slots_bytes)):
+        print(f"{name:<10}{size / 2**20:>12.1f}{size / args.books:>12.0f}")
+    print(f"saving: {1 - slots_bytes / dict_bytes:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Hammer Circulation with concurrent checkouts and checkins and verify the invariants hold."""
+
+import argparse
+import random
+import threading
+import time
+from collections import Counter
+
+from book import Book, BookManager
+from circulation import Circulation, CirculationError
+from issue_return import IssueReturn
+from member import MemberModule
+from stats import LibraryStats
+
+
+def build_library(books, copies, members):
+    """Create an in-memory library with ``books`` titles of ``copies`` each and ``members`` members."""
+    book_manager, member_module, issue_return = BookManager(), MemberModule(), IssueReturn()
+    book_manager.add_books(Book(f"isbn-{i}", f"Title {i}", f"Author {i % 97}", copies)
+                           for i in range(books))
+    for i in range(members):
+        member_module.register_member(f"m{i}", f"Member {i}", f"m{i}@example.com", "555-0100")
+    LibraryStats().attach(book_manager, member_module, issue_return)
+    return book_manager, member_module, issue_return
+
+
+def run(threads, stripes, ops, books, copies, members, hold_ms, seed=0):
+    """
+    Run ``threads`` workers doing ``ops`` random checkouts/checkins each.
+
+    ``hold_ms`` of simulated work (a slow store write) is spent inside every
+    copy update, i.e. while the operation holds its stripes.
+
+    Returns:
+        dict: Throughput, refusal count and invariant violations
+    """
+    book_manager, member_module, issue_return = build_library(books, copies, members)
+    circulation = Circulation(book_manager, member_module, issue_return, stripes=stripes)
+    isbns = list(book_manager.books)
+    negative = []
+
+    adjust_copies = book_manager.adjust_copies
+
+    def slow_adjust_copies(isbn, delta):
+        time.sleep(hold_ms / 1000)
+        result = adjust_copies(isbn, delta)
+        if book_manager.books[isbn].copies < 0:
+            negative.append(isbn)  # A copy was lent that was not on the shelf
+        return result
+
+    book_manager.adjust_copies = slow_adjust_copies
+    refused = Counter()
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        local = Counter()
+        barrier.wait()
+        for _ in range(ops):
+            member_id = f"m{rng.randrange(members)}"
+            borrowed = list(member_module.get_borrowed_books(member_id))
+            try:
+                if borrowed and rng.random() < 0.5:
+                    circulation.checkin(member_id, rng.choice(borrowed))
+                else:
+                    circulation.checkout(member_id, rng.choice(isbns))
+            except CirculationError as error:
+                local[error.reason] += 1
+        refused.update(local)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "ops_per_second": threads * ops / elapsed,
+        "refused": sum(refused.values()),
+        "violations": len(negative) + len(check_invariants(book_manager, member_module,
+                                                             issue_return, copies)),
+    }
+
+
+def check_invariants(book_manager, member_module, issue_return, copies):
+    """Return a list of invariant violations (empty when the state is consistent)."""
+    problems = []
+    for isbn, book in book_manager.books.items():
+        lent = len(issue_return.holders_of(isbn))
+        if book.copies < 0 or book.copies + lent != copies:
+            problems.append(f"{isbn}: {book.copies} on shelf, {lent} lent, {copies} owned")
+    for member in member_module.list_members():
+        member_id = member.member_id
+        loans = Counter(loan.isbn for loan in issue_return.loans_for_member(member_id))
+        if Counter(member.borrowed) != loans:
+            problems.append(f"{member_id}: borrowed list does not match open loans")
+    stats = book_manager.stats
+    if stats.active_loans != len(issue_return.loans):
+        problems.append("stats: active loan count drifted")
+    if stats.available_copies != sum(book.copies for book in book_manager.books.values()):
+        problems.append("stats: available copy count drifted")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", default="1,2,4,8,16", help="comma-separated thread counts")
+    parser.add_argument("--ops", type=int, default=500, help="operations per thread (default: 500)")
+    parser.add_argument("--books", type=int, default=200, help="titles (default: 200)")
+    parser.add_argument("--copies", type=int, default=2, help="copies per title (default: 2)")
+    parser.add_argument("--members", type=int, default=500, help="members (default: 500)")
+    parser.add_argument("--hold-ms", type=float, default=1.0,
+                        help="simulated store latency per update, under the locks (default: 1.0)")
+    args = parser.parse_args(argv)
+
+    print(f"{args.books} titles x {args.copies} copies, {args.members} members, "
+          f"{args.ops} ops/thread, {args.hold_ms} ms per update")
+    print(f"{'threads':>7}{'global ops/s':>14}{'striped ops/s':>15}{'speedup':>9}"
+          f"{'refused':>9}{'violations':>12}")
+    failed = False
+    for threads in (int(t) for t in args.threads.split(",")):
+        common = (args.ops, args.books, args.copies, args.members, args.hold_ms)
+        serial = run(threads, 1, *common)
+        striped = run(threads, 64, *common)
+        violations = serial["violations"] + striped["violations"]
+        failed |= bool(violations)
+        print(f"{threads:>7}{serial['ops_per_second']:>14,.0f}{striped['ops_per_second']:>15,.0f}"
+              f"{striped['ops_per_second'] / serial['ops_per_second']:>8.1f}x"
+              f"{striped['refused']:>9}{violations:>12}")
+    if failed:
+        raise SystemExit("invariant violations detected")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Time per-loan calculate_fine/is_book_overdue calls against the batch APIs."""
+
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+
+import library
+from library import LibraryManagementModule
+
+
+def make_dates(count, seed=0):
+    """Build issue and return dates for ``count`` synthetic loans over two years."""
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    issue_dates, return_dates = [], []
+    for _ in range(count):
+        issued = start + timedelta(days=rng.randrange(730))
+        issue_dates.append(issued.isoformat())
+        return_dates.append((issued + timedelta(days=rng.randrange(60))).isoformat())
+    return issue_dates, return_dates
+
+
+def original_calculate_fine(settings, issue_date, return_date):
+    """calculate_fine as it was before dates were cached: two strptime calls per loan."""
+    date_format = "%Y-%m-%d"
+    delta = datetime.strptime(return_date, date_format) - datetime.strptime(issue_date, date_format)
+    max_days = int(settings["max_borrow_days"])
+    if delta.days > max_days:
+        return (delta.days - max_days) * float(settings["fine_per_day"])
+    return 0.0
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--loans", type=int, default=1_000_000, help="number of loans (default: 1,000,000)")
+    args = parser.parse_args(argv)
+
+    module = LibraryManagementModule()
+    issue_dates, return_dates = make_dates(args.loans)
+    today = date(2026, 1, 1).isoformat()
+
+    original_fines, original_time = timed(
+        lambda: [original_calculate_fine(module.settings, i, r)
+                 for i, r in zip(issue_dates, return_dates)])
+    scalar_fines, scalar_fine_time = timed(
+        lambda: [module.calculate_fine(i, r) for i, r in zip(issue_dates, return_dates)])
+    batch_fines, batch_fine_time = timed(module.calculate_fines, issue_dates, return_dates)
+    assert original_fines == scalar_fines == batch_fines, "batch fines differ from calculate_fine"
+
+    scalar_flags, scalar_flag_time = timed(
+        lambda: [module.is_book_overdue(i, today) for i in issue_dates])
+    batch_flags, batch_flag_time = timed(module.overdue_flags, issue_dates, today)
+    assert scalar_flags == batch_flags, "batch flags differ from is_book_overdue"
+
+    backend = "numpy" if library.np is not None else "pure Python"
+    print(f"{args.loans:,} loans, batch backend: {backend}")
+    print(f"{'operation':<12}{'scalar s':>10}{'batch s':>10}{'speedup':>9}")
+    for name, scalar, batch in (("fines", scalar_fine_time, batch_fine_time),
+                                ("overdue", scalar_flag_time, batch_flag_time)):
+        print(f"{name:<12}{scalar:>10.2f}{batch:>10.2f}{scalar / batch:>8.1f}x")
+    print(f"uncached strptime fines: {original_time:.2f}s "
+          f"({original_time / batch_fine_time:.1f}x slower than batch)")
+
+
+if __name__ == "__main__":
+    main()
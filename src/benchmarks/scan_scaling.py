@@ -0,0 +1,121 @@
+"""Measure how ShardedScan query time scales with worker processes on a synthetic catalog.
+
+The headline run is ``python -m benchmarks.scan_scaling --books 10M``: every
+worker count must return the same books, and on an idle machine the time per
+query should fall close to 1/N up to the number of cores.
+"""
+
+import argparse
+import os
+import pickle
+import tempfile
+import time
+
+from benchmarks.synthetic import generate_books, scale_size
+from book import Book
+from parallel_scan import CHUNK_SIZE, ShardedScan
+
+QUERIES = (
+    ("substring", "python", False),
+    ("substring, no match", "qzx", False),
+    ("regex, anchored", r"^secret \w+ city$", True),
+    ("regex, backtracking", r"\b(ivan|olga)\b.*(ova|ov)$", True),
+)
+
+
+def write_catalog(path, size, seed):
+    """Generate the catalog once and store it as pickled chunks of (isbn, title, author)."""
+    with open(path, "wb") as f:
+        chunk = []
+        for book in generate_books(size, seed):
+            chunk.append((book.isbn, book.title, book.author))
+            if len(chunk) == CHUNK_SIZE:
+                pickle.dump(chunk, f, pickle.HIGHEST_PROTOCOL)
+                chunk = []
+        if chunk:
+            pickle.dump(chunk, f, pickle.HIGHEST_PROTOCOL)
+
+
+def read_catalog(path):
+    """Yield the books written by write_catalog, much faster than generating them again."""
+    with open(path, "rb") as f:
+        while True:
+            try:
+                chunk = pickle.load(f)
+            except EOFError:
+                return
+            for isbn, title, author in chunk:
+                yield Book(isbn, title, author, 1)
+
+
+def measure_scaling(size, worker_counts, repeat=3, seed=0):
+    """
+    Load the same catalog into engines with each worker count and time the queries.
+
+    Args:
+        size (int): Number of books
+        worker_counts (list): Worker processes per engine; 0 scans in this process
+        repeat (int): Runs per query; the fastest is kept
+        seed (int): Data generator seed
+
+    Returns:
+        list: One dict per worker count with ``load_seconds``, ``seconds`` per
+            query name and ``matches`` per query name
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog.pickle")
+        write_catalog(path, size, seed)
+        for workers in worker_counts:
+            with ShardedScan(workers) as engine:
+                start = time.perf_counter()
+                engine.load(read_catalog(path), size)
+                result = {"workers": workers, "load_seconds": time.perf_counter() - start,
+                          "seconds": {}, "matches": {}}
+                for name, pattern, regex in QUERIES:
+                    best = None
+                    for _ in range(repeat):
+                        start = time.perf_counter()
+                        matches = len(engine.scan(pattern, regex))
+                        elapsed = time.perf_counter() - start
+                        best = elapsed if best is None else min(best, elapsed)
+                    result["seconds"][name] = best
+                    result["matches"][name] = matches
+            results.append(result)
+    return results
+
+
+def main(argv=None):
+    cpus = os.cpu_count() or 1
+    default_workers = [0] + [n for n in (1, 2, 4, 8, 16, 32) if n <= cpus]
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--books", default="1M", help="catalog size: 1M, 10M or a number (default: 1M)")
+    parser.add_argument("--workers", default=",".join(map(str, default_workers)),
+                        help="comma-separated worker counts; 0 scans in-process "
+                             f"(default: {','.join(map(str, default_workers))})")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per query (default: 3)")
+    parser.add_argument("--seed", type=int, default=0, help="data generator seed (default: 0)")
+    args = parser.parse_args(argv)
+
+    size = scale_size(args.books)
+    worker_counts = [int(n) for n in args.workers.split(",")]
+    results = measure_scaling(size, worker_counts, args.repeat, args.seed)
+
+    baseline = next((r for r in results if r["workers"] == 1), results[0])
+    print(f"{size:,} books, {cpus} CPUs")
+    print(f"{'workers':>8}{'load s':>9}" + "".join(f"{name:>22}" for name, _, _ in QUERIES)
+          + f"{'total ms':>10}{'speedup':>9}")
+    for result in results:
+        total = sum(result["seconds"].values())
+        speedup = sum(baseline["seconds"].values()) / total
+        print(f"{result['workers'] or 'local':>8}{result['load_seconds']:>9.1f}"
+              + "".join(f"{result['seconds'][name] * 1000:>19.1f} ms" for name, _, _ in QUERIES)
+              + f"{total * 1000:>10.1f}{speedup:>8.2f}x")
+        if result["matches"] != baseline["matches"]:
+            print(f"  results differ from {baseline['workers']} worker(s): {result['matches']}")
+    if max(worker_counts) > cpus:
+        print(f"note: more workers than CPUs ({cpus}); they share cores, so expect no further speedup")
+
+
+if __name__ == "__main__":
+    main()
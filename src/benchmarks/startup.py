@@ -0,0 +1,107 @@
+"""Measure start-up time of the lms CLI subcommands, with import cost from ``-X importtime``."""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMANDS = {
+    "help": ["--help"],
+    "books list": ["books", "list", "--limit", "10"],
+    "search": ["search", "title", "python"],
+    "loans list": ["loans", "list"],
+    "overview": ["overview"],
+}
+
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def import_profile(stderr):
+    """
+    Parse ``-X importtime`` output.
+
+    Returns:
+        tuple: (total import seconds, number of modules imported, top-level modules
+            sorted by cumulative seconds, largest first)
+    """
+    total, modules, top = 0, 0, []
+    for match in _IMPORT_LINE.finditer(stderr):
+        self_us, cumulative_us, indent, name = match.groups()
+        modules += 1
+        if not indent:
+            total += int(cumulative_us)
+            top.append((name, int(cumulative_us) / 1e6))
+    top.sort(key=lambda item: item[1], reverse=True)
+    return total / 1e6, modules, top
+
+
+def run_command(argv, data_dir, importtime=False, backend=None):
+    env = dict(os.environ, LMS_DATA_DIR=data_dir)
+    if backend:
+        env["LMS_STORAGE"] = backend
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + argv
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=SRC_DIR, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(argv)} failed: {proc.stderr.strip()[-500:]}")
+    return elapsed, proc.stderr
+
+
+def measure_startup(repeat=5, data_dir=None, backend=None):
+    """
+    Time each CLI subcommand from process start to exit, plus the GUI module's imports.
+
+    Args:
+        repeat (int): Runs per command; the fastest is kept
+        data_dir (str, optional): Library data directory; an empty temporary one by default
+        backend (str, optional): Storage backend to open it with; defaults to $LMS_STORAGE
+
+    Returns:
+        list: Result dicts in the benchmark suite's format, with ``import_seconds``
+            and ``modules`` from ``-X importtime``
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = data_dir or tmp
+        targets = [(f"startup:lms {name}", ["lms.py"] + argv) for name, argv in COMMANDS.items()]
+        # For comparison: what any entry point paid before, importing the GUI module.
+        targets.append(("startup:import main", ["-c", "import main"]))
+        results = []
+        for name, argv in targets:
+            best = min(run_command(argv, data_dir, backend=backend)[0] for _ in range(repeat))
+            import_seconds, modules, _ = import_profile(
+                run_command(argv, data_dir, importtime=True, backend=backend)[1])
+            results.append({"case": name, "scale": "-", "seconds": best, "ops": 1,
+                            "ops_per_second": None, "peak_bytes": None,
+                            "import_seconds": import_seconds, "modules": modules})
+        return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per command (default: 5)")
+    parser.add_argument("--data-dir", help="library data to open (default: an empty temporary directory)")
+    parser.add_argument("--backend", choices=("journal", "mapped", "sqlite"),
+                        help="storage backend for --data-dir (default: $LMS_STORAGE or journal)")
+    parser.add_argument("--top", metavar="COMMAND", help="also list the slowest top-level imports of this lms command")
+    args = parser.parse_args(argv)
+
+    print(f"{'command':<24}{'wall ms':>9}{'import ms':>11}{'modules':>9}")
+    for result in measure_startup(args.repeat, args.data_dir, args.backend):
+        print(f"{result['case'][len('startup:'):]:<24}{result['seconds'] * 1000:>9.1f}"
+              f"{result['import_seconds'] * 1000:>11.1f}{result['modules']:>9}")
+    if args.top:
+        with tempfile.TemporaryDirectory() as tmp:
+            _, stderr = run_command(["lms.py"] + args.top.split(), args.data_dir or tmp, importtime=True,
+                                    backend=args.backend)
+        for name, seconds in import_profile(stderr)[2][:10]:
+            print(f"  {name:<30}{seconds * 1000:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+"""Time the library's hot paths on synthetic data at several scales and compare with a baseline."""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from autocomplete import Autocomplete
+from benchmarks.synthetic import FIRST_NAMES, LAST_NAMES, WORDS, SyntheticLibrary, scale_size
+from book import Book, BookManager
+from library import LibraryManagementModule
+from query_cache import QueryCache
+from search import (full_text_search, fuzzy_search_by_author, fuzzy_search_by_title,
+                    search_by_author, search_by_title)
+
+CASES = {}
+
+
+def case(name):
+    """Register a benchmark case: ``setup(library, rng)`` returns a callable that runs it and returns its op count."""
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+@case("add_book")
+def add_book(library, rng):
+    books = [Book(b.isbn, b.title, b.author, b.copies)
+             for b in library.book_manager.books.values()]
+
+    def run():
+        manager = BookManager()
+        for book in books:
+            manager.add_book(book)
+        return len(books)
+    return run
+
+
+@case("search_by_title")
+def title_search(library, rng):
+    queries = [word.lower() for word in rng.sample(WORDS, 20)]
+    queries += [book.title[2:12] for book in rng.sample(list(library.book_manager.books.values()), 20)]
+
+    def run():
+        for query in queries:
+            search_by_title(library.book_manager, query)
+        return len(queries)
+    return run
+
+
+@case("search_by_author")
+def author_search(library, rng):
+    queries = [name.lower() for name in rng.sample(LAST_NAMES, 10)]
+    queries += [f"{first} {last}".lower() for first, last in
+                zip(rng.sample(FIRST_NAMES, 10), rng.sample(LAST_NAMES, 10))]
+
+    def run():
+        for query in queries:
+            search_by_author(library.book_manager, query)
+        return len(queries)
+    return run
+
+
+def misspell(rng, text):
+    """Replace one inner character of ``text``, as a typo would."""
+    i = rng.randrange(1, len(text) - 1)
+    return text[:i] + rng.choice("aeiouy") + text[i + 1:]
+
+
+@case("fuzzy_search_by_title")
+def fuzzy_title_search(library, rng):
+    queries = [misspell(rng, word) for word in rng.sample(WORDS, 20)]
+
+    def run():
+        for query in queries:
+            fuzzy_search_by_title(library.book_manager, query)
+        return len(queries)
+    return run
+
+
+@case("fuzzy_search_by_author")
+def fuzzy_author_search(library, rng):
+    queries = [misspell(rng, name) for name in rng.sample(LAST_NAMES, 10)]
+    queries += [misspell(rng, f"{first} {last}") for first, last in
+                zip(rng.sample(FIRST_NAMES, 10), rng.sample(LAST_NAMES, 10))]
+
+    def run():
+        for query in queries:
+            fuzzy_search_by_author(library.book_manager, query)
+        return len(queries)
+    return run
+
+
+@case("full_text_search")
+def ranked_search(library, rng):
+    queries = [word for word in rng.sample(WORDS, 10)]
+    queries += [f"{word} {name}" for word, name in zip(rng.sample(WORDS, 10), rng.sample(LAST_NAMES, 10))]
+
+    def run():
+        for query in queries:
+            full_text_search(library.book_manager, query, limit=20)
+        return len(queries)
+    return run
+
+
+@case("cached_search")
+def cached_search(library, rng):
+    # Popular queries repeat: 1000 title/author searches drawn from 60 distinct ones, skewed
+    distinct = ([(search_by_title, word) for word in rng.sample(WORDS, 30)]
+                + [(search_by_author, name.lower()) for name in rng.sample(LAST_NAMES, 20)]
+                + [(search_by_author, f"{first} {last}".lower()) for first, last in
+                   zip(rng.sample(FIRST_NAMES, 10), rng.sample(LAST_NAMES, 10))])
+    searches = [distinct[int(len(distinct) * rng.random() ** 2)] for _ in range(1000)]
+    manager = library.book_manager
+
+    def run():
+        manager.query_cache = QueryCache(maxsize=64)
+        try:
+            for search, query in searches:
+                search(manager, query)
+        finally:
+            manager.query_cache = None
+        return len(searches)
+    return run
+
+
+@case("autocomplete")
+def autocomplete(library, rng):
+    # What is typed before each keystroke: 1-4 letter prefixes of title and author words
+    words = [word.lower() for word in WORDS] + [name.lower() for name in FIRST_NAMES + LAST_NAMES]
+    prefixes = [word[:rng.randint(1, 4)] for word in rng.choices(words, k=1000)]
+    suggestions = Autocomplete()
+    suggestions.attach(library.book_manager, library.issue_return)
+    # Detached again so the other cases do not pay for keeping it current
+    library.book_manager.suggestions = library.issue_return.suggestions = None
+
+    def run():
+        for prefix in prefixes:
+            suggestions.suggest(prefix)
+        return len(prefixes)
+    return run
+
+
+@case("search_members")
+def member_search(library, rng):
+    queries = rng.sample(FIRST_NAMES, 10)
+
+    def run():
+        for query in queries:
+            library.member_module.search_members(query)
+        return len(queries)
+    return run
+
+
+@case("issue_return")
+def issue_return(library, rng):
+    available = [book.isbn for book in library.book_manager.books.values() if book.copies > 0]
+    member_ids = list(library.member_module.members)
+    pairs = [(rng.choice(member_ids), isbn)
+             for isbn in rng.sample(available, min(1000, len(available)))]
+    circulation = library.circulation
+
+    def run():
+        for member_id, isbn in pairs:
+            circulation.checkout(member_id, isbn)
+        for member_id, isbn in pairs:
+            circulation.checkin(member_id, isbn)
+        return 2 * len(pairs)
+    return run
+
+
+@case("library_overview")
+def overview(library, rng):
+    module = LibraryManagementModule()
+
+    def run():
+        for _ in range(1000):
+            module.get_library_overview(library.book_manager, library.member_module,
+                                        library.issue_return)
+        return 1000
+    return run
+
+
+@case("loan_fines")
+def loan_fines(library, rng):
+    module = LibraryManagementModule()
+    loans = list(library.issue_return.loans)
+
+    def run():
+        module.calculate_loan_fines(loans, "2026-01-01")
+        return len(loans)
+    return run
+
+
+def measure(run, repeat, memory):
+    """
+    Time ``run`` (best of ``repeat``) and optionally measure its peak allocation.
+
+    Peak memory comes from a separate traced run, so tracing does not inflate the timings.
+
+    Returns:
+        dict: seconds, ops, ops_per_second and peak_bytes (None when not measured)
+    """
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        ops = run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {"seconds": best, "ops": ops,
+            "ops_per_second": ops / best if best else None, "peak_bytes": peak}
+
+
+def run_suite(scales, cases, repeat=3, memory=True, seed=0, startup=True):
+    """
+    Run the selected cases at each scale, then time CLI start-up (scale "-").
+
+    Returns:
+        dict: ``meta`` describing the run and ``results``, one entry per (case, scale)
+    """
+    results = []
+    for scale in scales:
+        size = scale_size(scale)
+        start = time.perf_counter()
+        library = SyntheticLibrary(size, seed)
+        library.book_manager.query_cache = None  # Search cases time the indexes themselves
+        results.append({"case": "build", "scale": scale, "seconds": time.perf_counter() - start,
+                        "ops": size, "ops_per_second": None, "peak_bytes": None})
+        print(f"[{scale}] built {size:,} books, {library.members:,} members, "
+              f"{len(library.issue_return.loans):,} loans in {results[-1]['seconds']:.1f}s",
+              file=sys.stderr)
+        for name in cases:
+            setup = CASES[name]
+            result = measure(setup(library, random.Random(seed)), repeat, memory)
+            results.append({"case": name, "scale": scale, **result})
+            print(f"[{scale}] {name}: {result['seconds']:.4f}s", file=sys.stderr)
+        del library
+        gc.collect()
+    if startup:
+        from benchmarks.startup import measure_startup
+
+        for result in measure_startup(repeat=max(repeat, 3)):
+            results.append(result)
+            print(f"{result['case']}: {result['seconds']:.4f}s "
+                  f"(imports {result['import_seconds']:.4f}s)", file=sys.stderr)
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "seed": seed,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, tolerance, min_seconds=0.005):
+    """
+    Compare a report against a baseline report.
+
+    Timings shorter than ``min_seconds`` in the baseline are too noisy to judge
+    and are skipped; their memory is still compared.
+
+    Returns:
+        list: (case, scale, metric, baseline value, current value) for each metric
+            that grew by more than ``tolerance`` (a fraction)
+    """
+    previous = {(r["case"], r["scale"]): r for r in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        old = previous.get((result["case"], result["scale"]))
+        if old is None:
+            continue
+        for metric in ("seconds", "peak_bytes"):
+            if metric == "seconds" and old["seconds"] < min_seconds:
+                continue
+            if old.get(metric) and result.get(metric) and result[metric] > old[metric] * (1 + tolerance):
+                regressions.append((result["case"], result["scale"], metric, old[metric], result[metric]))
+    return regressions
+
+
+def format_table(report, baseline=None):
+    previous = {(r["case"], r["scale"]): r for r in baseline["results"]} if baseline else {}
+    lines = [f"{'case':<26}{'scale':>6}{'seconds':>11}{'ops/s':>14}{'peak MiB':>10}"
+             + (f"{'vs base':>9}" if baseline else "")]
+    for r in report["results"]:
+        rate = f"{r['ops_per_second']:,.0f}" if r["ops_per_second"] else "-"
+        peak = f"{r['peak_bytes'] / 2**20:.1f}" if r["peak_bytes"] is not None else "-"
+        line = f"{r['case']:<26}{r['scale']:>6}{r['seconds']:>11.4f}{rate:>14}{peak:>10}"
+        old = previous.get((r["case"], r["scale"]))
+        if old and old["seconds"]:
+            line += f"{r['seconds'] / old['seconds']:>8.2f}x"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scales", default="10k", help="comma-separated scales: 10k,100k,1M,10M (default: 10k)")
+    parser.add_argument("--cases", default=",".join(CASES), help="comma-separated cases (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case; the best is kept (default: 3)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced peak-memory run")
+    parser.add_argument("--no-startup", action="store_true", help="skip timing lms CLI start-up")
+    parser.add_argument("--seed", type=int, default=0, help="data generator seed (default: 0)")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown or memory growth before failing (default: 0.25)")
+    parser.add_argument("--min-seconds", type=float, default=0.005,
+                        help="ignore timing changes of cases faster than this in the baseline (default: 0.005)")
+    args = parser.parse_args(argv)
+
+    cases = [name for name in args.cases.split(",") if name]
+    unknown = [name for name in cases if name not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)}")
+
+    report = run_suite(args.scales.split(","), cases, args.repeat, not args.no_memory, args.seed,
+                       not args.no_startup)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print(format_table(report, baseline))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if baseline is not None:
+        regressions = compare(report, baseline, args.tolerance, args.min_seconds)
+        for name, scale, metric, old, new in regressions:
+            print(f"REGRESSION {name} @ {scale}: {metric} {old:.4g} -> {new:.4g}")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Deterministic synthetic catalogs, members and loan histories for benchmarks."""
+
+import random
+from datetime import date, timedelta
+
+from book import Book, BookManager
+from circulation import Circulation
+from issue_return import IssueReturn
+from member import MemberModule
+from stats import LibraryStats
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1M": 1_000_000, "10M": 10_000_000}
+
+WORDS = (
+    "shadow river garden winter silent empire broken glass hidden city last light "
+    "python data system art history ocean night secret journey lost world stone "
+    "machine learning fire island dream storm house mountain song war peace road "
+    "letters memory kingdom star time iron golden small theory practice guide"
+).split()
+FIRST_NAMES = (
+    "Anna James Maria John Olga Ivan Chen Wei Fatima Omar Lucia Pedro Aiko Kenji "
+    "Sofia Liam Emma Noah Amara Kwame Elena Mikhail Priya Ravi Sara David"
+).split()
+LAST_NAMES = (
+    "Smith Ivanova Garcia Chen Okafor Tanaka Dostoevsky Rossi Novak Kowalski Silva "
+    "Nakamura Mensah Haddad Patel Schmidt Dubois Larsen Kim Nguyen Costa Moreau"
+).split()
+
+HISTORY_START = date(2025, 1, 1)
+
+
+def scale_size(scale):
+    """Translate "10k"/"100k"/"1M"/"10M" (or a plain integer string) into a book count."""
+    return SCALES.get(scale) or int(scale.replace("_", ""))
+
+
+def isbn13(n):
+    """Return a valid, unique ISBN-13 for sequence number ``n``."""
+    body = f"978{n:09d}"
+    check = (10 - sum((3 if i % 2 else 1) * int(d) for i, d in enumerate(body)) % 10) % 10
+    return body + str(check)
+
+
+def generate_books(count, seed=0):
+    """
+    Yield ``count`` books with repeatable titles, authors and copy counts.
+
+    Args:
+        count (int): Number of distinct ISBNs
+        seed (int): Random seed; the same seed always yields the same catalog
+    """
+    rng = random.Random(seed)
+    # A few thousand distinct authors, as in a real catalog, so author queries hit many titles.
+    authors = [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+               for _ in range(max(1, min(count // 20, 5000)))]
+    for n in range(count):
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 5))).title()
+        yield Book(isbn13(n), title, rng.choice(authors), rng.randint(1, 5))
+
+
+def generate_members(count, seed=0):
+    """Yield ``count`` (member_id, name, email, phone) tuples."""
+    rng = random.Random(seed + 1)
+    for n in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield (f"M{n:08d}", f"{first} {last}", f"{first.lower()}.{last.lower()}{n}@example.com",
+               f"555-{rng.randrange(10000):04d}")
+
+
+def generate_loans(count, isbns, member_ids, seed=0):
+    """
+    Yield ``count`` (member_id, isbn, issue_date) loans spread over 2025.
+
+    Titles early in ``isbns`` are borrowed far more often than later ones.
+    """
+    rng = random.Random(seed + 2)
+    for _ in range(count):
+        isbn = isbns[int(len(isbns) * rng.random() ** 3)]
+        issued = HISTORY_START + timedelta(days=rng.randrange(365))
+        yield rng.choice(member_ids), isbn, issued.isoformat()
+
+
+class SyntheticLibrary:
+    """
+    An in-memory library populated with synthetic data.
+
+    Attributes:
+        books (int): Catalog size
+        members (int): Member count (a tenth of the catalog, at least 100)
+        loans (int): Loans attempted for the history (a twentieth of the catalog;
+            those finding no copy on the shelf are skipped)
+        book_manager (BookManager): Populated catalog
+        member_module (MemberModule): Populated members
+        issue_return (IssueReturn): Ledger holding the loan history
+        circulation (Circulation): Service used to create the loan history
+    """
+
+    def __init__(self, books, seed=0):
+        """
+        Build the library; generation is deterministic for a given size and seed.
+
+        Args:
+            books (int): Number of distinct titles
+            seed (int): Random seed
+        """
+        self.seed = seed
+        self.books = books
+        self.members = max(100, books // 10)
+        self.loans = books // 20
+        self.book_manager = BookManager()
+        self.member_module = MemberModule()
+        self.issue_return = IssueReturn()
+        self.book_manager.add_books(generate_books(books, seed))
+        for member in generate_members(self.members, seed):
+            self.member_module.register_member(*member)
+        LibraryStats().attach(self.book_manager, self.member_module, self.issue_return)
+        self.circulation = Circulation(self.book_manager, self.member_module, self.issue_return)
+
+        isbns = list(self.book_manager.books)
+        member_ids = list(self.member_module.members)
+        for member_id, isbn, issue_date in generate_loans(self.loans, isbns, member_ids, seed):
+            if self.book_manager.books[isbn].copies > 0:
+                self.circulation.checkout(member_id, isbn, issue_date)
@@ -1,50 +1,249 @@
 """Main Class for Book Management System"""
 
+import contextlib
+import functools
+import itertools
+import logging
+import sys
+import threading
+
+from metrics import instrumented
+from query_cache import QueryCache
+from text_index import BM25Index, TrigramIndex
+
+logger = logging.getLogger("lms.book")
+
 
 class Book:
     """Represents a book in the library."""
+    # No per-instance __dict__: large catalogs hold millions of these.
+    __slots__ = ("isbn", "title", "author", "copies")
+
     def __init__(self, isbn, title, author, copies):
         self.isbn = isbn
         self.title = title
-        self.author = author
+        self.author = sys.intern(author)  # Authors repeat across titles; share one string each
         self.copies = copies
 
 
+class ReadWriteLock:
+    """
+    Lets any number of readers, or one writer, hold the lock at a time.
+
+    Waiting writers are let in before new readers, so a stream of searches
+    cannot hold off a change. The thread holding the write lock may take
+    either side again, e.g. from a hook called during the change.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None  # Thread id of the writer holding the lock
+        self._depth = 0  # Nested write() calls by that writer
+        self._writers_waiting = 0
+
+    @contextlib.contextmanager
+    def read(self):
+        with self._condition:
+            if self._writer == threading.get_ident():
+                owner = True
+            else:
+                owner = False
+                while self._writer is not None or self._writers_waiting:
+                    self._condition.wait()
+                self._readers += 1
+        try:
+            yield
+        finally:
+            if not owner:
+                with self._condition:
+                    self._readers -= 1
+                    if not self._readers:
+                        self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def write(self):
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer != me:
+                self._writers_waiting += 1
+                try:
+                    while self._writer is not None or self._readers:
+                        self._condition.wait()
+                finally:
+                    self._writers_waiting -= 1
+                self._writer = me
+            self._depth += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._depth -= 1
+                if not self._depth:
+                    self._writer = None
+                    self._condition.notify_all()
+
+
+def _writes(method):
+    """Run a BookManager method while holding its lock for writing."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock.write():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 """ Book Manager Class for managing a collection of books"""
 
 
 class BookManager:
-    def __init__(self):
-        self.books = {}  # Dictionary to store books with ISBN as key
+    def __init__(self, store=None):
+        # store: optional backend (e.g. SQLiteStore) providing books and its text indexes
+        if store is None:
+            self.books = {}  # Dictionary to store books with ISBN as key
+            self.title_index = TrigramIndex()  # Substring index over titles, keyed by ISBN
+            self.author_index = TrigramIndex()  # Substring index over authors, keyed by ISBN
+            self.text_index = BM25Index()  # Ranked full-text index over title and author
+        else:
+            self.books = store.books
+            self.title_index = store.title_index
+            self.author_index = store.author_index
+            self.text_index = store.text_index
+        self.store = store
+        # Held for reading by searches, which may run on other threads, and for
+        # writing by every change to the books or their indexes.
+        self.lock = ReadWriteLock()
+        self.journal = None  # Optional LibraryJournal recording each mutation
+        self.stats = None  # Optional LibraryStats kept current by each mutation
+        # Replaced after every change to the catalog or its copy counts; cached
+        # search results from another generation are never returned. Values come
+        # from a shared counter so concurrent updates never store the same one.
+        self._generations = itertools.count(1)
+        self.generation = 0
+        self.query_cache = QueryCache()  # Search result cache; None disables it
+        self.suggestions = None  # Optional Autocomplete kept current by each mutation
+        self.scan_engine = None  # Optional ShardedScan kept current by each mutation
 
-    """Adds a new book to the collection."""
+    """Adds a new book to the collection; returns True if new, False if copies were merged."""
+    @instrumented
+    @_writes
     def add_book(self, book):
-        if book.isbn in self.books:
-            print(f"Book with ISBN {book.isbn} already exists. Updating copies.")
-            self.books[book.isbn].copies += book.copies  # Update copies if book exists
+        is_new = book.isbn not in self.books
+        if not is_new:
+            logger.info("Book with ISBN %s already exists. Updating copies.", book.isbn,
+                        extra={"isbn": book.isbn, "copies": book.copies})
+            existing = self.books[book.isbn]
+            existing.copies += book.copies  # Update copies if book exists
+            self.books[book.isbn] = existing  # Write back so store-backed books persist it
+            if self.stats is not None:
+                self.stats.add_copies(book.copies)
         else:
+            # Indexed before it is published, so a book that cannot be indexed is never half added
+            self.title_index.add(book.isbn, book.title)
+            self.author_index.add(book.isbn, book.author)
+            self.text_index.add(book.isbn, f"{book.title} {book.author}")
             self.books[book.isbn] = book  # Add new book to collection
-            print(f"Book '{book.title}' with isbn {book.isbn} added successfully.")
+            if self.suggestions is not None:
+                self.suggestions.add_book(book)
+            if self.scan_engine is not None:
+                self.scan_engine.add_book(book)
+            if self.stats is not None:
+                self.stats.add_titles(1, book.copies)
+            logger.info("Book '%s' with isbn %s added successfully.", book.title, book.isbn,
+                        extra={"isbn": book.isbn, "copies": book.copies})
+        self.generation = next(self._generations)
+        if self.journal is not None:
+            self.journal.record("add_book", book.isbn, book.title, book.author, book.copies)
+        return is_new
+
+    """Adds many books without per-book output; returns (added, merged) counts."""
+    @instrumented
+    @_writes
+    def add_books(self, books):
+        added = merged = copies = 0
+        try:
+            for book in books:
+                copies += book.copies
+                existing = self.books.get(book.isbn)
+                if existing is not None:
+                    existing.copies += book.copies  # Merge copies like add_book
+                    self.books[book.isbn] = existing
+                    merged += 1
+                else:
+                    self.title_index.add(book.isbn, book.title)
+                    self.author_index.add(book.isbn, book.author)
+                    self.text_index.add(book.isbn, f"{book.title} {book.author}")
+                    self.books[book.isbn] = book
+                    if self.suggestions is not None:
+                        self.suggestions.add_book(book)
+                    if self.scan_engine is not None:
+                        self.scan_engine.add_book(book)
+                    added += 1
+                if self.journal is not None:
+                    self.journal.record("add_book", book.isbn, book.title, book.author, book.copies)
+        finally:
+            # Also when the source fails part-way through
+            self.generation = next(self._generations)
+        if self.stats is not None:
+            self.stats.add_titles(added, copies)
+        return added, merged
 
-    """ Removes a book from the collection using its ISBN."""
+    """ Removes a book from the collection using its ISBN; returns False if it was not found."""
+    @instrumented
+    @_writes
     def remove_book(self, isbn):
         if isbn in self.books:
             removed_book = self.books.pop(isbn)  # Remove book from collection
-            print(f"Book '{removed_book.title}' removed successfully.")
-        else:
-            print(f"No book found with ISBN {isbn}.")
+            self.title_index.discard(isbn)
+            self.author_index.discard(isbn)
+            self.text_index.discard(isbn, f"{removed_book.title} {removed_book.author}")
+            if self.suggestions is not None:
+                self.suggestions.remove_book(removed_book)
+            if self.scan_engine is not None:
+                self.scan_engine.remove_book(removed_book)
+            self.generation = next(self._generations)
+            if self.stats is not None:
+                self.stats.add_titles(-1, -removed_book.copies)
+            logger.info("Book '%s' removed successfully.", removed_book.title, extra={"isbn": isbn})
+            if self.journal is not None:
+                self.journal.record("remove_book", isbn)
+            return True
+        logger.warning("No book found with ISBN %s.", isbn, extra={"isbn": isbn})
+        return False
+
+    """ Changes the available copies of a book by delta (negative when issued)."""
+    @instrumented
+    @_writes
+    def adjust_copies(self, isbn, delta):
+        if isbn not in self.books:
+            return False
+        book = self.books[isbn]
+        book.copies += delta
+        self.books[isbn] = book
+        self.generation = next(self._generations)
+        if self.stats is not None:
+            self.stats.add_copies(delta)
+        if self.journal is not None:
+            self.journal.record("adjust_copies", isbn, delta)
+        return True
 
-    """ Lists all books in the collection."""
+    """ Lists all books in the collection; returns them in insertion order."""
+    @instrumented
     def list_books(self):
-        if not self.books:  # Check if collection is empty
-            print("No books available in the library.")
-            return
-        else:
-            for book in self.books.values():
-                print(f"ISBN: {book.isbn}, Title: {book.title}, Author: {book.author}, Copies: {book.copies}")
+        books = list(self.books.values())
+        if not books:  # Check if collection is empty
+            logger.info("No books available in the library.")
+        elif logger.isEnabledFor(logging.DEBUG):
+            for book in books:
+                logger.debug("ISBN: %s, Title: %s, Author: %s, Copies: %s",
+                             book.isbn, book.title, book.author, book.copies)
+        return books
 
 
 if __name__ == "__main__":
+    import logs
+
+    listener = logs.configure(level="DEBUG", fmt="text")
     manager = BookManager()
 
     book1 = Book('123', 'Python Basics', 'John Doe', 3)
@@ -56,3 +255,5 @@ if __name__ == "__main__":
     manager.remove_book('123')
 
     manager.list_books()
+
+    logs.shutdown(listener)
@@ -0,0 +1,192 @@
+"""Streaming bulk import of catalog records from CSV or JSONL files."""
+
+import argparse
+import contextlib
+import csv
+import json
+import time
+from itertools import islice
+
+from book import Book
+
+FIELDS = ("isbn", "title", "author", "copies")
+
+
+class ImportReport:
+    """
+    Outcome of a bulk import.
+
+    Attributes:
+        added (int): Rows that created a new book
+        merged (int): Rows whose copies were merged into an existing ISBN
+        rejected (List[Tuple[int, str]]): (line number, reason) for each rejected row
+        elapsed (float): Wall time of the import in seconds
+    """
+
+    def __init__(self):
+        self.added = 0
+        self.merged = 0
+        self.rejected = []
+        self.elapsed = 0.0
+
+    @property
+    def accepted(self):
+        return self.added + self.merged
+
+    @property
+    def rows_per_second(self):
+        total = self.accepted + len(self.rejected)
+        return total / self.elapsed if self.elapsed else 0.0
+
+    def summary(self, max_rejects=10):
+        """
+        Build a human-readable summary of the import.
+
+        Args:
+            max_rejects (int): Number of rejected rows to list individually
+
+        Returns:
+            str: Multi-line summary
+        """
+        lines = [
+            f"Imported {self.accepted} rows ({self.added} added, {self.merged} merged) "
+            f"in {self.elapsed:.2f}s ({self.rows_per_second:,.0f} rows/s).",
+            f"Rejected {len(self.rejected)} rows.",
+        ]
+        for line_no, reason in self.rejected[:max_rejects]:
+            lines.append(f"  line {line_no}: {reason}")
+        if len(self.rejected) > max_rejects:
+            lines.append(f"  ... and {len(self.rejected) - max_rejects} more")
+        return "\n".join(lines)
+
+
+def detect_format(path):
+    """Guess the file format ("csv" or "jsonl") from its extension."""
+    return "jsonl" if path.lower().endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+def read_records(path, fmt=None):
+    """
+    Stream raw records from a CSV (with a header row) or JSONL file.
+
+    Args:
+        path (str): File to read
+        fmt (str, optional): "csv" or "jsonl"; guessed from the extension if omitted
+
+    Yields:
+        tuple: (line number, record dict, or None if the line could not be parsed)
+    """
+    fmt = fmt or detect_format(path)
+    # utf-8-sig: spreadsheet exports often start with a byte order mark
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+        elif fmt == "jsonl":
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                yield line_no, record if isinstance(record, dict) else None
+        else:
+            raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def parse_books(records, rejected):
+    """
+    Turn raw records into Book objects, collecting invalid rows.
+
+    Args:
+        records (Iterable[tuple]): (line number, record) pairs from read_records
+        rejected (list): Receives (line number, reason) for each invalid row
+
+    Yields:
+        Book: One book per valid row
+    """
+    for line_no, record in records:
+        if record is None:
+            rejected.append((line_no, "malformed row"))
+            continue
+        missing = [field for field in FIELDS if record.get(field) in (None, "")]
+        if missing:
+            rejected.append((line_no, f"missing {', '.join(missing)}"))
+            continue
+        try:
+            copies = int(record["copies"])
+        except (TypeError, ValueError):
+            rejected.append((line_no, f"invalid copies {record['copies']!r}"))
+            continue
+        if copies < 0:
+            rejected.append((line_no, f"negative copies {copies}"))
+            continue
+        yield Book(str(record["isbn"]).strip(), str(record["title"]).strip(),
+                   str(record["author"]).strip(), copies)
+
+
+def chunked(iterable, size):
+    """Yield lists of up to ``size`` items from ``iterable``."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def import_books(manager, path, fmt=None, chunk_size=5000):
+    """
+    Import a catalog file into a BookManager without per-row output.
+
+    Rows are read, validated and applied one chunk at a time, so memory use does
+    not grow with the file. Duplicate ISBNs (in the file or already in the
+    catalog) have their copies merged, as add_book does. On a store-backed
+    manager each chunk is written in one transaction.
+
+    Args:
+        manager (BookManager): Manager to import into
+        path (str): CSV or JSONL file to read
+        fmt (str, optional): "csv" or "jsonl"; guessed from the extension if omitted
+        chunk_size (int): Rows applied per chunk
+
+    Returns:
+        ImportReport: Counts, rejected rows and throughput
+    """
+    report = ImportReport()
+    batch = getattr(manager.store, "batch", None)
+    start = time.perf_counter()
+    books = parse_books(read_records(path, fmt), report.rejected)
+    for chunk in chunked(books, chunk_size):
+        with batch() if batch is not None else contextlib.nullcontext():
+            added, merged = manager.add_books(chunk)
+        report.added += added
+        report.merged += merged
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+def main(argv=None):
+    from storage import open_library
+
+    parser = argparse.ArgumentParser(description="Bulk import books from a CSV or JSONL file.")
+    parser.add_argument("path", help="CSV (with isbn,title,author,copies header) or JSONL file")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="file format (default: from extension)")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="rows per chunk (default: 5000)")
+    parser.add_argument("--data-dir", help="data directory (default: $LMS_DATA_DIR or library_data)")
+    parser.add_argument("--backend", choices=("journal", "mapped", "sqlite"), help="storage backend (default: $LMS_STORAGE or journal)")
+    args = parser.parse_args(argv)
+
+    store, book_manager, _, _ = open_library(args.data_dir, args.backend)
+    try:
+        report = import_books(book_manager, args.path, args.format, args.chunk_size)
+    finally:
+        store.close()
+    print(report.summary())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,320 @@
+"""Atomic checkout and checkin on top of the book, member and loan managers."""
+
+import contextlib
+import threading
+import zlib
+from collections import Counter, namedtuple
+
+
+class CirculationError(Exception):
+    """
+    A checkout or checkin that was refused.
+
+    Attributes:
+        reason (str): One of ``MEMBER_NOT_FOUND``, ``BOOK_NOT_FOUND``,
+            ``NO_COPIES``, ``NOT_BORROWED`` or (for batch items only) ``SKIPPED``
+    """
+
+    MEMBER_NOT_FOUND = "member_not_found"
+    BOOK_NOT_FOUND = "book_not_found"
+    NO_COPIES = "no_copies"
+    NOT_BORROWED = "not_borrowed"
+    SKIPPED = "skipped"
+
+    MESSAGES = {
+        MEMBER_NOT_FOUND: "Member not found.",
+        BOOK_NOT_FOUND: "Book not found.",
+        NO_COPIES: "No copies available.",
+        NOT_BORROWED: "Book not borrowed by this member.",
+        SKIPPED: "Not applied because another item in the batch was refused.",
+    }
+
+    def __init__(self, reason):
+        super().__init__(self.MESSAGES[reason])
+        self.reason = reason
+
+
+class BatchItem(namedtuple("BatchItem", "isbn loan reason")):
+    """
+    Outcome of one scanned item in a batch checkout or checkin.
+
+    ``loan`` is the opened (or closed) loan when the item was applied; ``reason``
+    is the CirculationError reason code when it was not.
+    """
+
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.reason is None
+
+    @property
+    def message(self):
+        return "OK" if self.reason is None else CirculationError.MESSAGES[self.reason]
+
+
+class BatchReport:
+    """
+    Per-item outcome of a batch checkout or checkin.
+
+    Attributes:
+        member_id (str): Member the batch was for
+        items (List[BatchItem]): One entry per scanned ISBN, in scan order
+    """
+
+    def __init__(self, member_id, items):
+        self.member_id = member_id
+        self.items = items
+
+    @property
+    def succeeded(self):
+        return [item for item in self.items if item.ok]
+
+    @property
+    def failed(self):
+        return [item for item in self.items if not item.ok]
+
+    def summary(self):
+        """
+        Build a human-readable summary of the batch.
+
+        Returns:
+            str: One line of totals followed by one line per refused item
+        """
+        lines = [f"{len(self.succeeded)} of {len(self.items)} items processed "
+                 f"for member {self.member_id}."]
+        for item in self.failed:
+            lines.append(f"  {item.isbn}: {item.message}")
+        return "\n".join(lines)
+
+
+class LockStripes:
+    """
+    A fixed pool of locks shared by hashing keys onto them.
+
+    Keys that hash to different stripes never wait on each other, while memory
+    stays constant however many keys there are.
+    """
+
+    def __init__(self, count=64):
+        """
+        Args:
+            count (int): Number of locks; more stripes means fewer false collisions
+        """
+        self._locks = [threading.Lock() for _ in range(count)]
+
+    def index(self, key):
+        """Return the stripe number a key maps to (stable across runs)."""
+        return zlib.crc32(str(key).encode()) % len(self._locks)
+
+    @contextlib.contextmanager
+    def hold(self, *keys):
+        """
+        Hold the stripes of all the given keys for the duration of the block.
+
+        Stripes are acquired in ascending order, so callers holding several keys
+        at once cannot deadlock against each other.
+        """
+        indexes = sorted({self.index(key) for key in keys})
+        for i in indexes:
+            self._locks[i].acquire()
+        try:
+            yield
+        finally:
+            for i in reversed(indexes):
+                self._locks[i].release()
+
+
+class Circulation:
+    """
+    Issue and return copies with the checks and updates applied as one step.
+
+    A checkout verifies the member and the book, checks that a copy is on the
+    shelf, opens the loan, records it on the member and takes the copy off the
+    shelf, all while holding the book's ISBN stripe and the member's stripe.
+    Concurrent checkouts of the last copy therefore cannot both succeed, and
+    checkouts of unrelated books by unrelated members proceed in parallel.
+    ISBN stripes are always taken before member stripes.
+
+    When ``store`` has a ``batch()`` context, the updates of each checkout or
+    checkin are also grouped in it (one transaction on SQLite; the journal
+    defers compaction until the batch ends).
+
+    Other mutations (adding or removing books and members) do not take the
+    stripes; callers running them concurrently with circulation must serialize
+    them themselves.
+    """
+
+    def __init__(self, book_manager, member_module, issue_return, store=None,
+                 loan_days=14, stripes=64):
+        """
+        Args:
+            book_manager (BookManager): Catalog whose copies are lent
+            member_module (MemberModule): Members borrowing the copies
+            issue_return (IssueReturn): Loan ledger
+            store (optional): Storage backend from ``open_library``
+            loan_days (int): Default loan period in days
+            stripes (int): Lock stripes for ISBNs and for members (1 serializes everything)
+        """
+        self.book_manager = book_manager
+        self.member_module = member_module
+        self.issue_return = issue_return
+        self.loan_days = loan_days
+        self.isbn_locks = LockStripes(stripes)
+        self.member_locks = LockStripes(stripes)
+        self._batch = getattr(store, "batch", None) or contextlib.nullcontext
+
+    def checkout(self, member_id, isbn, issue_date=None, loan_days=None):
+        """
+        Lend one copy of a book to a member.
+
+        Args:
+            member_id (str): Borrowing member
+            isbn (str): ISBN of the book
+            issue_date (str, optional): Issue date in format 'YYYY-MM-DD'; defaults to today
+            loan_days (int, optional): Loan period; defaults to ``loan_days``
+
+        Returns:
+            Loan: The opened loan
+
+        Raises:
+            CirculationError: If the member or book is unknown or no copy is available
+        """
+        if loan_days is None:
+            loan_days = self.loan_days
+        with self.isbn_locks.hold(isbn), self.member_locks.hold(member_id), self._batch():
+            self._check_checkout(member_id, isbn)
+            return self._issue(member_id, isbn, issue_date, loan_days)
+
+    def checkin(self, member_id, isbn):
+        """
+        Take back one copy of a book from a member.
+
+        Args:
+            member_id (str): Returning member
+            isbn (str): ISBN of the book
+
+        Returns:
+            Loan: The closed loan, or None if the member's borrowed list had the
+                ISBN without a matching open loan
+
+        Raises:
+            CirculationError: If the member or book is unknown or the member has
+                not borrowed the book
+        """
+        with self.isbn_locks.hold(isbn), self.member_locks.hold(member_id), self._batch():
+            self._check_checkin(member_id, isbn)
+            return self._return(member_id, isbn)
+
+    def checkout_batch(self, member_id, isbns, issue_date=None, loan_days=None, atomic=False):
+        """
+        Lend a list of scanned books to one member in a single transaction.
+
+        Every item is validated before anything is applied, counting earlier
+        items of the same batch (two scans of a title need two copies on the
+        shelf). Valid items are then applied together while the stripes of all
+        the ISBNs and the member are held.
+
+        Args:
+            member_id (str): Borrowing member
+            isbns (List[str]): Scanned ISBNs, repeated once per copy
+            issue_date (str, optional): Issue date in format 'YYYY-MM-DD'; defaults to today
+            loan_days (int, optional): Loan period; defaults to ``loan_days``
+            atomic (bool): Apply nothing unless every item is valid
+
+        Returns:
+            BatchReport: Outcome of each item, in scan order
+        """
+        if loan_days is None:
+            loan_days = self.loan_days
+        isbns = list(isbns)
+        with self.isbn_locks.hold(*isbns), self.member_locks.hold(member_id), self._batch():
+            reasons = self._check_checkout_batch(member_id, isbns)
+            return self._apply_batch(
+                member_id, isbns, reasons, atomic,
+                lambda isbn: self._issue(member_id, isbn, issue_date, loan_days))
+
+    def checkin_batch(self, member_id, isbns, atomic=False):
+        """
+        Take back a list of scanned books from one member in a single transaction.
+
+        Args:
+            member_id (str): Returning member
+            isbns (List[str]): Scanned ISBNs, repeated once per copy
+            atomic (bool): Apply nothing unless every item is valid
+
+        Returns:
+            BatchReport: Outcome of each item, in scan order
+        """
+        isbns = list(isbns)
+        with self.isbn_locks.hold(*isbns), self.member_locks.hold(member_id), self._batch():
+            reasons = self._check_checkin_batch(member_id, isbns)
+            return self._apply_batch(member_id, isbns, reasons, atomic,
+                                     lambda isbn: self._return(member_id, isbn))
+
+    def _check_checkout_batch(self, member_id, isbns):
+        if member_id not in self.member_module.members:
+            return [CirculationError.MEMBER_NOT_FOUND] * len(isbns)
+        claimed = Counter()
+        reasons = []
+        for isbn in isbns:
+            book = self.book_manager.books.get(isbn)
+            if book is None:
+                reasons.append(CirculationError.BOOK_NOT_FOUND)
+            elif book.copies - claimed[isbn] <= 0:
+                reasons.append(CirculationError.NO_COPIES)
+            else:
+                claimed[isbn] += 1
+                reasons.append(None)
+        return reasons
+
+    def _check_checkin_batch(self, member_id, isbns):
+        if member_id not in self.member_module.members:
+            return [CirculationError.MEMBER_NOT_FOUND] * len(isbns)
+        borrowed = Counter(self.member_module.get_member(member_id).borrowed)
+        reasons = []
+        for isbn in isbns:
+            if isbn not in self.book_manager.books:
+                reasons.append(CirculationError.BOOK_NOT_FOUND)
+            elif borrowed[isbn] <= 0:
+                reasons.append(CirculationError.NOT_BORROWED)
+            else:
+                borrowed[isbn] -= 1
+                reasons.append(None)
+        return reasons
+
+    def _apply_batch(self, member_id, isbns, reasons, atomic, apply):
+        if atomic and any(reasons):
+            reasons = [reason or CirculationError.SKIPPED for reason in reasons]
+        items = [BatchItem(isbn, None if reason else apply(isbn), reason)
+                 for isbn, reason in zip(isbns, reasons)]
+        return BatchReport(member_id, items)
+
+    def _check_checkout(self, member_id, isbn):
+        if member_id not in self.member_module.members:
+            raise CirculationError(CirculationError.MEMBER_NOT_FOUND)
+        book = self.book_manager.books.get(isbn)
+        if book is None:
+            raise CirculationError(CirculationError.BOOK_NOT_FOUND)
+        if book.copies <= 0:
+            raise CirculationError(CirculationError.NO_COPIES)
+
+    def _check_checkin(self, member_id, isbn):
+        if member_id not in self.member_module.members:
+            raise CirculationError(CirculationError.MEMBER_NOT_FOUND)
+        if isbn not in self.book_manager.books:
+            raise CirculationError(CirculationError.BOOK_NOT_FOUND)
+        if not self.member_module.borrowed_count(member_id, isbn):
+            raise CirculationError(CirculationError.NOT_BORROWED)
+
+    def _issue(self, member_id, isbn, issue_date, loan_days):
+        loan = self.issue_return.issue_book(member_id, isbn, issue_date, loan_days)
+        self.member_module.add_borrowed_book(member_id, isbn)
+        self.book_manager.adjust_copies(isbn, -1)
+        return loan
+
+    def _return(self, member_id, isbn):
+        loan = self.issue_return.return_book(member_id, isbn)
+        self.member_module.remove_borrowed_book(member_id, isbn)
+        self.book_manager.adjust_copies(isbn, 1)
+        return loan
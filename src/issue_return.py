@@ -1,31 +1,266 @@
+import logging
+import threading
+from bisect import bisect_left, insort
+from collections import Counter, namedtuple
+from datetime import date
+
+from metrics import instrumented
+
+logger = logging.getLogger("lms.issue_return")
+
+
+class Loan(namedtuple("Loan", "loan_id isbn member_id issue_day due_day")):
+    """
+    One open loan of a single copy.
+
+    Dates are stored as proleptic Gregorian ordinals (``date.toordinal()``) to keep
+    records small and comparisons cheap; ``issue_date``/``due_date`` convert back.
+    """
+
+    __slots__ = ()
+
+    @property
+    def issue_date(self):
+        return date.fromordinal(self.issue_day)
+
+    @property
+    def due_date(self):
+        return date.fromordinal(self.due_day)
+
+
+class LoanLedger:
+    """
+    In-memory ledger of open loans with secondary indexes.
+
+    Loans for a member, holders of an ISBN and loans due before a date are all
+    answered from indexes, in time proportional to the result. Opening and
+    closing loans is thread-safe.
+
+    Attributes:
+        loans (Dict[int, Loan]): Open loans by loan_id
+        next_id (int): Loan ID assigned to the next opened loan
+        borrows (Counter): Loans ever opened per ISBN, including returned ones
+    """
+
+    def __init__(self):
+        """Initialize an empty ledger."""
+        self.loans = {}
+        self.next_id = 1
+        self.borrows = Counter()
+        self._by_member = {}  # member_id -> set of loan_ids
+        self._by_isbn = {}  # isbn -> set of loan_ids
+        self._by_due = {}  # due_day -> set of loan_ids
+        self._due_days = []  # Sorted distinct due days present in _by_due
+        self._lock = threading.Lock()  # Guards next_id and the shared due-date index
+
+    def __len__(self):
+        return len(self.loans)
+
+    def __iter__(self):
+        return iter(self.loans.values())
+
+    def open(self, isbn, member_id, issue_day, due_day, loan_id=None):
+        """
+        Record a new loan.
+
+        Args:
+            isbn (str): ISBN of the copy lent
+            member_id (str): Borrowing member
+            issue_day (int): Issue date ordinal
+            due_day (int): Due date ordinal
+            loan_id (int, optional): Explicit ID when restoring saved loans
+
+        Returns:
+            Loan: The recorded loan
+        """
+        with self._lock:
+            if loan_id is None:
+                loan_id = self.next_id
+            self.next_id = max(self.next_id, loan_id + 1)
+            loan = Loan(loan_id, isbn, member_id, issue_day, due_day)
+            self.loans[loan_id] = loan
+            self.borrows[isbn] += 1
+            self._by_member.setdefault(member_id, set()).add(loan_id)
+            self._by_isbn.setdefault(isbn, set()).add(loan_id)
+            due = self._by_due.get(due_day)
+            if due is None:
+                self._by_due[due_day] = {loan_id}
+                insort(self._due_days, due_day)
+            else:
+                due.add(loan_id)
+        return loan
+
+    def close(self, loan_id):
+        """
+        Remove a loan from the ledger.
+
+        Args:
+            loan_id (int): Loan to close
+
+        Returns:
+            Loan: The closed loan, or None if it was not open
+        """
+        with self._lock:
+            loan = self.loans.pop(loan_id, None)
+            if loan is None:
+                return None
+            _discard(self._by_member, loan.member_id, loan_id)
+            _discard(self._by_isbn, loan.isbn, loan_id)
+            if _discard(self._by_due, loan.due_day, loan_id):
+                del self._due_days[bisect_left(self._due_days, loan.due_day)]
+        return loan
+
+    def get(self, loan_id):
+        """Return the open loan with this ID, or None."""
+        return self.loans.get(loan_id)
+
+    def borrow_count(self, isbn):
+        """Return how many loans of an ISBN have ever been opened."""
+        return self.borrows[isbn]
+
+    def borrow_counts(self):
+        """Return the lifetime loan count of every ISBN ever lent."""
+        return self.borrows
+
+    def find(self, member_id, isbn):
+        """Return the member's oldest open loan of this ISBN, or None."""
+        ids = [loan_id for loan_id in self._by_member.get(member_id, ())
+               if self.loans[loan_id].isbn == isbn]
+        return self.loans[min(ids)] if ids else None
+
+    def for_member(self, member_id):
+        """Return the member's open loans, oldest first."""
+        return [self.loans[i] for i in sorted(self._by_member.get(member_id, ()))]
+
+    def for_isbn(self, isbn):
+        """Return the open loans of an ISBN (one per copy lent), oldest first."""
+        return [self.loans[i] for i in sorted(self._by_isbn.get(isbn, ()))]
+
+    def due_before(self, day):
+        """Return open loans whose due date ordinal is before ``day``, earliest due first."""
+        result = []
+        with self._lock:
+            for due_day in self._due_days[:bisect_left(self._due_days, day)]:
+                result.extend(self.loans[i] for i in sorted(self._by_due[due_day]))
+        return result
+
+    def count_due_between(self, start_day, end_day):
+        """Count open loans with start_day <= due day < end_day (no lower bound if start_day is None)."""
+        with self._lock:
+            days = self._due_days
+            low = 0 if start_day is None else bisect_left(days, start_day)
+            high = bisect_left(days, end_day)
+            return sum(len(self._by_due[day]) for day in days[low:high])
+
+
+def _discard(index, key, loan_id):
+    """Remove loan_id from index[key]; returns True if that emptied and dropped the key."""
+    ids = index[key]
+    ids.discard(loan_id)
+    if not ids:
+        del index[key]
+        return True
+    return False
+
+
+def _to_ordinal(value):
+    """Convert a 'YYYY-MM-DD' string or date to its ordinal; None means today."""
+    if value is None:
+        return date.today().toordinal()
+    if isinstance(value, str):
+        return date.fromisoformat(value).toordinal()
+    return value.toordinal()
+
+
 class IssueReturn:
     """A class to manage issuing and returning books in a library system."""
 
-    def __init__(self):
-        """Initialize an empty dictionary to track borrowed books."""
-        self.borrows = {}
+    def __init__(self, store=None):
+        """
+        Initialize an empty loan ledger to track borrowed copies.
+
+        Args:
+            store (SQLiteStore, optional): Backend whose ``loans`` ledger replaces the in-memory one
+        """
+        self.loans = LoanLedger() if store is None else store.loans
+        self.journal = None  # Optional LibraryJournal recording each mutation
+        self.stats = None  # Optional LibraryStats kept current by each mutation
+        self.suggestions = None  # Optional Autocomplete ranked by borrow counts
 
-    def issue_book(self, member_id, ISBN):
+    @instrumented
+    def issue_book(self, member_id, ISBN, issue_date=None, loan_days=14):
         """
-        Issue a book to a member.
+        Issue one copy of a book to a member.
 
         Args:
             member_id (str): ID of the member borrowing the book
             ISBN (int): ISBN of the book to be issued
+            issue_date (str, optional): Issue date in format 'YYYY-MM-DD'; defaults to today
+            loan_days (int): Days until the loan is due
+
+        Returns:
+            Loan: The new loan record
         """
-        self.borrows[ISBN] = member_id
-        print(f"Book ISBN:[{ISBN}] issued to student:[{member_id}]")
+        issue_day = _to_ordinal(issue_date)
+        loan = self.loans.open(ISBN, member_id, issue_day, issue_day + loan_days)
+        if self.stats is not None:
+            self.stats.loan_opened(loan)
+        if self.suggestions is not None:
+            self.suggestions.borrowed(ISBN)
+        logger.info("Book ISBN:[%s] issued to student:[%s]", ISBN, member_id,
+                    extra={"isbn": ISBN, "member_id": member_id, "loan_id": loan.loan_id})
+        if self.journal is not None:
+            self.journal.record("issue_book", member_id, ISBN,
+                                loan.issue_date.isoformat(), loan_days)
+        return loan
 
+    @instrumented
     def return_book(self, member_id, ISBN):
         """
-        Return a book from a member.
+        Return a book from a member, closing their oldest open loan of that ISBN.
 
         Args:
             member_id (str): ID of the member returning the book
             ISBN (int): ISBN of the book to be returned
+
+        Returns:
+            Loan: The closed loan, or None if the member had no such loan
         """
-        if ISBN in self.borrows:
-            del self.borrows[ISBN]
-            print(f"Student ID:[{member_id}] and Book ISBN:[{ISBN}] returned successfully.")
+        loan = self.loans.find(member_id, ISBN)
+        if loan is not None:
+            self.loans.close(loan.loan_id)
+            if self.stats is not None:
+                self.stats.loan_closed(loan)
+            logger.info("Student ID:[%s] and Book ISBN:[%s] returned successfully.", member_id, ISBN,
+                        extra={"isbn": ISBN, "member_id": member_id, "loan_id": loan.loan_id})
+            if self.journal is not None:
+                self.journal.record("return_book", member_id, ISBN)
         else:
-            print("Book ID not found in issued list.")
\ No newline at end of file
+            logger.warning("Book ID not found in issued list.",
+                           extra={"isbn": ISBN, "member_id": member_id})
+        return loan
+
+    @instrumented
+    def get_loan(self, member_id, ISBN):
+        """Return the member's oldest open loan of an ISBN, or None."""
+        return self.loans.find(member_id, ISBN)
+
+    @instrumented
+    def loans_for_member(self, member_id):
+        """Return every open loan held by a member."""
+        return self.loans.for_member(member_id)
+
+    @instrumented
+    def holders_of(self, ISBN):
+        """Return the open loans of an ISBN, one per copy lent."""
+        return self.loans.for_isbn(ISBN)
+
+    @instrumented
+    def loans_due_before(self, due_date):
+        """
+        Return open loans due before a date.
+
+        Args:
+            due_date (str): Cut-off date in format 'YYYY-MM-DD' (exclusive)
+        """
+        return self.loans.due_before(_to_ordinal(due_date))
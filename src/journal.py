@@ -0,0 +1,328 @@
+"""Durable storage for the library: an append-only operation journal plus compacted snapshots."""
+
+import contextlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import Counter
+
+import logs
+from book import Book
+
+SNAPSHOT_FILE = "snapshot.json"
+JOURNAL_FILE = "journal.log"
+BOOK_OPS = ("add_book", "remove_book", "adjust_copies")
+
+logger = logging.getLogger("lms.journal")
+
+
+class LibraryJournal:
+    """
+    Persist BookManager, MemberModule and IssueReturn state across restarts.
+
+    Every mutation on an attached manager is appended to ``journal.log`` as one
+    JSON line. Writes are fsync'd in batches (every ``sync_every`` records or
+    ``sync_interval`` seconds, whichever comes first). Every ``snapshot_every``
+    records the full state is written to ``snapshot.json`` and the journal is
+    truncated (deferred until the tail is at least as long as the catalog), so a
+    restart only loads one snapshot and replays the short tail written after it.
+    Recording is thread-safe; mutations made from several threads at once should
+    run inside ``batch()`` so no snapshot captures a half-recorded operation.
+
+    With a ``catalog`` (the "mapped" backend) books are snapshotted to its binary
+    file instead of the JSON, which then holds only members and loans.
+
+    Attributes:
+        data_dir (str): Directory holding the snapshot and journal files
+        seq (int): Sequence number of the last recorded operation
+    """
+
+    def __init__(self, data_dir, sync_every=64, sync_interval=1.0, snapshot_every=10000,
+                 catalog=None):
+        """
+        Initialize the journal, creating the data directory if needed.
+
+        Args:
+            data_dir (str): Directory for the snapshot and journal files
+            sync_every (int): Number of records between fsyncs
+            sync_interval (float): Maximum seconds between fsyncs while recording
+            snapshot_every (int): Number of records between automatic snapshots
+            catalog (MappedBookStore, optional): Store the books are snapshotted to
+        """
+        self.data_dir = data_dir
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.snapshot_every = snapshot_every
+        self.catalog = catalog
+        self.seq = 0
+        self._catalog_seq = 0  # Seq of a catalog file books were read from without a store
+        self.book_manager = None
+        self.member_module = None
+        self.issue_return = None
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._since_snapshot = 0
+        self._replaying = False
+        self._lock = threading.RLock()
+        self._active_batches = 0
+        self._snapshot_due = False
+        os.makedirs(data_dir, exist_ok=True)
+
+    @property
+    def snapshot_path(self):
+        return os.path.join(self.data_dir, SNAPSHOT_FILE)
+
+    @property
+    def journal_path(self):
+        return os.path.join(self.data_dir, JOURNAL_FILE)
+
+    def open(self, book_manager, member_module, issue_return):
+        """
+        Restore state into empty managers and start journaling their mutations.
+
+        Loads the latest snapshot, replays the journal records written after it,
+        then attaches this journal to each manager.
+
+        Args:
+            book_manager (BookManager): Book manager to restore into
+            member_module (MemberModule): Member module to restore into
+            issue_return (IssueReturn): Issue/return tracker to restore into
+
+        Returns:
+            int: Number of journal records replayed
+        """
+        self.book_manager = book_manager
+        self.member_module = member_module
+        self.issue_return = issue_return
+
+        self._replaying = True
+        try:
+            # Replaying goes through the manager methods, which log per operation.
+            with logs.quiet():
+                self._load_snapshot()
+                replayed = self._replay_journal()
+        finally:
+            self._replaying = False
+
+        self._since_snapshot = replayed
+        self._file = open(self.journal_path, "a", encoding="utf-8")
+        book_manager.journal = self
+        member_module.journal = self
+        issue_return.journal = self
+        return replayed
+
+    def record(self, op, *args):
+        """
+        Append one operation to the journal.
+
+        Args:
+            op (str): Name of the manager method that was applied
+            *args: JSON-serializable arguments needed to re-apply it
+        """
+        if self._replaying or self._file is None:
+            return
+        with self._lock:
+            self.seq += 1
+            self._file.write(json.dumps({"seq": self.seq, "op": op, "args": args}) + "\n")
+            self._unsynced += 1
+            self._since_snapshot += 1
+            # Compact once the tail is both long and comparable to the catalog, so
+            # snapshot cost stays amortized during bulk loads.
+            if (self._since_snapshot >= self.snapshot_every
+                    and self._since_snapshot >= len(self.book_manager.books)):
+                if self._active_batches:
+                    self._snapshot_due = True
+                else:
+                    self.snapshot()
+            elif (self._unsynced >= self.sync_every
+                  or time.monotonic() - self._last_sync >= self.sync_interval):
+                self.flush()
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Mark a group of mutations that must reach a snapshot together.
+
+        Batches from several threads may overlap; a snapshot that falls due while
+        any batch is open is taken when the last one ends.
+        """
+        with self._lock:
+            self._active_batches += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._active_batches -= 1
+                if not self._active_batches and self._snapshot_due:
+                    self.snapshot()
+
+    def flush(self):
+        """Write buffered records to disk and fsync the journal."""
+        with self._lock:
+            if self._file is None or not self._unsynced:
+                return
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+            self._last_sync = time.monotonic()
+
+    def snapshot(self):
+        """Write a compacted snapshot of the current state and truncate the journal."""
+        with self._lock:
+            if self.catalog is not None:
+                # Written first: until the JSON below replaces the old snapshot,
+                # replay skips the book records this catalog already holds.
+                self.catalog.write(self.seq)
+            state = {
+                "seq": self.seq,
+                "members": [
+                    [member.member_id, member.name, member.email, member.phone, member.borrowed or {}]
+                    for member in self.member_module.members.values()
+                ],
+                "loans": [list(loan) for loan in self.issue_return.loans],
+                "next_loan_id": self.issue_return.loans.next_id,
+                "borrows": self.issue_return.loans.borrows,
+            }
+            if self.catalog is None:
+                state["books"] = [[book.isbn, book.title, book.author, book.copies]
+                                  for book in self.book_manager.books.values()]
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+
+            # Records up to self.seq are now in the snapshot; a crash before the
+            # truncate is harmless because replay skips them by sequence number.
+            if self._file is not None:
+                self._file.close()
+            self._file = open(self.journal_path, "w", encoding="utf-8")
+            self._unsynced = 0
+            self._since_snapshot = 0
+            self._last_sync = time.monotonic()
+            self._snapshot_due = False
+
+    def close(self):
+        """
+        Sync and close the journal file.
+
+        No snapshot is taken: rewriting the whole state (the whole catalog file
+        on the "mapped" backend) would make every short session pay for the
+        catalog's size. The next open replays the tail instead, which the
+        ``snapshot_every`` policy keeps short relative to the catalog.
+        """
+        with self._lock:
+            if self._file is None:
+                return
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def _load_snapshot(self):
+        if not os.path.exists(self.snapshot_path):
+            return
+        with open(self.snapshot_path, encoding="utf-8") as f:
+            state = json.load(f)
+        self.seq = state["seq"]
+        if "books" not in state:
+            if self.catalog is None:  # Moving back from the "mapped" backend
+                from mapped_catalog import CATALOG_FILE, MappedCatalog
+
+                catalog = MappedCatalog(os.path.join(self.data_dir, CATALOG_FILE))
+                self.book_manager.add_books(catalog.book(record) for record in range(len(catalog)))
+                self._catalog_seq = catalog.seq
+        elif self.catalog is not None:  # Moving to it; any older catalog file is superseded
+            self.catalog.write(self.seq, (Book(*entry) for entry in state["books"]))
+        else:
+            for isbn, title, author, copies in state["books"]:
+                self.book_manager.add_book(Book(isbn, title, author, copies))
+        members = self.member_module.members
+        for entry in state["members"]:
+            if isinstance(entry, dict):  # Snapshots from before members were compact records
+                entry = [entry["member_id"], entry["name"], entry["email"], entry["phone"],
+                         entry["borrowed_books"]]
+            member_id, name, email, phone, borrowed = entry
+            self.member_module.register_member(member_id, name, email, phone)
+            if borrowed:
+                member = members[member_id]
+                member.borrowed = Counter(borrowed)
+                members[member_id] = member
+        loans = self.issue_return.loans
+        for loan_id, isbn, member_id, issue_day, due_day in state["loans"]:
+            loans.open(isbn, member_id, issue_day, due_day, loan_id=loan_id)
+        loans.next_id = state["next_loan_id"]
+        if "borrows" in state:  # Older snapshots only know the open loans counted above
+            loans.borrows = Counter(state["borrows"])
+
+    def _replay_journal(self):
+        if not os.path.exists(self.journal_path):
+            return 0
+        replayed = 0
+        good_end = 0
+        # A catalog file is written before the JSON snapshot, so it may already hold later book records
+        catalog_seq = self.catalog.seq if self.catalog is not None else self._catalog_seq
+        corrupt = False
+        with open(self.journal_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Torn final write from a crash; nothing after it was synced
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A complete line was written, so records after it may have been synced
+                    corrupt = True
+                    break
+                good_end += len(line)
+                if entry["seq"] <= self.seq:
+                    continue
+                if entry["seq"] <= catalog_seq and entry["op"] in BOOK_OPS:
+                    self.seq = entry["seq"]
+                    continue
+                self._apply(entry["op"], entry["args"])
+                self.seq = entry["seq"]
+                replayed += 1
+        if corrupt:
+            # Later records cannot be applied safely without this one, but are kept for recovery.
+            tail_path = f"{self.journal_path}.corrupt-{self.seq}"
+            logger.error("Unreadable journal record at byte %d of %s; replay stopped after "
+                         "seq %d and the rest of the journal was moved to %s.",
+                         good_end, self.journal_path, self.seq, tail_path)
+            with open(self.journal_path, "rb") as f, open(tail_path, "ab") as tail:
+                f.seek(good_end)
+                shutil.copyfileobj(f, tail)
+                tail.flush()
+                os.fsync(tail.fileno())
+        if good_end < os.path.getsize(self.journal_path):
+            # Drop the tail so new records are not appended after garbage.
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(good_end)
+        return replayed
+
+    def _apply(self, op, args):
+        if op == "add_book":
+            self.book_manager.add_book(Book(*args))
+        elif op == "remove_book":
+            self.book_manager.remove_book(*args)
+        elif op == "adjust_copies":
+            self.book_manager.adjust_copies(*args)
+        elif op == "register_member":
+            self.member_module.register_member(*args)
+        elif op == "update_member":
+            self.member_module.update_member(*args)
+        elif op == "remove_member":
+            self.member_module.remove_member(*args)
+        elif op == "add_borrowed_book":
+            self.member_module.add_borrowed_book(*args)
+        elif op == "remove_borrowed_book":
+            self.member_module.remove_borrowed_book(*args)
+        elif op == "issue_book":
+            self.issue_return.issue_book(*args)
+        elif op == "return_book":
+            self.issue_return.return_book(*args)
+        else:
+            raise ValueError(f"Unknown journal operation: {op}")
@@ -1,3 +1,65 @@
+from datetime import date, datetime
+from functools import lru_cache
+
+from metrics import instrumented
+from stats import LibraryStats
+
+try:
+    import numpy as np
+except ImportError:  # Optional: batch computations fall back to plain Python
+    np = None
+
+DATE_FORMAT = "%Y-%m-%d"
+
+
+@lru_cache(maxsize=65536)
+def parse_day(value):
+    """
+    Parse a 'YYYY-MM-DD' date into its ordinal day number.
+
+    Loans share a small set of distinct dates, so results are cached.
+
+    Raises:
+        ValueError: If the date is not in 'YYYY-MM-DD' format
+    """
+    return datetime.strptime(value, DATE_FORMAT).toordinal()
+
+
+def to_days(values):
+    """
+    Convert dates to a list of ordinal day numbers.
+
+    Args:
+        values (Iterable): 'YYYY-MM-DD' strings, date objects or ordinals (e.g. Loan.issue_day)
+
+    Returns:
+        list: Ordinal day numbers
+    """
+    days = []
+    for value in values:
+        if isinstance(value, str):
+            days.append(parse_day(value))
+        elif isinstance(value, date):
+            days.append(value.toordinal())
+        else:
+            days.append(value)
+    return days
+
+
+def _day_differences(start_dates, end_dates):
+    """Ordinal day differences end - start, broadcasting a single end date."""
+    start_days = to_days(start_dates)
+    if isinstance(end_dates, (str, date, int)):
+        end_days = to_days([end_dates]) * len(start_days)
+    else:
+        end_days = to_days(end_dates)
+    if len(end_days) != len(start_days):
+        raise ValueError("Date sequences must have the same length")
+    if np is not None:
+        return np.asarray(end_days, dtype=np.int64) - np.asarray(start_days, dtype=np.int64)
+    return [end - start for start, end in zip(start_days, end_days)]
+
+
 class LibraryManagementModule:
     """
     A module to manage library settings and provide an overview of the library system.
@@ -15,6 +77,7 @@ class LibraryManagementModule:
             "max_books_per_member": "5",
         }
 
+    @instrumented
     def update_settings(self, setting_name, setting_value):
         """
         Update a library setting.
@@ -31,6 +94,7 @@ class LibraryManagementModule:
             return True
         return False
 
+    @instrumented
     def get_setting(self, setting_name):
         """
         Get a library setting.
@@ -43,6 +107,7 @@ class LibraryManagementModule:
         """
         return self.settings.get(setting_name)
 
+    @instrumented
     def list_settings(self):
         """
         Get all library settings.
@@ -52,6 +117,7 @@ class LibraryManagementModule:
         """
         return self.settings
 
+    @instrumented
     def get_library_overview(self, book_module, member_module, issue_return_module):
         """
         Generate an overview of the library system.
@@ -64,32 +130,24 @@ class LibraryManagementModule:
         Returns:
             dict: Overview statistics including total books, members, and books issued
         """
-        total_books = len(book_module.books)
-        total_members = len(member_module.members)
-
-        # Calculate total number of books available (not borrowed)
-        available_books = 0
-        for isbn, book in book_module.books.items():
-            # Assuming book['quantity'] or similar field exists
-            if "quantity" in book:
-                available_books += int(book["quantity"])
-
-        # Calculate total books borrowed
-        borrowed_books = (
-            len(issue_return_module.borrows)
-            if hasattr(issue_return_module, "borrows")
-            else 0
-        )
+        stats = book_module.stats
+        if stats is None:
+            # First overview: take one baseline scan and keep counters from then on
+            stats = LibraryStats()
+            stats.attach(book_module, member_module, issue_return_module)
 
         return {
             "library_name": self.settings["library_name"],
-            "total_books": total_books,
-            "available_books": available_books,
-            "total_members": total_members,
-            "books_issued": borrowed_books,
+            "total_books": stats.titles,
+            "total_copies": stats.total_copies,
+            "available_books": stats.available_copies,
+            "total_members": stats.members,
+            "books_issued": stats.active_loans,
+            "overdue_loans": stats.overdue_as_of(),
             "max_borrow_days": self.settings["max_borrow_days"],
         }
 
+    @instrumented
     def is_book_overdue(self, issue_date, current_date):
         """
         Check if a book is overdue based on the issue date and current date.
@@ -101,19 +159,13 @@ class LibraryManagementModule:
         Returns:
             bool: True if book is overdue, False otherwise
         """
-        from datetime import datetime
-
-        date_format = "%Y-%m-%d"
-        issue_datetime = datetime.strptime(issue_date, date_format)
-        current_datetime = datetime.strptime(current_date, date_format)
-
         # Calculate difference in days
-        delta = current_datetime - issue_datetime
-        days_difference = delta.days
+        days_difference = parse_day(current_date) - parse_day(issue_date)
 
         # Check if days difference exceeds max_borrow_days
         return days_difference > int(self.settings["max_borrow_days"])
 
+    @instrumented
     def calculate_fine(self, issue_date, return_date):
         """
         Calculate fine for an overdue book.
@@ -125,15 +177,8 @@ class LibraryManagementModule:
         Returns:
             float: Fine amount, 0 if not overdue
         """
-        from datetime import datetime
-
-        date_format = "%Y-%m-%d"
-        issue_datetime = datetime.strptime(issue_date, date_format)
-        return_datetime = datetime.strptime(return_date, date_format)
-
         # Calculate difference in days
-        delta = return_datetime - issue_datetime
-        days_difference = delta.days
+        days_difference = parse_day(return_date) - parse_day(issue_date)
 
         # Calculate fine if overdue
         max_days = int(self.settings["max_borrow_days"])
@@ -142,3 +187,61 @@ class LibraryManagementModule:
             fine_rate = float(self.settings["fine_per_day"])
             return overdue_days * fine_rate
         return 0.0
+
+    @instrumented
+    def overdue_flags(self, issue_dates, current_dates):
+        """
+        Check many loans for being overdue in one pass.
+
+        Gives the same answer as is_book_overdue for each pair. Uses NumPy when it
+        is installed.
+
+        Args:
+            issue_dates (Iterable): Issue dates ('YYYY-MM-DD' strings, dates or ordinals)
+            current_dates: Current dates, one per loan, or a single date for all
+
+        Returns:
+            list: One bool per loan
+        """
+        max_days = int(self.settings["max_borrow_days"])
+        days = _day_differences(issue_dates, current_dates)
+        if np is not None:
+            return (days > max_days).tolist()
+        return [d > max_days for d in days]
+
+    @instrumented
+    def calculate_fines(self, issue_dates, return_dates):
+        """
+        Calculate fines for many loans in one pass.
+
+        Gives the same amounts as calculate_fine for each pair. Uses NumPy when it
+        is installed.
+
+        Args:
+            issue_dates (Iterable): Issue dates ('YYYY-MM-DD' strings, dates or ordinals)
+            return_dates: Return dates, one per loan, or a single date for all
+
+        Returns:
+            list: One fine amount (float) per loan, 0.0 if not overdue
+        """
+        max_days = int(self.settings["max_borrow_days"])
+        fine_rate = float(self.settings["fine_per_day"])
+        days = _day_differences(issue_dates, return_dates)
+        if np is not None:
+            overdue = days - max_days
+            return np.where(overdue > 0, overdue * fine_rate, 0.0).tolist()
+        return [(d - max_days) * fine_rate if d > max_days else 0.0 for d in days]
+
+    @instrumented
+    def calculate_loan_fines(self, loans, return_date):
+        """
+        Calculate the fine each open loan would owe if returned on a date.
+
+        Args:
+            loans (Iterable[Loan]): Loan records from IssueReturn
+            return_date (str): Return date in format 'YYYY-MM-DD'
+
+        Returns:
+            list: One fine amount per loan, in the order given
+        """
+        return self.calculate_fines([loan.issue_day for loan in loans], return_date)
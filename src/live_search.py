@@ -0,0 +1,106 @@
+"""Debounced search-as-you-type that runs queries off the Tk main thread."""
+
+import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("lms.live_search")
+
+
+class LiveSearch:
+    """
+    Run the latest search on a background thread and deliver results on the Tk thread.
+
+    Each ``submit`` supersedes the previous one: a query still waiting out its
+    debounce delay is never started, a queued query is cancelled, and results of
+    a query that was already running are dropped when it finishes. Results are
+    handed back through a queue polled with ``root.after``, so callbacks always
+    run on the Tk main thread.
+    """
+
+    def __init__(self, root, delay_ms=250, poll_ms=30):
+        """
+        Args:
+            root (tk.Tk): Tk root used for scheduling
+            delay_ms (int): Quiet period after the last keystroke before a query runs
+            poll_ms (int): Interval for checking whether the worker has finished
+        """
+        self.root = root
+        self.delay_ms = delay_ms
+        self.poll_ms = poll_ms
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="live-search")
+        self._results = queue.Queue()
+        self._generation = 0
+        self._pending = None  # after() id of the debounce timer
+        self._future = None
+        self._polling = None  # after() id of the result poll
+
+    def submit(self, query, on_results, delay_ms=None):
+        """
+        Schedule a query, superseding any earlier one.
+
+        Args:
+            query (callable): Runs the search on the worker thread and returns results
+            on_results (callable): Called with the results on the Tk thread
+            delay_ms (int, optional): Debounce delay; defaults to ``delay_ms``
+        """
+        self.cancel()
+        generation = self._generation
+        delay = self.delay_ms if delay_ms is None else delay_ms
+        self._pending = self.root.after(
+            delay, lambda: self._start(generation, query, on_results))
+
+    def cancel(self):
+        """
+        Drop the pending or in-flight query; its results will not be delivered.
+
+        A query the worker has already started is not interrupted. It finishes
+        under the book manager's read lock, so changes made meanwhile wait for it
+        rather than racing it.
+        """
+        self._generation += 1
+        if self._pending is not None:
+            self.root.after_cancel(self._pending)
+            self._pending = None
+        if self._future is not None:
+            self._future.cancel()  # Only succeeds if the worker has not picked it up yet
+
+    def close(self):
+        """Cancel outstanding work and stop the worker thread."""
+        self.cancel()
+        if self._polling is not None:
+            self.root.after_cancel(self._polling)
+            self._polling = None
+        self._executor.shutdown(wait=False)
+
+    def _start(self, generation, query, on_results):
+        self._pending = None
+        if generation != self._generation:
+            return
+        self._future = self._executor.submit(self._run, generation, query, on_results)
+        if self._polling is None:
+            self._polling = self.root.after(self.poll_ms, self._poll)
+
+    def _run(self, generation, query, on_results):
+        if generation != self._generation:
+            return  # Superseded while waiting for the worker
+        try:
+            results = query()
+        except Exception:
+            logger.exception("Live search failed.")
+            return
+        self._results.put((generation, on_results, results))
+
+    def _poll(self):
+        self._polling = None
+        # Read done() before draining: a finished worker has already queued its results.
+        finished = self._future is None or self._future.done()
+        while True:
+            try:
+                generation, on_results, results = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if generation == self._generation:
+                on_results(results)
+        if not finished:
+            self._polling = self.root.after(self.poll_ms, self._poll)
@@ -0,0 +1,314 @@
+"""Headless command-line interface to the library: books, members, loans, search and overview.
+
+Only argparse is imported up front; each subcommand imports the modules it
+needs when it runs, so ``lms --help`` and scripted jobs start quickly and never
+load tkinter.
+"""
+
+import argparse
+import sys
+
+
+def open_library(args):
+    from storage import open_library
+
+    return open_library(args.data_dir, args.backend)
+
+
+def emit(args, payload, lines):
+    """Print ``payload`` as JSON with --json, otherwise print the human-readable ``lines``."""
+    if args.json:
+        import json
+
+        print(json.dumps(payload, indent=2))
+    else:
+        for line in lines:
+            print(line)
+
+
+def book_dict(book):
+    return {"isbn": book.isbn, "title": book.title, "author": book.author, "copies": book.copies}
+
+
+def book_line(book):
+    return f"{book.isbn}\t{book.title}\t{book.author}\t{book.copies}"
+
+
+def member_line(member):
+    return f"{member.member_id}\t{member.name}\t{member.email}\t{member.phone}"
+
+
+def loan_dict(loan):
+    return {"loan_id": loan.loan_id, "isbn": loan.isbn, "member_id": loan.member_id,
+            "issue_date": loan.issue_date.isoformat(), "due_date": loan.due_date.isoformat()}
+
+
+def loan_line(loan):
+    return f"{loan.loan_id}\t{loan.member_id}\t{loan.isbn}\t{loan.issue_date}\t{loan.due_date}"
+
+
+def fail(message):
+    print(f"lms: {message}", file=sys.stderr)
+    return 1
+
+
+# Books
+
+def books_list(args, library):
+    from itertools import islice
+
+    _, book_manager, _, _ = library
+    books = list(islice(book_manager.books.values(), args.offset, args.offset + args.limit))
+    emit(args, [book_dict(book) for book in books], map(book_line, books))
+
+
+def books_show(args, library):
+    _, book_manager, _, _ = library
+    book = book_manager.books.get(args.isbn)
+    if book is None:
+        return fail(f"no book with ISBN {args.isbn}")
+    emit(args, book_dict(book), [book_line(book)])
+
+
+def books_add(args, library):
+    from book import Book
+
+    _, book_manager, _, _ = library
+    is_new = book_manager.add_book(Book(args.isbn, args.title, args.author, args.copies))
+    book = book_manager.books[args.isbn]
+    emit(args, {"added": is_new, **book_dict(book)},
+         [f"{'Added' if is_new else 'Merged copies into'} {book_line(book)}"])
+
+
+def books_remove(args, library):
+    _, book_manager, _, _ = library
+    if not book_manager.remove_book(args.isbn):
+        return fail(f"no book with ISBN {args.isbn}")
+    emit(args, {"removed": args.isbn}, [f"Removed {args.isbn}"])
+
+
+def books_import(args, library):
+    from bulk_import import import_books
+
+    _, book_manager, _, _ = library
+    report = import_books(book_manager, args.path, args.format)
+    emit(args, {"added": report.added, "merged": report.merged,
+                "rejected": [{"line": line, "reason": reason} for line, reason in report.rejected],
+                "seconds": report.elapsed},
+         [report.summary()])
+
+
+# Members
+
+def members_list(args, library):
+    _, _, member_module, _ = library
+    members = (member_module.search_members(args.query) if args.query
+               else member_module.list_members())
+    emit(args, [member.to_dict() for member in members], map(member_line, members))
+
+
+def members_show(args, library):
+    _, _, member_module, _ = library
+    member = member_module.get_member(args.member_id)
+    if member is None:
+        return fail(f"no member {args.member_id}")
+    emit(args, member.to_dict(), [member_line(member),
+                        "borrowed: " + ", ".join(member_module.get_borrowed_books(args.member_id))])
+
+
+def members_add(args, library):
+    _, _, member_module, _ = library
+    if not member_module.register_member(args.member_id, args.name, args.email, args.phone):
+        return fail(f"member {args.member_id} already exists")
+    emit(args, member_module.get_member(args.member_id).to_dict(), [f"Registered {args.member_id}"])
+
+
+def members_remove(args, library):
+    _, _, member_module, _ = library
+    if not member_module.remove_member(args.member_id):
+        return fail(f"no member {args.member_id}")
+    emit(args, {"removed": args.member_id}, [f"Removed {args.member_id}"])
+
+
+# Loans
+
+def loans_list(args, library):
+    _, _, _, issue_return = library
+    if args.member:
+        loans = issue_return.loans_for_member(args.member)
+    elif args.isbn:
+        loans = issue_return.holders_of(args.isbn)
+    elif args.due_before:
+        loans = issue_return.loans_due_before(args.due_before)
+    else:
+        loans = list(issue_return.loans)
+    emit(args, [loan_dict(loan) for loan in loans], map(loan_line, loans))
+
+
+def circulation_for(library, args):
+    from circulation import Circulation
+
+    store, book_manager, member_module, issue_return = library
+    return Circulation(book_manager, member_module, issue_return, store, loan_days=args.days)
+
+
+def loans_issue(args, library):
+    from circulation import CirculationError
+
+    try:
+        loan = circulation_for(library, args).checkout(args.member_id, args.isbn)
+    except CirculationError as error:
+        return fail(str(error))
+    emit(args, loan_dict(loan), [f"Issued {loan_line(loan)}"])
+
+
+def loans_return(args, library):
+    from circulation import CirculationError
+
+    try:
+        loan = circulation_for(library, args).checkin(args.member_id, args.isbn)
+    except CirculationError as error:
+        return fail(str(error))
+    emit(args, loan_dict(loan) if loan else {"returned": args.isbn},
+         [f"Returned {args.isbn} from {args.member_id}"])
+
+
+def loans_fines(args, library):
+    from datetime import date
+
+    from library import LibraryManagementModule
+
+    _, _, _, issue_return = library
+    module = LibraryManagementModule()
+    as_of = args.date or date.today().isoformat()
+    loans = list(issue_return.loans)
+    owed = [(loan, fine) for loan, fine in zip(loans, module.calculate_loan_fines(loans, as_of))
+            if fine > 0]
+    total = sum(fine for _, fine in owed)
+    emit(args,
+         {"date": as_of, "total": total,
+          "fines": [{**loan_dict(loan), "fine": fine} for loan, fine in owed]},
+         [f"{loan_line(loan)}\t{fine:.2f}" for loan, fine in owed]
+         + [f"{len(owed)} of {len(loans)} open loans owe fines as of {as_of}; total {total:.2f}"])
+
+
+# Search and overview
+
+def search(args, library):
+    import search as search_module
+
+    _, book_manager, _, _ = library
+    if args.kind == "text":
+        page = search_module.full_text_search(book_manager, args.query, args.limit, args.offset)
+        emit(args, {"total": page.total,
+                    "books": [dict(book_dict(book), score=score)
+                              for book, score in zip(page.books, page.scores)]},
+             [f"{book_line(book)}\t{score:.3f}" for book, score in zip(page.books, page.scores)]
+             + [f"{page.offset + 1}-{page.offset + len(page.books)} of {page.total} matches"])
+        return
+    if args.kind == "isbn":
+        book = search_module.search_by_isbn(book_manager, args.query)
+        books = [book] if book else []
+    elif args.fuzzy:
+        find = getattr(search_module, f"fuzzy_search_by_{args.kind}")
+        books = find(book_manager, args.query, args.limit)
+    else:
+        find = getattr(search_module, f"search_by_{args.kind}")
+        books = find(book_manager, args.query)[:args.limit]
+    emit(args, [book_dict(book) for book in books], map(book_line, books))
+
+
+def overview(args, library):
+    from library import LibraryManagementModule
+
+    store, book_manager, member_module, issue_return = library
+    result = LibraryManagementModule().get_library_overview(book_manager, member_module, issue_return)
+    emit(args, result, [f"{key.replace('_', ' ').title()}: {value}" for key, value in result.items()])
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="lms", description="Library management from the command line.")
+    parser.add_argument("--data-dir", help="data directory (default: $LMS_DATA_DIR or library_data)")
+    parser.add_argument("--backend", choices=("journal", "mapped", "sqlite"), help="storage backend (default: $LMS_STORAGE or journal)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--log-level", default="WARNING", help="library log level (default: WARNING)")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="COMMAND")
+
+    def command(group, name, handler, **kwargs):
+        sub = group.add_parser(name, **kwargs)
+        sub.set_defaults(handler=handler)
+        return sub
+
+    books = commands.add_parser("books", help="list, show, add, remove or import books")
+    books = books.add_subparsers(dest="action", required=True, metavar="ACTION")
+    sub = command(books, "list", books_list, help="list books in catalog order")
+    sub.add_argument("--offset", type=int, default=0)
+    sub.add_argument("--limit", type=int, default=100)
+    command(books, "show", books_show, help="show one book").add_argument("isbn")
+    sub = command(books, "add", books_add, help="add a book or merge copies")
+    sub.add_argument("isbn")
+    sub.add_argument("title")
+    sub.add_argument("author")
+    sub.add_argument("copies", type=int)
+    command(books, "remove", books_remove, help="remove a book").add_argument("isbn")
+    sub = command(books, "import", books_import, help="bulk import a CSV or JSONL file")
+    sub.add_argument("path")
+    sub.add_argument("--format", choices=("csv", "jsonl"))
+
+    members = commands.add_parser("members", help="list, show, add or remove members")
+    members = members.add_subparsers(dest="action", required=True, metavar="ACTION")
+    command(members, "list", members_list, help="list members").add_argument(
+        "--query", help="only members whose name or ID contains this")
+    command(members, "show", members_show, help="show one member").add_argument("member_id")
+    sub = command(members, "add", members_add, help="register a member")
+    for name in ("member_id", "name", "email", "phone"):
+        sub.add_argument(name)
+    command(members, "remove", members_remove, help="remove a member").add_argument("member_id")
+
+    loans = commands.add_parser("loans", help="list, issue or return loans and compute fines")
+    loans = loans.add_subparsers(dest="action", required=True, metavar="ACTION")
+    sub = command(loans, "list", loans_list, help="list open loans")
+    which = sub.add_mutually_exclusive_group()
+    which.add_argument("--member")
+    which.add_argument("--isbn")
+    which.add_argument("--due-before", metavar="YYYY-MM-DD")
+    for name, handler in (("issue", loans_issue), ("return", loans_return)):
+        sub = command(loans, name, handler, help=f"{name} one copy")
+        sub.add_argument("member_id")
+        sub.add_argument("isbn")
+        sub.add_argument("--days", type=int, default=14, help="loan period (default: 14)")
+    command(loans, "fines", loans_fines, help="fines owed by open loans").add_argument(
+        "--date", metavar="YYYY-MM-DD", help="as of this date (default: today)")
+
+    sub = command(commands, "search", search, help="search the catalog")
+    sub.add_argument("kind", choices=("text", "title", "author", "isbn"),
+                     help="text: any words of title or author, ranked by relevance")
+    sub.add_argument("query")
+    sub.add_argument("--limit", type=int, default=50)
+    sub.add_argument("--offset", type=int, default=0, help="skip this many ranked results (text only)")
+    sub.add_argument("--fuzzy", action="store_true",
+                     help="tolerate typos in title/author queries; best matches first")
+
+    command(commands, "overview", overview, help="library totals")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    import logs
+
+    listener = logs.configure(args.log_level, fmt="text")
+    library = open_library(args)
+    store = library[0]
+    try:
+        status = args.handler(args, library) or 0
+    finally:
+        # Syncs and closes the journal; the next open replays this run's records
+        store.close()
+        logs.shutdown(listener)
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,141 @@
+"""Structured, levelled logging for the library modules, written off the calling thread."""
+
+import contextlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+
+ROOT_LOGGER = "lms"
+
+# LogRecord attributes that are not caller-supplied fields.
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Format each record as one JSON object per line.
+
+    Fields passed with ``extra=`` (e.g. ``isbn``, ``member_id``) are included as
+    top-level keys next to ``time``, ``level``, ``logger`` and ``message``.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves all formatting to the listener thread."""
+
+    def prepare(self, record):
+        # The base class formats and copies every record on the calling thread;
+        # the library's log arguments are immutable, so the record can go as is.
+        return record
+
+
+class _DeferredFlushHandler(logging.StreamHandler):
+    """StreamHandler that leaves flushing to the listener, which flushes whenever the queue runs dry."""
+
+    def emit(self, record):
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+
+class _Listener(logging.handlers.QueueListener):
+    """QueueListener that writes records in bursts and flushes once per burst."""
+
+    def dequeue(self, block):
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            for handler in self.handlers:
+                handler.flush()
+            return self.queue.get(block)
+
+    def stop(self):
+        super().stop()
+        for handler in self.handlers:
+            handler.flush()
+
+
+def configure(level=None, path=None, fmt=None):
+    """
+    Route the library's log records through a queue to a background writer.
+
+    Callers only pay for creating the record and putting it on a queue; a
+    QueueListener thread formats it and writes it to the file or stream, flushing
+    whenever it has caught up rather than after every record.
+
+    Args:
+        level (str, optional): Minimum level, e.g. "INFO"; defaults to $LMS_LOG_LEVEL or "INFO"
+        path (str, optional): Append to this file instead of stderr; defaults to $LMS_LOG_FILE
+        fmt (str, optional): "json" (one object per line) or "text"; defaults to
+            $LMS_LOG_FORMAT or "json"
+
+    Returns:
+        logging.handlers.QueueListener: The running listener; pass it to ``shutdown``
+    """
+    level = level or os.environ.get("LMS_LOG_LEVEL", "INFO")
+    path = path or os.environ.get("LMS_LOG_FILE") or None
+    fmt = fmt or os.environ.get("LMS_LOG_FORMAT", "json")
+
+    stream = open(path, "a", encoding="utf-8") if path else sys.stderr
+    handler = _DeferredFlushHandler(stream)
+    if fmt == "json":
+        handler.setFormatter(JSONFormatter())
+    elif fmt == "text":
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    else:
+        raise ValueError(f"Unknown log format: {fmt}")
+
+    records = queue.SimpleQueue()
+    logger = logging.getLogger(ROOT_LOGGER)
+    for old in list(logger.handlers):
+        if isinstance(old, logging.handlers.QueueHandler):
+            logger.removeHandler(old)
+    logger.addHandler(_QueueHandler(records))
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    logger.propagate = False
+
+    listener = _Listener(records, handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def shutdown(listener):
+    """Flush queued records and stop the writer thread started by ``configure``."""
+    if listener is None:
+        return
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+        if handler.stream is not sys.stderr:
+            handler.stream.close()
+
+
+@contextlib.contextmanager
+def quiet(level=logging.WARNING):
+    """Temporarily drop the library's records below ``level`` (e.g. while replaying saved state)."""
+    logger = logging.getLogger(ROOT_LOGGER)
+    previous = logger.level
+    logger.setLevel(max(level, logger.getEffectiveLevel()))
+    try:
+        yield
+    finally:
+        logger.setLevel(previous)
@@ -1,24 +1,50 @@
 import tkinter as tk # Main GUI library
 from tkinter import ttk, messagebox, simpledialog
 from authent import authenticate_user
-from book import Book, BookManager
-from search import search_by_title, search_by_author, search_by_isbn
-from member import MemberModule
-from issue_return import IssueReturn
+from book import Book
+from search import (search_by_title, search_by_author, search_by_isbn,
+                    fuzzy_search_by_title, fuzzy_search_by_author, full_text_search)
 from library import LibraryManagementModule
+from circulation import Circulation, CirculationError
+from storage import open_library
+from virtual_tree import VirtualTreeview
+from live_search import LiveSearch
+from autocomplete import Autocomplete
+import logs
+import metrics
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 
 class LibraryGUI:
+    PAGE_SIZE = 100  # Ranked keyword results shown per page
+
     def __init__(self, root):
         self.root = root
         self.root.title("Library Management System")
         self.root.geometry("800x600")
-        self.book_manager = BookManager()
-        self.member_module = MemberModule()
-        self.issue_return = IssueReturn()
+        # Log records are written by a background thread; see logs.configure
+        self.log_listener = logs.configure()
+        # Restore saved state from the configured storage backend
+        (self.store, self.book_manager, self.member_module,
+         self.issue_return) = open_library()
         self.library_module = LibraryManagementModule()
+        self.circulation = Circulation(self.book_manager, self.member_module,
+                                       self.issue_return, self.store)
         self.current_user = None
+        self.live_search = LiveSearch(self.root)
+        # Type-ahead titles and authors, kept current by the book and loan managers
+        self.suggestions = Autocomplete()
+        self.suggestions.attach(self.book_manager, self.issue_return, background=True)
+        self.auth_executor = ThreadPoolExecutor(max_workers=1,
+                                                thread_name_prefix="login")
+        self.login_pending = None
+        self.root.protocol("WM_DELETE_WINDOW", self.exit_program)
+        self.root.after(1000, self.flush_store)
+        # Export operation metrics when $LMS_METRICS_FILE or $LMS_METRICS_PORT is set
+        self.metrics_exporter = metrics.enable_from_env()
+        if self.metrics_exporter is not None:
+            self.book_manager.query_cache.watch(metrics.REGISTRY)
 
         # Color scheme
         self.colors = {
@@ -98,7 +124,22 @@ class LibraryGUI:
                                  parent=self.root)
             return
 
-        if authenticate_user("", username, password):  # Empty email
+        if self.login_pending is not None:
+            return  # A check is already running
+
+        # Password hashing is deliberately slow; keep it off the Tk thread
+        self.login_pending = self.auth_executor.submit(authenticate_user, "",
+                                                       username, password)
+        self.root.after(20, self.finish_login, username)
+
+    def finish_login(self, username):
+        if not self.login_pending.done():
+            self.root.after(20, self.finish_login, username)
+            return
+
+        authenticated = self.login_pending.result()
+        self.login_pending = None
+        if authenticated:
             self.current_user = username
             self.create_main_menu()
         else:
@@ -106,6 +147,7 @@ class LibraryGUI:
                                  parent=self.root)
 
     def clear_window(self):
+        self.live_search.cancel()  # Don't deliver results to a screen being torn down
         for widget in self.root.winfo_children():
             widget.destroy()
 
@@ -130,8 +172,19 @@ class LibraryGUI:
         for text, command in buttons:
             ttk.Button(frame, text=text, command=command).pack(fill="x", pady=5)
 
+    def flush_store(self):
+        """Periodically flush changes made since the last flush to disk."""
+        self.store.flush()
+        self.root.after(1000, self.flush_store)
+
     def exit_program(self):
         """Exit the application."""
+        self.live_search.close()
+        self.auth_executor.shutdown(wait=False)
+        self.store.close()
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.close()
+        logs.shutdown(self.log_listener)
         self.root.destroy()
 
     def book_management(self):
@@ -145,20 +198,10 @@ class LibraryGUI:
         # Book list
         tree_frame = ttk.Frame(frame, style="Custom.TFrame")
         tree_frame.pack(fill="both", expand=True)
-        self.book_tree = ttk.Treeview(tree_frame,
-                                      columns=("ISBN", "Title", "Author",
-                                               "Copies"),
-                                      show="headings")
-        self.book_tree.heading("ISBN", text="ISBN")
-        self.book_tree.heading("Title", text="Title")
-        self.book_tree.heading("Author", text="Author")
-        self.book_tree.heading("Copies", text="Copies")
-        self.book_tree.pack(side="left", fill="both", expand=True)
-
-        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical",
-                                  command=self.book_tree.yview)
-        scrollbar.pack(side="right", fill="y")
-        self.book_tree.configure(yscrollcommand=scrollbar.set)
+        self.book_view = VirtualTreeview(tree_frame,
+                                         ("ISBN", "Title", "Author", "Copies"),
+                                         ("ISBN", "Title", "Author", "Copies"),
+                                         self.book_row)
 
         # Buttons
         button_frame = ttk.Frame(frame, style="Custom.TFrame")
@@ -182,29 +225,30 @@ class LibraryGUI:
 
         if isbn and title and author and copies:
             book = Book(isbn, title, author, copies)
-            self.book_manager.add_book(book)
-            self.update_book_list()
+            if self.book_manager.add_book(book):
+                self.book_view.insert(isbn)
+            else:
+                self.book_view.refresh(isbn)
         else:
             messagebox.showerror("Error", "All fields are required.",
                                  parent=self.root)
 
     def remove_book(self):
-        selected = self.book_tree.selection()
-        if not selected:
+        isbn = self.book_view.selected_key()
+        if isbn is None:
             messagebox.showerror("Error", "Please select a book to remove.",
                                  parent=self.root)
             return
 
-        isbn = self.book_tree.item(selected[0])["values"][0]
         self.book_manager.remove_book(isbn)
-        self.update_book_list()
+        self.book_view.delete(isbn)
+
+    def book_row(self, isbn):
+        book = self.book_manager.books[isbn]
+        return (book.isbn, book.title, book.author, book.copies)
 
     def update_book_list(self):
-        for item in self.book_tree.get_children():
-            self.book_tree.delete(item)
-        for book in self.book_manager.books.values():
-            self.book_tree.insert("", "end", values=(book.isbn, book.title,
-                                                     book.author, book.copies))
+        self.book_view.set_keys(self.book_manager.books)
 
     def member_management(self):
         self.clear_window()
@@ -218,19 +262,10 @@ class LibraryGUI:
         # Member list
         tree_frame = ttk.Frame(frame, style="Custom.TFrame")
         tree_frame.pack(fill="both", expand=True)
-        self.member_tree = ttk.Treeview(tree_frame,
-                                        columns=("ID", "Name", "Email", "Phone"),
-                                        show="headings")
-        self.member_tree.heading("ID", text="Member ID")
-        self.member_tree.heading("Name", text="Name")
-        self.member_tree.heading("Email", text="Email")
-        self.member_tree.heading("Phone", text="Phone")
-        self.member_tree.pack(side="left", fill="both", expand=True)
-
-        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical",
-                                  command=self.member_tree.yview)
-        scrollbar.pack(side="right", fill="y")
-        self.member_tree.configure(yscrollcommand=scrollbar.set)
+        self.member_view = VirtualTreeview(tree_frame,
+                                           ("ID", "Name", "Email", "Phone"),
+                                           ("Member ID", "Name", "Email", "Phone"),
+                                           self.member_row)
 
         # Buttons
         button_frame = ttk.Frame(frame, style="Custom.TFrame")
@@ -261,7 +296,7 @@ class LibraryGUI:
             if success:
                 messagebox.showinfo("Success", "Member added successfully.",
                                     parent=self.root)
-                self.update_member_list()
+                self.member_view.insert(member_id)
             else:
                 messagebox.showerror("Error", "Member ID already exists.",
                                      parent=self.root)
@@ -270,13 +305,12 @@ class LibraryGUI:
                                  parent=self.root)
 
     def update_member(self):
-        selected = self.member_tree.selection()
-        if not selected:
+        member_id = self.member_view.selected_key()
+        if member_id is None:
             messagebox.showerror("Error", "Please select a member to update.",
                                  parent=self.root)
             return
 
-        member_id = self.member_tree.item(selected[0])["values"][0]
         name = simpledialog.askstring("Input",
                                       "Enter New Name (leave blank to keep unchanged):",
                                       parent=self.root)
@@ -291,36 +325,34 @@ class LibraryGUI:
         if success:
             messagebox.showinfo("Success", "Member updated successfully.",
                                 parent=self.root)
-            self.update_member_list()
+            self.member_view.refresh(member_id)
         else:
             messagebox.showerror("Error", "Member not found.",
                                  parent=self.root)
 
     def remove_member(self):
-        selected = self.member_tree.selection()
-        if not selected:
+        member_id = self.member_view.selected_key()
+        if member_id is None:
             messagebox.showerror("Error", "Please select a member to remove.",
                                  parent=self.root)
             return
 
-        member_id = self.member_tree.item(selected[0])["values"][0]
         success = self.member_module.remove_member(member_id)
         if success:
             messagebox.showinfo("Success", "Member removed successfully.",
                                 parent=self.root)
-            self.update_member_list()
+            self.member_view.delete(member_id)
         else:
             messagebox.showerror("Error", "Member not found.",
                                  parent=self.root)
 
     def view_borrowed_books(self):
-        selected = self.member_tree.selection()
-        if not selected:
+        member_id = self.member_view.selected_key()
+        if member_id is None:
             messagebox.showerror("Error", "Please select a member.",
                                  parent=self.root)
             return
 
-        member_id = self.member_tree.item(selected[0])["values"][0]
         borrowed_books = self.member_module.get_borrowed_books(member_id)
         if not borrowed_books:
             messagebox.showinfo("Info", "No books borrowed by this member.",
@@ -334,13 +366,12 @@ class LibraryGUI:
                 books_info += f"ISBN: {book.isbn}, Title: {book.title}\n"
         messagebox.showinfo("Borrowed Books", books_info, parent=self.root)
 
+    def member_row(self, member_id):
+        member = self.member_module.get_member(member_id)
+        return member.member_id, member.name, member.email, member.phone
+
     def update_member_list(self):
-        for item in self.member_tree.get_children():
-            self.member_tree.delete(item)
-        for member in self.member_module.list_members():
-            self.member_tree.insert("", "end",
-                                    values=(member["member_id"], member["name"],
-                                            member["email"], member["phone"]))
+        self.member_view.set_keys(self.member_module.members)
 
     def search_books(self):
         self.clear_window()
@@ -350,44 +381,71 @@ class LibraryGUI:
         ttk.Label(frame, text="Search Books", font=("Helvetica", 14, "bold"),
                   foreground=self.colors["primary"]).pack(pady=10)
 
+        # Ranked keyword search over title and author, one page at a time
+        keyword_frame = ttk.Frame(frame, style="Custom.TFrame")
+        keyword_frame.pack(fill="x", pady=(10, 0))
+        ttk.Label(keyword_frame, text="Keywords:").pack(side="left", padx=5)
+        self.keyword_entry = ttk.Entry(keyword_frame, width=40)
+        self.keyword_entry.pack(side="left", padx=5)
+        self.keyword_entry.bind("<KeyRelease>", lambda event: self.keyword_query(0))
+        ttk.Button(keyword_frame, text="Search",
+                   command=lambda: self.keyword_query(0, delay_ms=0)).pack(side="left", padx=5)
+        ttk.Button(keyword_frame, text="< Prev",
+                   command=lambda: self.keyword_query(self.keyword_offset - self.PAGE_SIZE,
+                                                      delay_ms=0)).pack(side="left", padx=5)
+        ttk.Button(keyword_frame, text="Next >",
+                   command=lambda: self.keyword_query(self.keyword_offset + self.PAGE_SIZE,
+                                                      delay_ms=0)).pack(side="left", padx=5)
+        self.keyword_status = ttk.Label(keyword_frame, text="")
+        self.keyword_status.pack(side="left", padx=5)
+        self.keyword_offset = 0
+        self.keyword_total = 0
+
         # Search fields
         search_frame = ttk.Frame(frame, style="Custom.TFrame")
         search_frame.pack(fill="x", pady=10)
         ttk.Label(search_frame, text="Title:").pack(side="left", padx=5)
         self.title_entry = ttk.Entry(search_frame)
         self.title_entry.pack(side="left", padx=5)
+        self.title_entry.bind("<KeyRelease>", lambda event: self.live_query("title"))
         ttk.Button(search_frame, text="Search by Title",
                    command=self.search_by_title).pack(side="left", padx=5)
 
         ttk.Label(search_frame, text="Author:").pack(side="left", padx=5)
         self.author_entry = ttk.Entry(search_frame)
         self.author_entry.pack(side="left", padx=5)
+        self.author_entry.bind("<KeyRelease>", lambda event: self.live_query("author"))
         ttk.Button(search_frame, text="Search by Author",
                    command=self.search_by_author).pack(side="left", padx=5)
 
         ttk.Label(search_frame, text="ISBN:").pack(side="left", padx=5)
         self.isbn_entry = ttk.Entry(search_frame)
         self.isbn_entry.pack(side="left", padx=5)
+        self.isbn_entry.bind("<KeyRelease>", lambda event: self.live_query("isbn"))
         ttk.Button(search_frame, text="Search by ISBN",
                    command=self.search_by_isbn).pack(side="left", padx=5)
 
+        # Typo-tolerant title/author matching, best matches first
+        self.fuzzy_search = tk.BooleanVar(value=False)
+        ttk.Checkbutton(search_frame, text="Fuzzy", variable=self.fuzzy_search).pack(side="left", padx=5)
+
+        # Most-borrowed titles and authors completing the entry being typed in
+        self.suggestion_list = tk.Listbox(frame, height=5)
+        self.suggestion_list.pack(fill="x", pady=(0, 10))
+        self.suggestion_list.bind("<<ListboxSelect>>", self.choose_suggestion)
+        self.suggestion_kind = None
+        self.shown_suggestions = []
+        for kind, entry in (("keyword", self.keyword_entry), ("title", self.title_entry),
+                            ("author", self.author_entry)):
+            entry.bind("<KeyRelease>", lambda event, kind=kind: self.update_suggestions(kind), add="+")
+
         # Search results
         tree_frame = ttk.Frame(frame, style="Custom.TFrame")
         tree_frame.pack(fill="both", expand=True)
-        self.search_tree = ttk.Treeview(tree_frame,
-                                        columns=("ISBN", "Title", "Author",
-                                                 "Copies"),
-                                        show="headings")
-        self.search_tree.heading("ISBN", text="ISBN")
-        self.search_tree.heading("Title", text="Title")
-        self.search_tree.heading("Author", text="Author")
-        self.search_tree.heading("Copies", text="Copies")
-        self.search_tree.pack(side="left", fill="both", expand=True)
-
-        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical",
-                                  command=self.search_tree.yview)
-        scrollbar.pack(side="right", fill="y")
-        self.search_tree.configure(yscrollcommand=scrollbar.set)
+        self.search_view = VirtualTreeview(tree_frame,
+                                           ("ISBN", "Title", "Author", "Copies"),
+                                           ("ISBN", "Title", "Author", "Copies"),
+                                           self.book_row)
 
         ttk.Button(frame, text="Back",
                    command=self.create_main_menu).pack(pady=10)
@@ -399,8 +457,7 @@ class LibraryGUI:
                                  parent=self.root)
             return
 
-        results = search_by_title(self.book_manager, title)
-        self.update_search_results(results)
+        self.live_query("title", delay_ms=0)
 
     def search_by_author(self):
         author = self.author_entry.get()
@@ -409,8 +466,7 @@ class LibraryGUI:
                                  parent=self.root)
             return
 
-        results = search_by_author(self.book_manager, author)
-        self.update_search_results(results)
+        self.live_query("author", delay_ms=0)
 
     def search_by_isbn(self):
         isbn = self.isbn_entry.get()
@@ -419,15 +475,87 @@ class LibraryGUI:
                                  parent=self.root)
             return
 
-        book = search_by_isbn(self.book_manager, isbn)
-        self.update_search_results([book] if book else [])
+        self.live_query("isbn", delay_ms=0)
+
+    def live_query(self, kind, delay_ms=None):
+        """Run a title/author/ISBN search in the background, debounced while typing."""
+        fuzzy = self.fuzzy_search.get()
+        if kind == "title":
+            text = self.title_entry.get()
+            find = fuzzy_search_by_title if fuzzy else search_by_title
+            query = lambda: find(self.book_manager, text)
+        elif kind == "author":
+            text = self.author_entry.get()
+            find = fuzzy_search_by_author if fuzzy else search_by_author
+            query = lambda: find(self.book_manager, text)
+        else:
+            text = self.isbn_entry.get()
+
+            def query():
+                book = search_by_isbn(self.book_manager, text)
+                return [book] if book else []
+
+        if not text:
+            self.live_search.cancel()
+            self.update_search_results([])
+            return
+        self.live_search.submit(query, self.update_search_results, delay_ms)
+
+    def suggestion_entry(self, kind):
+        return {"keyword": self.keyword_entry, "title": self.title_entry,
+                "author": self.author_entry}[kind]
+
+    def update_suggestions(self, kind):
+        """List completions of the entry being typed in; cached in the tree, so no debounce."""
+        found = self.suggestions.suggest(self.suggestion_entry(kind).get())
+        if kind != "keyword":
+            found = [suggestion for suggestion in found if suggestion.kind == kind]
+        self.suggestion_kind = kind
+        self.shown_suggestions = found
+        self.suggestion_list.delete(0, "end")
+        for suggestion in found:
+            self.suggestion_list.insert(
+                "end", f"{suggestion.text}  ({suggestion.kind}, borrowed {suggestion.borrows} times)")
+
+    def choose_suggestion(self, event=None):
+        """Fill the entry with the chosen suggestion and search for it."""
+        selection = self.suggestion_list.curselection()
+        if not selection:
+            return
+        suggestion = self.shown_suggestions[selection[0]]
+        entry = self.suggestion_entry(self.suggestion_kind)
+        entry.delete(0, "end")
+        entry.insert(0, suggestion.text)
+        if self.suggestion_kind == "keyword":
+            self.keyword_query(0, delay_ms=0)
+        else:
+            self.live_query(self.suggestion_kind, delay_ms=0)
 
     def update_search_results(self, books):
-        for item in self.search_tree.get_children():
-            self.search_tree.delete(item)
-        for book in books:
-            self.search_tree.insert("", "end", values=(book.isbn, book.title,
-                                                       book.author, book.copies))
+        self.search_view.set_keys(book.isbn for book in books)
+        self.keyword_status.config(text="")
+
+    def keyword_query(self, offset, delay_ms=None):
+        """Show one page of keyword results, best first, in the background."""
+        text = self.keyword_entry.get()
+        if not text.strip():
+            self.live_search.cancel()
+            self.update_search_results([])
+            return
+        if offset < 0 or (offset and offset >= self.keyword_total):
+            return  # Already on the first or last page
+        self.live_search.submit(
+            lambda: full_text_search(self.book_manager, text, self.PAGE_SIZE, offset),
+            self.update_keyword_results, delay_ms)
+
+    def update_keyword_results(self, page):
+        self.keyword_offset, self.keyword_total = page.offset, page.total
+        self.search_view.set_keys(book.isbn for book in page.books)
+        if page.books:
+            self.keyword_status.config(
+                text=f"{page.offset + 1}-{page.offset + len(page.books)} of {page.total}")
+        else:
+            self.keyword_status.config(text="No matches")
 
     def issue_return_books(self):
         self.clear_window()
@@ -466,6 +594,33 @@ class LibraryGUI:
         ttk.Button(return_frame, text="Check Fine",
                    command=self.check_fine).pack(side="left", padx=5)
 
+        # Scan queue: barcode scanners type the ISBN followed by Enter
+        scan_frame = ttk.LabelFrame(frame, text="Scan Queue", padding="10",
+                                    style="Custom.TLabelframe")
+        scan_frame.pack(fill="both", expand=True, pady=5)
+        entry_row = ttk.Frame(scan_frame, style="Custom.TFrame")
+        entry_row.pack(fill="x")
+        ttk.Label(entry_row, text="Member ID:").pack(side="left", padx=5)
+        self.scan_member_id = ttk.Entry(entry_row)
+        self.scan_member_id.pack(side="left", padx=5)
+        ttk.Label(entry_row, text="Scan ISBN:").pack(side="left", padx=5)
+        self.scan_isbn = ttk.Entry(entry_row)
+        self.scan_isbn.pack(side="left", padx=5)
+        self.scan_isbn.bind("<Return>", self.queue_scan)
+        self.scan_queue = []
+        self.scan_list = tk.Listbox(scan_frame, height=6)
+        self.scan_list.pack(fill="both", expand=True, pady=5)
+        button_row = ttk.Frame(scan_frame, style="Custom.TFrame")
+        button_row.pack(fill="x")
+        ttk.Button(button_row, text="Check Out All",
+                   command=lambda: self.commit_scans("checkout")).pack(side="left", padx=5)
+        ttk.Button(button_row, text="Check In All",
+                   command=lambda: self.commit_scans("checkin")).pack(side="left", padx=5)
+        ttk.Button(button_row, text="Remove Selected",
+                   command=self.remove_scan).pack(side="left", padx=5)
+        ttk.Button(button_row, text="Clear",
+                   command=lambda: self.set_scan_queue([])).pack(side="left", padx=5)
+
         ttk.Button(frame, text="Back",
                    command=self.create_main_menu).pack(pady=10)
 
@@ -479,24 +634,12 @@ class LibraryGUI:
                                  parent=self.root)
             return
 
-        if member_id not in self.member_module.members:
-            messagebox.showerror("Error", "Member not found.",
-                                 parent=self.root)
-            return
-
-        if isbn not in self.book_manager.books:
-            messagebox.showerror("Error", "Book not found.",
-                                 parent=self.root)
-            return
-
-        if self.book_manager.books[isbn].copies <= 0:
-            messagebox.showerror("Error", "No copies available.",
-                                 parent=self.root)
+        loan_days = int(self.library_module.get_setting("max_borrow_days"))
+        try:
+            self.circulation.checkout(member_id, isbn, loan_days=loan_days)
+        except CirculationError as error:
+            messagebox.showerror("Error", str(error), parent=self.root)
             return
-
-        self.issue_return.issue_book(member_id, isbn)
-        self.member_module.add_borrowed_book(member_id, isbn)
-        self.book_manager.books[isbn].copies -= 1
         messagebox.showinfo("Success", "Book issued successfully.",
                             parent=self.root)
 
@@ -510,26 +653,54 @@ class LibraryGUI:
                                  parent=self.root)
             return
 
-        if member_id not in self.member_module.members:
-            messagebox.showerror("Error", "Member not found.",
-                                 parent=self.root)
-            return
-
-        if isbn not in self.book_manager.books:
-            messagebox.showerror("Error", "Book not found.",
-                                 parent=self.root)
+        try:
+            self.circulation.checkin(member_id, isbn)
+        except CirculationError as error:
+            messagebox.showerror("Error", str(error), parent=self.root)
             return
+        messagebox.showinfo("Success", "Book returned successfully.",
+                            parent=self.root)
 
-        if isbn not in self.member_module.get_borrowed_books(member_id):
-            messagebox.showerror("Error", "Book not borrowed by this member.",
+    def queue_scan(self, event=None):
+        isbn = self.scan_isbn.get().strip()
+        self.scan_isbn.delete(0, tk.END)
+        if isbn:
+            self.scan_queue.append(isbn)
+            self.scan_list.insert(tk.END, isbn)
+            self.scan_list.see(tk.END)
+
+    def remove_scan(self):
+        for index in reversed(self.scan_list.curselection()):
+            del self.scan_queue[index]
+            self.scan_list.delete(index)
+
+    def set_scan_queue(self, isbns):
+        self.scan_queue = list(isbns)
+        self.scan_list.delete(0, tk.END)
+        for isbn in self.scan_queue:
+            self.scan_list.insert(tk.END, isbn)
+
+    def commit_scans(self, mode):
+        member_id = self.scan_member_id.get()
+
+        if not member_id or not self.scan_queue:
+            messagebox.showerror("Error",
+                                 "Please provide a Member ID and scan at least one ISBN.",
                                  parent=self.root)
             return
 
-        self.issue_return.return_book(member_id, isbn)
-        self.member_module.remove_borrowed_book(member_id, isbn)
-        self.book_manager.books[isbn].copies += 1
-        messagebox.showinfo("Success", "Book returned successfully.",
-                            parent=self.root)
+        if mode == "checkout":
+            loan_days = int(self.library_module.get_setting("max_borrow_days"))
+            report = self.circulation.checkout_batch(member_id, self.scan_queue,
+                                                     loan_days=loan_days)
+        else:
+            report = self.circulation.checkin_batch(member_id, self.scan_queue)
+        # Keep refused items queued so they can be corrected and retried
+        self.set_scan_queue(item.isbn for item in report.failed)
+        if report.failed:
+            messagebox.showwarning("Scan Queue", report.summary(), parent=self.root)
+        else:
+            messagebox.showinfo("Scan Queue", report.summary(), parent=self.root)
 
     def check_fine(self):
         member_id = self.return_member_id.get()
@@ -541,9 +712,14 @@ class LibraryGUI:
                                  parent=self.root)
             return
 
-        issue_date = simpledialog.askstring("Input",
-                                            "Enter Issue Date (YYYY-MM-DD):",
-                                            parent=self.root)
+        # Use the recorded issue date; only ask for loans made before the ledger existed
+        loan = self.issue_return.get_loan(member_id, isbn)
+        if loan is not None:
+            issue_date = loan.issue_date.isoformat()
+        else:
+            issue_date = simpledialog.askstring("Input",
+                                                "Enter Issue Date (YYYY-MM-DD):",
+                                                parent=self.root)
         return_date = datetime.now().strftime("%Y-%m-%d")
 
         if not issue_date:
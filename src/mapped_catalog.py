@@ -0,0 +1,482 @@
+"""Binary catalog file read through mmap, so opening a large catalog does not build a Python object per book.
+
+File layout (native byte order, recorded in the header; every section starts
+on an 8-byte boundary and its position follows from the record count)::
+
+    header          magic, version, byte order, record count, journal seq, total copies
+    copies          int64 per record (uint32 in version 1 files, which are still read)
+    isbn index      uint32 record numbers, sorted by ISBN bytes
+    offset tables   (count + 1) uint64 heap offsets per column
+    string heap     UTF-8 columns one after another: isbn, title, author, then
+                    the lowercased title and author, each value followed by "\\n"
+
+Records keep catalog order. A lookup by ISBN is a binary search of the index
+that decodes only the record found, and a substring search runs the regex
+engine over the mapped lowercase column without decoding anything.
+"""
+
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import threading
+from array import array
+from bisect import bisect_right
+from collections.abc import ItemsView, MutableMapping, ValuesView
+
+from book import Book
+from parallel_scan import normalize
+from text_index import BM25Index, TrigramIndex
+
+CATALOG_FILE = "catalog.bin"
+MAGIC = b"LMSCAT\x00\x01"
+VERSION = 2
+HEADER = struct.Struct("=8sIIQQqQ")  # magic, version, byte order, count, seq, copies, reserved
+COPIES_FORMAT = {1: "I", 2: "q"}  # Copies are signed: nothing stops a book going below zero
+COLUMNS = ("isbn", "title", "author", "title_norm", "author_norm")
+ISBN, TITLE, AUTHOR, TITLE_NORM, AUTHOR_NORM = range(len(COLUMNS))
+_BYTE_ORDER = {"little": 1, "big": 2}[sys.byteorder]
+
+
+def _align(position):
+    return (position + 7) & ~7
+
+
+def _layout(count, version=VERSION):
+    """Return where the copies, ISBN index, offset tables and heap start for ``count`` records."""
+    copies = _align(HEADER.size)
+    order = _align(copies + array(COPIES_FORMAT[version]).itemsize * count)
+    offsets = _align(order + 4 * count)
+    heap = offsets + 8 * (count + 1) * len(COLUMNS)
+    return copies, order, offsets, heap
+
+
+def write_catalog(path, books, seq=0):
+    """
+    Write books to a catalog file, replacing any previous one atomically.
+
+    Columns are streamed to temporary files, so memory holds the offset tables
+    and the ISBNs being sorted rather than every string.
+
+    Args:
+        path (str): Catalog file to write
+        books (iterable): Book objects in catalog order
+        seq (int): Journal sequence number the catalog reflects
+
+    Returns:
+        int: Number of records written
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    columns = [tempfile.TemporaryFile(dir=directory) for _ in COLUMNS]
+    try:
+        sizes = [0] * len(COLUMNS)
+        offsets = [array("Q", [0]) for _ in COLUMNS]
+        copies, isbns, total_copies = array(COPIES_FORMAT[VERSION]), [], 0
+        for book in books:
+            isbn = book.isbn.encode("utf-8")
+            values = (isbn + b"\n", book.title.encode("utf-8") + b"\n",
+                      book.author.encode("utf-8") + b"\n",
+                      normalize(book.title).encode("utf-8") + b"\n",
+                      normalize(book.author).encode("utf-8") + b"\n")
+            for index, value in enumerate(values):
+                columns[index].write(value)
+                sizes[index] += len(value)
+                offsets[index].append(sizes[index])
+            isbns.append(isbn)
+            copies.append(book.copies)
+            total_copies += book.copies
+        count = len(isbns)
+        order = array("I", sorted(range(count), key=isbns.__getitem__))
+        del isbns
+
+        copies_at, order_at, offsets_at, heap_at = _layout(count)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, _BYTE_ORDER, count, seq, total_copies, 0))
+            f.write(b"\0" * (copies_at - f.tell()))
+            copies.tofile(f)
+            f.write(b"\0" * (order_at - f.tell()))
+            order.tofile(f)
+            f.write(b"\0" * (offsets_at - f.tell()))
+            base = 0  # Offsets are written relative to the heap, where the columns follow each other
+            for index, table in enumerate(offsets):
+                array("Q", (offset + base for offset in table)).tofile(f)
+                base += sizes[index]
+            for column in columns:
+                column.seek(0)
+                while True:
+                    chunk = column.read(1 << 20)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return count
+    finally:
+        for column in columns:
+            column.close()
+
+
+class MappedCatalog:
+    """
+    Read-only view of a catalog file.
+
+    Opening maps the file and reads its fixed-size header, whatever the number
+    of records; the operating system pages in only the parts that are used.
+
+    Attributes:
+        path (str): Catalog file
+        count (int): Number of records
+        seq (int): Journal sequence number the catalog reflects
+        total_copies (int): Sum of copies over all records
+        copies (memoryview): Copies of each record, by record number
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Catalog file written by write_catalog
+
+        Raises:
+            ValueError: If the file is not a catalog this version can read
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, byte_order, self.count, self.seq, self.total_copies, _ = \
+            HEADER.unpack_from(self._map)
+        if magic != MAGIC or version not in COPIES_FORMAT:
+            raise ValueError(f"{path} is not a catalog file this version can read")
+        if byte_order != _BYTE_ORDER:
+            raise ValueError(f"{path} was written with the other byte order; rebuild it on this machine")
+        copies_at, order_at, offsets_at, self._heap = _layout(self.count, version)
+        view = memoryview(self._map)
+        self.copies = view[copies_at:order_at].cast(COPIES_FORMAT[version])[:self.count]
+        self._order = view[order_at:order_at + 4 * self.count].cast("I")
+        table = 8 * (self.count + 1)
+        self._offsets = [view[offsets_at + index * table:offsets_at + (index + 1) * table].cast("Q")
+                         for index in range(len(COLUMNS))]
+
+    def __len__(self):
+        return self.count
+
+    def value(self, column, record):
+        """Decode one column of one record."""
+        offsets, heap = self._offsets[column], self._heap
+        return self._map[heap + offsets[record]:heap + offsets[record + 1] - 1].decode("utf-8")
+
+    def book(self, record):
+        """Decode a record into a Book."""
+        value = self.value
+        return Book(value(ISBN, record), value(TITLE, record), value(AUTHOR, record),
+                    self.copies[record])
+
+    def find(self, isbn):
+        """Return the record number of an ISBN, or -1, by binary search of the ISBN index."""
+        key = isbn.encode("utf-8")
+        data, offsets, heap, order = self._map, self._offsets[ISBN], self._heap, self._order
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            record = order[middle]
+            candidate = data[heap + offsets[record]:heap + offsets[record + 1] - 1]
+            if candidate < key:
+                low = middle + 1
+            elif candidate > key:
+                high = middle
+            else:
+                return record
+        return -1
+
+    def scan(self, column, pattern):
+        """
+        Yield the record numbers whose column matches, in record order.
+
+        Args:
+            column (int): Column number, e.g. TITLE_NORM
+            pattern (re.Pattern): Bytes pattern that cannot match "\\n"
+        """
+        offsets, heap, search = self._offsets[column], self._heap, pattern.search
+        position, end = heap + offsets[0], heap + offsets[self.count]
+        while position < end:
+            match = search(self._map, position, end)
+            if match is None:
+                return
+            record = bisect_right(offsets, match.start() - heap) - 1
+            yield record
+            position = heap + offsets[record + 1]  # One hit per record is enough
+
+
+class MappedBooks(MutableMapping):
+    """
+    ISBN -> Book mapping over a MappedCatalog plus the changes made since it was written.
+
+    Changes stay in memory until the next snapshot writes a new catalog: books
+    whose copies changed, books added, and ISBNs removed from the catalog.
+    Books come back in catalog order followed by those added since, matching
+    the order a dict would keep. Every lookup decodes a new Book, so changes
+    must be written back with ``books[isbn] = book``, as BookManager does.
+
+    Attributes:
+        catalog (MappedCatalog): The mapped file
+        updated (Dict[str, Book]): Catalog books whose copies changed
+        added (Dict[str, Book]): Books added since the catalog was written, in order
+        removed (Set[str]): Catalog ISBNs removed since
+    """
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.updated = {}
+        self.added = {}
+        self.removed = set()
+        # (catalog, ISBN -> record) from the latest scan, whose results are usually looked up next
+        self._found = (None, {})
+
+    def snapshot(self):
+        """Return a copy unaffected by later changes; only the in-memory changes are copied."""
+        copy = MappedBooks(self.catalog)
+        copy.updated, copy.added, copy.removed = dict(self.updated), dict(self.added), set(self.removed)
+        return copy
+
+    def reset(self, catalog):
+        """Switch to a newly written catalog that already contains every change."""
+        self.catalog, self.updated, self.added, self.removed = catalog, {}, {}, set()
+
+    def _record(self, isbn):
+        """Record number of a catalog book that has not been removed, else -1."""
+        if isbn in self.removed:
+            return -1
+        catalog, found = self._found
+        if catalog is self.catalog and isbn in found:
+            return found[isbn]
+        return self.catalog.find(isbn)
+
+    def __getitem__(self, isbn):
+        book = self.added.get(isbn)
+        if book is None:
+            book = self.updated.get(isbn)
+        if book is not None:
+            return book
+        record = self._record(isbn)
+        if record < 0:
+            raise KeyError(isbn)
+        return self.catalog.book(record)
+
+    def __setitem__(self, isbn, book):
+        if isbn not in self.added and self._record(isbn) >= 0:
+            self.updated[isbn] = book  # Keeps its place in catalog order
+        else:
+            self.added[isbn] = book
+
+    def __delitem__(self, isbn):
+        if isbn in self.added:
+            del self.added[isbn]
+            return
+        if self._record(isbn) < 0:
+            raise KeyError(isbn)
+        self.removed.add(isbn)
+        self.updated.pop(isbn, None)
+
+    def __contains__(self, isbn):
+        return isbn in self.added or self._record(isbn) >= 0
+
+    def __iter__(self):
+        catalog, removed = self.catalog, self.removed
+        added = list(self.added)  # Taken up front, so additions during iteration wait
+        for record in range(len(catalog)):
+            isbn = catalog.value(ISBN, record)
+            if isbn not in removed:
+                yield isbn
+        yield from added
+
+    def __len__(self):
+        return len(self.catalog) - len(self.removed) + len(self.added)
+
+    def get_many(self, isbns):
+        """Look up several ISBNs in the order given; missing ones are skipped."""
+        found = (self.get(isbn) for isbn in isbns)
+        return [book for book in found if book is not None]
+
+    def values(self):
+        return _MappedValues(self)
+
+    def items(self):
+        return _MappedItems(self)
+
+    def _iter_items(self):
+        catalog, removed, updated = self.catalog, self.removed, self.updated
+        added = list(self.added.items())
+        for record in range(len(catalog)):
+            isbn = catalog.value(ISBN, record)
+            if isbn in removed:
+                continue
+            book = updated.get(isbn)
+            yield isbn, book if book is not None else catalog.book(record)
+        yield from added
+
+    def totals(self):
+        """Return (number of titles, sum of copies) from the header and the changes, without a scan."""
+        catalog, copies = self.catalog, self.catalog.total_copies
+        for isbn in self.removed | self.updated.keys():
+            copies -= catalog.copies[catalog.find(isbn)]
+        copies += sum(book.copies for book in self.updated.values())
+        copies += sum(book.copies for book in self.added.values())
+        return len(self), copies
+
+    def scan(self, field, query):
+        """
+        Return the ISBNs whose title or author contains ``query``, ignoring case, in catalog order.
+
+        Args:
+            field (str): "title" or "author"
+            query (str): Substring to look for
+        """
+        needle = normalize(query)
+        pattern = re.compile(re.escape(needle.encode("utf-8")))
+        catalog, removed = self.catalog, self.removed
+        column = TITLE_NORM if field == "title" else AUTHOR_NORM
+        found = {catalog.value(ISBN, record): record for record in catalog.scan(column, pattern)}
+        self._found = (catalog, found)
+        isbns = list(found)
+        if removed:
+            isbns = [isbn for isbn in isbns if isbn not in removed]
+        isbns += [isbn for isbn, book in list(self.added.items())
+                  if needle in normalize(getattr(book, field))]
+        return isbns
+
+
+class _MappedValues(ValuesView):
+    def __iter__(self):
+        for _, book in self._mapping._iter_items():
+            yield book
+
+
+class _MappedItems(ItemsView):
+    def __iter__(self):
+        yield from self._mapping._iter_items()
+
+
+class DeferredIndex:
+    """
+    An in-memory index built from the mapped books the first time it is queried.
+
+    Until then BookManager's add/discard calls are dropped; the books they
+    describe are already in the mapping the index will be built from.
+    """
+
+    def __init__(self, books, build):
+        """
+        Args:
+            books (MappedBooks): Books to index
+            build (callable): Takes the books and returns a filled index
+        """
+        self.books = books
+        self.index = None
+        self._build = build
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.books)
+
+    def ready(self):
+        """Return the index, building it now if this is the first query."""
+        if self.index is None:
+            with self._lock:
+                if self.index is None:
+                    self.index = self._build(self.books)
+        return self.index
+
+    def add(self, *args):
+        if self.index is not None:
+            self.index.add(*args)
+
+    def discard(self, *args):
+        if self.index is not None:
+            self.index.discard(*args)
+
+    def search(self, *args, **kwargs):
+        return self.ready().search(*args, **kwargs)
+
+    def similar(self, *args, **kwargs):
+        return self.ready().similar(*args, **kwargs)
+
+
+class MappedTextIndex(DeferredIndex):
+    """Substring search of one field straight from the mapped catalog; a TrigramIndex only for ``similar``."""
+
+    def __init__(self, books, field):
+        super().__init__(books, lambda books: _trigram_index(books, field))
+        self.field = field
+
+    def search(self, query):
+        return self.books.scan(self.field, query)
+
+
+def _trigram_index(books, field):
+    index = TrigramIndex()
+    for isbn, book in books.items():
+        index.add(isbn, getattr(book, field))
+    return index
+
+
+def _bm25_index(books):
+    index = BM25Index()
+    for isbn, book in books.items():
+        index.add(isbn, f"{book.title} {book.author}")
+    return index
+
+
+class MappedBookStore:
+    """
+    Books of the "mapped" storage backend, for BookManager(store).
+
+    The catalog file holds the books as of the last journal snapshot; changes
+    since then live in MappedBooks and are replayed from the journal on start.
+    Opening is constant time. Substring searches scan the mapped columns; the
+    fuzzy and ranked indexes are built in memory on their first query.
+
+    Attributes:
+        path (str): Catalog file
+        books (MappedBooks): ISBN -> Book mapping
+        title_index (MappedTextIndex): Title search
+        author_index (MappedTextIndex): Author search
+        text_index (DeferredIndex): BM25 over title and author
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Catalog file; an empty one is created if it does not exist
+        """
+        self.path = path
+        if not os.path.exists(path):
+            write_catalog(path, [])
+        self.books = MappedBooks(MappedCatalog(path))
+        self.title_index = MappedTextIndex(self.books, "title")
+        self.author_index = MappedTextIndex(self.books, "author")
+        self.text_index = DeferredIndex(self.books, _bm25_index)
+
+    @property
+    def seq(self):
+        """Journal sequence number the catalog file reflects."""
+        return self.books.catalog.seq
+
+    def write(self, seq, books=None):
+        """
+        Write a new catalog file and map it in place of the old one.
+
+        The previous mapping is left to be released once nothing reads from it.
+        On Windows a mapped file cannot be replaced, so this backend needs a POSIX system.
+
+        Args:
+            seq (int): Journal sequence number the new catalog reflects
+            books (iterable, optional): Books to write instead of the current ones
+        """
+        write_catalog(self.path, self.books.values() if books is None else books, seq)
+        self.books.reset(MappedCatalog(self.path))
+        if books is not None:
+            for index in (self.title_index, self.author_index, self.text_index):
+                index.index = None  # Built from the replaced books; rebuilt if queried again
@@ -1,15 +1,115 @@
+from collections import Counter
+
+from metrics import instrumented
+
+
+class Member:
+    """
+    A library member.
+
+    Borrowed books are a multiset: ``borrowed`` maps each ISBN to the number of
+    copies the member holds, so lookups and removals are O(1) and two copies of
+    one title are counted correctly. Reading a member like the dictionaries it
+    replaces (``member["name"]``, ``member["borrowed_books"]``) still works.
+
+    Attributes:
+        member_id (str): Unique identifier for the member
+        name (str): Name of the member
+        email (str): Email address of the member
+        phone (str): Phone number of the member
+        borrowed (Counter): Copies held per ISBN, or None while nothing is borrowed
+    """
+    # No per-instance __dict__, and no Counter until the first loan: most of a
+    # large membership has nothing out at any time.
+    __slots__ = ("member_id", "name", "email", "phone", "borrowed")
+
+    FIELDS = ("member_id", "name", "email", "phone", "borrowed_books")
+
+    def __init__(self, member_id, name, email, phone, borrowed=None):
+        self.member_id = member_id
+        self.name = name
+        self.email = email
+        self.phone = phone
+        self.borrowed = Counter(borrowed) if borrowed else None
+
+    @property
+    def borrowed_books(self):
+        """List of borrowed ISBNs, repeated once per copy held."""
+        return list(self.borrowed.elements()) if self.borrowed else []
+
+    def borrowed_count(self, isbn):
+        """Return the number of copies of ``isbn`` the member holds."""
+        return self.borrowed.get(isbn, 0) if self.borrowed else 0
+
+    def borrow(self, isbn):
+        """Add one copy of ``isbn``."""
+        if self.borrowed is None:
+            self.borrowed = Counter()
+        self.borrowed[isbn] += 1
+
+    def give_back(self, isbn):
+        """Drop one copy of ``isbn``; returns False if the member holds none."""
+        count = self.borrowed_count(isbn)
+        if not count:
+            return False
+        if count == 1:
+            del self.borrowed[isbn]
+            if not self.borrowed:
+                self.borrowed = None
+        else:
+            self.borrowed[isbn] = count - 1
+        return True
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.FIELDS[1:4]:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.FIELDS else default
+
+    def keys(self):
+        return self.FIELDS
+
+    def to_dict(self):
+        """Return the member as a plain dictionary (e.g. for JSON)."""
+        return {key: self[key] for key in self.FIELDS}
+
+    def __eq__(self, other):
+        if not isinstance(other, Member):
+            return NotImplemented
+        return (self.member_id, self.name, self.email, self.phone, self.borrowed or {}) == \
+            (other.member_id, other.name, other.email, other.phone, other.borrowed or {})
+
+    def __repr__(self):
+        return f"Member({self.member_id!r}, {self.name!r}, {self.email!r}, {self.phone!r})"
+
+
 class MemberModule:
     """
     A module to manage library members.
 
     Attributes:
-        members (Dict[str, Dict[str, str]]): Dictionary of members with member_id as keys
+        members (Dict[str, Member]): Dictionary of members with member_id as keys
     """
 
-    def __init__(self):
-        """Initialize an empty MemberModule with a dictionary for members."""
-        self.members = {}
+    def __init__(self, store=None):
+        """
+        Initialize an empty MemberModule with a dictionary for members.
+
+        Args:
+            store (SQLiteStore, optional): Backend whose ``members`` mapping replaces the dictionary
+        """
+        self.members = {} if store is None else store.members
+        self.journal = None  # Optional LibraryJournal recording each mutation
+        self.stats = None  # Optional LibraryStats kept current by each mutation
 
+    @instrumented
     def register_member(self, member_id, name, email, phone):
         """
         Register a new member to the library system.
@@ -24,16 +124,15 @@ class MemberModule:
             bool: True if successfully added, False if member_id already exists
         """
         if member_id not in self.members:
-            self.members[member_id] = {
-                "member_id": member_id,
-                "name": name,
-                "email": email,
-                "phone": phone,
-                "borrowed_books": [],  # List to store ISBNs of borrowed books
-            }
+            self.members[member_id] = Member(member_id, name, email, phone)
+            if self.journal is not None:
+                self.journal.record("register_member", member_id, name, email, phone)
+            if self.stats is not None:
+                self.stats.add_members(1)
             return True
         return False
 
+    @instrumented
     def update_member(self, member_id, name=None, email=None, phone=None):
         """
         Update member information.
@@ -48,15 +147,20 @@ class MemberModule:
             bool: True if successfully updated, False if member_id not found
         """
         if member_id in self.members:
+            member = self.members[member_id]
             if name:
-                self.members[member_id]["name"] = name
+                member.name = name
             if email:
-                self.members[member_id]["email"] = email
+                member.email = email
             if phone:
-                self.members[member_id]["phone"] = phone
+                member.phone = phone
+            self.members[member_id] = member  # Write back for store-backed members
+            if self.journal is not None:
+                self.journal.record("update_member", member_id, name, email, phone)
             return True
         return False
 
+    @instrumented
     def remove_member(self, member_id):
         """
         Remove a member from the library system.
@@ -69,9 +173,14 @@ class MemberModule:
         """
         if member_id in self.members:
             del self.members[member_id]
+            if self.journal is not None:
+                self.journal.record("remove_member", member_id)
+            if self.stats is not None:
+                self.stats.add_members(-1)
             return True
         return False
 
+    @instrumented
     def get_member(self, member_id):
         """
         Get a member by ID.
@@ -80,22 +189,24 @@ class MemberModule:
             member_id (str): ID of the member to retrieve
 
         Returns:
-            dict: Member information if found, None otherwise
+            Member: Member information if found, None otherwise
         """
         return self.members.get(member_id)
 
+    @instrumented
     def list_members(self):
         """
         Get a list of all members.
 
         Returns:
-            list: List of all member dictionaries
+            list: List of all members
         """
         return list(self.members.values())
 
+    @instrumented
     def add_borrowed_book(self, member_id, isbn):
         """
-        Add a book to the member's borrowed books list.
+        Add a copy of a book to the member's borrowed books.
 
         Args:
             member_id (str): ID of the member
@@ -105,13 +216,18 @@ class MemberModule:
             bool: True if successfully added, False if member not found
         """
         if member_id in self.members:
-            self.members[member_id]["borrowed_books"].append(isbn)
+            member = self.members[member_id]
+            member.borrow(isbn)
+            self.members[member_id] = member
+            if self.journal is not None:
+                self.journal.record("add_borrowed_book", member_id, isbn)
             return True
         return False
 
+    @instrumented
     def remove_borrowed_book(self, member_id, isbn):
         """
-        Remove a book from the member's borrowed books list.
+        Remove one copy of a book from the member's borrowed books.
 
         Args:
             member_id (str): ID of the member
@@ -120,14 +236,15 @@ class MemberModule:
         Returns:
             bool: True if successfully removed, False if member or book not found
         """
-        if (
-            member_id in self.members
-            and isbn in self.members[member_id]["borrowed_books"]
-        ):
-            self.members[member_id]["borrowed_books"].remove(isbn)
+        member = self.members.get(member_id)
+        if member is not None and member.give_back(isbn):
+            self.members[member_id] = member
+            if self.journal is not None:
+                self.journal.record("remove_borrowed_book", member_id, isbn)
             return True
         return False
 
+    @instrumented
     def get_borrowed_books(self, member_id):
         """
         Get the list of books borrowed by a member.
@@ -136,12 +253,27 @@ class MemberModule:
             member_id (str): ID of the member
 
         Returns:
-            list: List of ISBN strings of borrowed books, empty list if member not found
+            list: ISBNs of borrowed books, repeated once per copy; empty list if member not found
         """
-        if member_id in self.members:
-            return self.members[member_id]["borrowed_books"]
-        return []
+        member = self.members.get(member_id)
+        return member.borrowed_books if member is not None else []
+
+    @instrumented
+    def borrowed_count(self, member_id, isbn):
+        """
+        Get how many copies of a book a member has borrowed.
+
+        Args:
+            member_id (str): ID of the member
+            isbn (str): ISBN of the book
+
+        Returns:
+            int: Copies held, 0 if none or member not found
+        """
+        member = self.members.get(member_id)
+        return member.borrowed_count(isbn) if member is not None else 0
 
+    @instrumented
     def search_members(self, keyword):
         """
         Search members by name or ID.
@@ -150,12 +282,12 @@ class MemberModule:
             keyword (str): Name or ID to search for
 
         Returns:
-            list: List of member dictionaries matching the search criteria
+            list: List of members matching the search criteria
         """
         keyword = keyword.lower()
         return [
             member
             for member in self.members.values()
-            if keyword in member["name"].lower()
-            or keyword in member["member_id"].lower()
+            if keyword in member.name.lower()
+            or keyword in member.member_id.lower()
         ]
@@ -0,0 +1,260 @@
+"""Per-operation call counts, error counts and latency histograms, exported in Prometheus text format."""
+
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Histogram bucket upper bounds in seconds, from 10 microseconds to 5 seconds.
+BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class OperationMetrics:
+    """
+    Counters for one instrumented operation.
+
+    Attributes:
+        calls (int): Completed calls, including ones that raised
+        errors (int): Calls that raised an exception
+        total (float): Sum of call durations in seconds
+        buckets (List[int]): Calls per histogram bucket (non-cumulative; the
+            last entry counts calls slower than every bound)
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, failed=False):
+        """Record one call that took ``seconds``."""
+        index = bisect_left(BUCKETS, seconds)
+        with self._lock:
+            self.calls += 1
+            self.total += seconds
+            self.buckets[index] += 1
+            if failed:
+                self.errors += 1
+
+
+class Registry:
+    """
+    Metrics of every instrumented operation, by name.
+
+    Attributes:
+        enabled (bool): Whether instrumented calls are being measured
+        operations (Dict[str, OperationMetrics]): Metrics by operation name
+        watched (Dict[str, tuple]): (help, type, read) of values exported as they are at render time
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.operations = {}
+        self.watched = {}
+        self._lock = threading.Lock()
+
+    def watch(self, name, help, kind, read):
+        """
+        Export a value kept elsewhere, e.g. a cache's hit count.
+
+        Args:
+            name (str): Metric name
+            help (str): One-line description
+            kind (str): "counter" or "gauge"
+            read (callable): Returns the current value; called on every render
+        """
+        with self._lock:
+            self.watched[name] = (help, kind, read)
+
+    def get(self, name):
+        """Return the metrics for an operation, creating them on first use."""
+        metrics = self.operations.get(name)
+        if metrics is None:
+            with self._lock:
+                metrics = self.operations.setdefault(name, OperationMetrics())
+        return metrics
+
+    def reset(self):
+        """Forget all recorded measurements."""
+        with self._lock:
+            self.operations = {}
+
+    def render(self):
+        """
+        Format all metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: Calls and errors as counters, durations as a histogram, labelled by operation
+        """
+        operations = sorted(self.operations.items())
+        lines = [
+            "# HELP lms_operation_calls_total Calls of each instrumented library operation.",
+            "# TYPE lms_operation_calls_total counter",
+        ]
+        lines += [f'lms_operation_calls_total{{operation="{name}"}} {m.calls}'
+                  for name, m in operations]
+        lines += [
+            "# HELP lms_operation_errors_total Calls that raised an exception.",
+            "# TYPE lms_operation_errors_total counter",
+        ]
+        lines += [f'lms_operation_errors_total{{operation="{name}"}} {m.errors}'
+                  for name, m in operations]
+        lines += [
+            "# HELP lms_operation_duration_seconds Wall time of each call.",
+            "# TYPE lms_operation_duration_seconds histogram",
+        ]
+        for name, m in operations:
+            with m._lock:
+                buckets, calls, total = list(m.buckets), m.calls, m.total
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ("+Inf",), buckets):
+                cumulative += count
+                lines.append(f'lms_operation_duration_seconds_bucket{{operation="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'lms_operation_duration_seconds_sum{{operation="{name}"}} {total}')
+            lines.append(f'lms_operation_duration_seconds_count{{operation="{name}"}} {calls}')
+        for name, (help, kind, read) in sorted(self.watched.items()):
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {read()}"]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write the metrics to a file atomically (for a node_exporter textfile collector)."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+REGISTRY = Registry()
+
+
+def instrumented(func):
+    """
+    Decorate a function or method so its calls are measured while metrics are enabled.
+
+    The operation is named after the function's qualified name, e.g.
+    ``BookManager.add_book``. While metrics are disabled the wrapper only checks
+    a flag before calling through.
+    """
+    name = func.__qualname__
+    registry = REGISTRY
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not registry.enabled:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException:
+            registry.get(name).observe(time.perf_counter() - start, failed=True)
+            raise
+        registry.get(name).observe(time.perf_counter() - start)
+        return result
+
+    return wrapper
+
+
+def _metrics_server(host, port):
+    """Create an HTTP server answering ``GET /metrics`` (http.server is only imported when asked for)."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = REGISTRY.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Scrapes every few seconds would flood the console
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    return server
+
+
+class Exporter:
+    """Background publishing of the registry to a file and/or a local HTTP endpoint."""
+
+    def __init__(self, path=None, port=None, host="127.0.0.1", interval=10.0):
+        """
+        Args:
+            path (str, optional): File rewritten every ``interval`` seconds and on ``close``
+            port (int, optional): Serve ``GET /metrics`` on this port
+            host (str): Address for the endpoint
+            interval (float): Seconds between file writes
+        """
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._threads = []
+        self.server = None
+        if port is not None:
+            self.server = _metrics_server(host, port)
+            self._start(self.server.serve_forever)
+        if path is not None:
+            self._start(self._write_loop)
+
+    def _start(self, target):
+        thread = threading.Thread(target=target, name="metrics-exporter", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _write_loop(self):
+        while not self._stop.wait(self.interval):
+            REGISTRY.write(self.path)
+
+    def close(self):
+        """Stop the endpoint and write the file one last time."""
+        self._stop.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        if self.path is not None:
+            REGISTRY.write(self.path)
+
+
+def enable(path=None, port=None, host="127.0.0.1", interval=10.0):
+    """
+    Start measuring instrumented calls, optionally exporting the results.
+
+    Args:
+        path (str, optional): Metrics file to keep up to date
+        port (int, optional): Port for a local ``/metrics`` endpoint
+        host (str): Address for the endpoint
+        interval (float): Seconds between file writes
+
+    Returns:
+        Exporter: Call ``close()`` on shutdown to write the final file
+    """
+    REGISTRY.enabled = True
+    return Exporter(path, port, host, interval)
+
+
+def disable():
+    """Stop measuring; instrumented calls go straight through again."""
+    REGISTRY.enabled = False
+
+
+def enable_from_env():
+    """
+    Enable metrics if $LMS_METRICS_FILE or $LMS_METRICS_PORT is set.
+
+    Returns:
+        Exporter: The running exporter, or None when metrics stay disabled
+    """
+    path = os.environ.get("LMS_METRICS_FILE") or None
+    port = os.environ.get("LMS_METRICS_PORT") or None
+    if path is None and port is None:
+        return None
+    return enable(path, int(port) if port else None)
@@ -0,0 +1,337 @@
+"""Substring and regex scans of the whole catalog, split into shards held by worker processes."""
+
+import math
+import os
+import re
+import threading
+from array import array
+from bisect import bisect_right
+from itertools import groupby, islice
+from operator import itemgetter
+
+FIELDS = ("title", "author")
+CHUNK_SIZE = 10000  # Books per message while loading a shard
+SEGMENT_ROWS = 1 << 16  # Rows per joined text; bounds the copying when books are added
+_ESCAPE = re.compile(r"\\(.)", re.DOTALL)
+_ROW_ANCHORS = {"A": "^", "Z": "$"}
+
+
+def normalize(text):
+    """Lowercase a field and keep it on one line, as shards store it."""
+    return text.lower().replace("\n", " ")
+
+
+def compile_pattern(pattern, regex=False):
+    """
+    Compile a scan pattern for matching normalized fields.
+
+    Args:
+        pattern (str): Text to find, or a regular expression when ``regex`` is set
+        regex (bool): Treat ``pattern`` as a regular expression; ``^`` and ``$``
+            match at the start and end of each field, and so do ``\\A`` and ``\\Z``
+
+    Returns:
+        re.Pattern: Case-insensitive pattern (plain text is lowercased instead,
+            which keeps the regex engine on its fast literal search)
+
+    Raises:
+        re.error: If ``regex`` is set and the pattern is invalid
+    """
+    if regex:
+        re.compile(pattern)  # Errors point at the pattern as written
+        # A field never contains "\n", so ``^``/``$`` mean the same there, and unlike
+        # \A/\Z they still match at every row of a shard's newline-joined text.
+        pattern = _ESCAPE.sub(lambda m: _ROW_ANCHORS.get(m.group(1), m.group(0)), pattern)
+        return re.compile(pattern, re.IGNORECASE | re.MULTILINE)
+    return re.compile(re.escape(normalize(pattern)))
+
+
+class _Shard:
+    """
+    One contiguous slice of the catalog, in catalog order.
+
+    Each field of every book is lowercased and stored in newline-separated
+    segments of up to SEGMENT_ROWS rows, so a scan is a handful of regex
+    searches over long strings in C instead of a Python loop over books.
+    ``starts`` maps a match position back to its row within the segment.
+    """
+
+    def __init__(self):
+        self.isbns = []
+        self.rows = {}  # ISBN -> its latest row, for removals
+        self.bases = []  # First row of each segment
+        self.texts = {field: [] for field in FIELDS}  # Field -> segment texts, each row plus "\n"
+        self.starts = {field: [] for field in FIELDS}  # Field -> per segment, offset of each row
+        self.deleted = set()  # Rows of books removed since they were loaded
+        self._pending = {field: [] for field in FIELDS}  # Added rows not yet in a segment
+
+    def add(self, rows):
+        """Append (isbn, title, author) rows; they are joined into segments on the next seal."""
+        self.rows.update(zip((row[0] for row in rows), range(len(self.isbns), len(self.isbns) + len(rows))))
+        self.isbns.extend(row[0] for row in rows)
+        for column, field in enumerate(FIELDS, 1):
+            self._pending[field].extend(normalize(row[column]) for row in rows)
+        if len(self._pending[FIELDS[0]]) >= SEGMENT_ROWS:
+            self.seal()  # Keeps the per-row strings of a large load from piling up
+
+    def remove(self, isbns):
+        """Mark the rows of removed books so scans skip them."""
+        for isbn in isbns:
+            row = self.rows.pop(isbn, None)
+            if row is not None:  # Books in other shards are not found here
+                self.deleted.add(row)
+
+    def seal(self):
+        """Join pending rows into segments, refilling a last segment that still has room."""
+        count = len(self._pending[FIELDS[0]])
+        if not count:
+            return
+        base = len(self.isbns) - count
+        # Reopening the last segment stops one-book additions from leaving tiny segments behind
+        reopen = bool(self.bases) and base - self.bases[-1] < SEGMENT_ROWS
+        if reopen:
+            base = self.bases.pop()
+        for field in FIELDS:
+            values = self._pending[field]
+            if reopen:
+                self.starts[field].pop()
+                values[:0] = self.texts[field].pop().split("\n")[:-1]
+            for offset in range(0, len(values), SEGMENT_ROWS):
+                segment = values[offset:offset + SEGMENT_ROWS]
+                starts, position = array("q"), 0
+                for value in segment:
+                    starts.append(position)
+                    position += len(value) + 1
+                self.texts[field].append("\n".join(segment) + "\n")
+                self.starts[field].append(starts)
+            values.clear()
+        self.bases.extend(range(base, len(self.isbns), SEGMENT_ROWS))
+
+    def scan(self, pattern, fields, limit):
+        """
+        Return the ISBNs of rows where any of ``fields`` matches, in shard order.
+
+        Args:
+            pattern (re.Pattern): From compile_pattern
+            fields (tuple): Fields to search
+            limit (int, optional): Stop after this many matching rows
+        """
+        self.seal()
+        hits = [self._scan_field(pattern, field, limit) for field in fields]
+        rows = hits[0] if len(hits) == 1 else sorted(set().union(*hits))
+        return [self.isbns[row] for row in rows[:limit]]
+
+    def _scan_field(self, pattern, field, limit):
+        search, deleted, rows = pattern.search, self.deleted, []
+        for base, text, starts in zip(self.bases, self.texts[field], self.starts[field]):
+            position, size = 0, len(text)
+            while position < size:
+                if limit is not None and len(rows) >= limit:
+                    return rows
+                match = search(text, position)
+                if match is None:
+                    break
+                row = bisect_right(starts, match.start()) - 1
+                end = starts[row + 1] - 1 if row + 1 < len(starts) else size - 1  # The row's "\n"
+                # A regex that can match "\n" may run into the next row; then check the row alone
+                if (match.end() <= end or search(text, starts[row], end)) and base + row not in deleted:
+                    rows.append(base + row)
+                position = end + 1  # One hit per row is enough
+        return rows
+
+
+def _serve(conn):
+    """Worker process loop: apply shard commands until told to close (or the parent goes away)."""
+    shard = _Shard()
+    failure = None  # Error from a command without a reply, raised with the next reply
+    while True:
+        try:
+            command, args, reply = conn.recv()
+        except EOFError:
+            return
+        if command == "close":
+            return
+        try:
+            result = getattr(shard, command)(*args)
+        except Exception as error:
+            failure = failure or error
+            result = None
+        if reply:
+            conn.send((failure, result))
+            failure = None
+
+
+class _LocalWorker:
+    """Stand-in for a worker connection that runs the shard in this process (``workers=0``)."""
+
+    def __init__(self):
+        self.shard = _Shard()
+        self._replies = []
+
+    def send(self, message):
+        command, args, reply = message
+        if command == "close":
+            return
+        result = getattr(self.shard, command)(*args)
+        if reply:
+            self._replies.append((None, result))
+
+    def recv(self):
+        return self._replies.pop(0)
+
+
+class ShardedScan:
+    """
+    Scan every book for a substring or regex in parallel, for filters no index serves.
+
+    The catalog is split into one contiguous shard per long-lived worker process,
+    so the workers scan their shards on separate cores, outside this process's
+    GIL. Results are concatenated in shard order, which keeps catalog order.
+    Books added later go to the last shard and removed books are masked; those
+    changes are queued and shipped to the workers before the next scan.
+
+    Workers are started with the "spawn" method by default, which is safe in a
+    process that already runs threads; as with any spawned process, the main
+    module must guard its entry point with ``if __name__ == "__main__"``. Call
+    ``close()`` (or use ``with``) to stop them.
+
+    Attributes:
+        workers (int): Number of worker processes; 0 scans in this process
+    """
+
+    def __init__(self, workers=None, context=None):
+        """
+        Args:
+            workers (int, optional): Worker processes; defaults to the number of CPUs
+            context (multiprocessing.context.BaseContext, optional): Process start method
+        """
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self._processes = []
+        self._conns = []
+        if self.workers == 0:
+            self._conns.append(_LocalWorker())
+        else:
+            if context is None:
+                import multiprocessing  # Only when workers are wanted; it is slow to import
+
+                context = multiprocessing.get_context("spawn")
+            for index in range(self.workers):
+                parent_conn, child_conn = context.Pipe()
+                process = context.Process(target=_serve, args=(child_conn,),
+                                          name=f"scan-shard-{index}", daemon=True)
+                process.start()
+                child_conn.close()
+                self._processes.append(process)
+                self._conns.append(parent_conn)
+        self._pending = []  # ("add", row) / ("remove", isbn) in the order they happened
+        self._lock = threading.Lock()  # Guards _pending only, so queuing a change never waits for a scan
+        self._conns_lock = threading.Lock()  # One conversation with the workers at a time
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def load(self, books, total=None):
+        """
+        Split books into equal shards, in order, and wait until every worker has them.
+
+        Args:
+            books (iterable): Book objects in catalog order, e.g. a generator
+            total (int, optional): Number of books, if ``books`` has no len()
+        """
+        total = len(books) if total is None else total
+        per_shard = max(1, math.ceil(total / len(self._conns)))
+        books = iter(books)
+        with self._conns_lock:
+            for conn in self._conns:
+                left = per_shard
+                while left:
+                    rows = [(book.isbn, book.title, book.author)
+                            for book in islice(books, min(left, CHUNK_SIZE))]
+                    if not rows:
+                        break
+                    conn.send(("add", (rows,), False))
+                    left -= len(rows)
+            rest = [(book.isbn, book.title, book.author) for book in books]  # ``total`` too low
+            if rest:
+                self._conns[-1].send(("add", (rest,), False))
+            self._ask_all("seal", ())
+
+    def attach(self, book_manager):
+        """Load the manager's catalog and have it report every added or removed book."""
+        self.load(book_manager.books.values(), len(book_manager.books))
+        book_manager.scan_engine = self
+
+    def add_book(self, book):
+        """Queue a new book for the last shard (called by BookManager)."""
+        with self._lock:
+            self._pending.append(("add", (book.isbn, book.title, book.author)))
+
+    def remove_book(self, book):
+        """Queue a removed book to be masked in its shard (called by BookManager)."""
+        with self._lock:
+            self._pending.append(("remove", book.isbn))
+
+    def scan(self, pattern, regex=False, fields=FIELDS, limit=None):
+        """
+        Find the books whose fields contain ``pattern``, ignoring case.
+
+        Args:
+            pattern (str): Text to find, or a regular expression with ``regex``
+            regex (bool): Match ``pattern`` as a regular expression against each field
+            fields (tuple): Any of "title" and "author"
+            limit (int, optional): Return at most this many, the earliest in catalog order
+
+        Returns:
+            list: Matching ISBNs in catalog order
+
+        Raises:
+            re.error: If ``regex`` is set and the pattern is invalid
+            ValueError: If no fields are given or one is not in FIELDS
+        """
+        if not fields or not set(fields) <= set(FIELDS):
+            raise ValueError(f"fields must be drawn from {FIELDS}, got {tuple(fields)}")
+        compiled = compile_pattern(pattern, regex)  # Invalid patterns fail here, not in a worker
+        with self._conns_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            self._ship(pending)
+            shards = self._ask_all("scan", (compiled, tuple(fields), limit))
+        isbns = [isbn for shard in shards for isbn in shard]
+        return isbns[:limit]
+
+    def close(self):
+        """Stop the worker processes."""
+        with self._conns_lock:
+            for conn in self._conns:
+                try:
+                    conn.send(("close", (), False))
+                except (BrokenPipeError, OSError):
+                    pass
+            for process in self._processes:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+            self._processes, self._conns = [], []
+
+    def _ship(self, pending):
+        """Send queued changes: additions to the last shard, removals to every shard, in order."""
+        for kind, changes in groupby(pending, key=itemgetter(0)):
+            values = [value for _, value in changes]
+            if kind == "add":
+                self._conns[-1].send(("add", (values,), False))
+            else:
+                for conn in self._conns:
+                    conn.send(("remove", (values,), False))
+
+    def _ask_all(self, command, args):
+        """Send a command to every worker, then collect their replies in shard order."""
+        for conn in self._conns:
+            conn.send((command, args, True))
+        replies = [conn.recv() for conn in self._conns]  # All of them, so no reply is left queued
+        for failure, _ in replies:
+            if failure is not None:
+                raise failure
+        return [result for _, result in replies]
@@ -0,0 +1,104 @@
+"""Bounded LRU cache of search results, invalidated by the catalog's generation counter."""
+
+import threading
+from collections import OrderedDict, namedtuple
+
+CacheInfo = namedtuple("CacheInfo", "hits misses evictions invalidations size maxsize")
+
+
+class QueryCache:
+    """
+    Least-recently-used cache of search results keyed by search kind and normalized query.
+
+    Every entry is stamped with the ``BookManager.generation`` it was computed
+    at. Adding or removing a book or changing its copies bumps the generation,
+    so an entry from an earlier generation is dropped on lookup rather than
+    returned; nothing has to walk the cache on each mutation.
+
+    Attributes:
+        maxsize (int): Entries kept before the least recently used is evicted
+        hits (int): Lookups answered from the cache
+        misses (int): Lookups that had to run the search (including invalidated ones)
+        evictions (int): Entries dropped to stay within ``maxsize``
+        invalidations (int): Entries dropped because the catalog changed since
+    """
+
+    def __init__(self, maxsize=256):
+        """
+        Args:
+            maxsize (int): Maximum number of cached queries
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()  # key -> (generation, result), least recent first
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_compute(self, key, generation, compute):
+        """
+        Return the cached result for ``key``, or compute and cache it.
+
+        Args:
+            key (tuple): Search kind, normalized query and any parameters that change the result
+            generation (int): Current catalog generation, read before computing
+            compute (callable): Runs the search; called without the lock held
+
+        Returns:
+            The cached or freshly computed result
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == generation:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.invalidations += 1
+            self.misses += 1
+        result = compute()
+        with self._lock:
+            # A mutation during compute() leaves the entry stamped with the old
+            # generation, so the next lookup recomputes it.
+            self._entries[key] = (generation, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return result
+
+    def watch(self, registry):
+        """
+        Export the counters and current size through a metrics registry.
+
+        Args:
+            registry (metrics.Registry): Registry to render them with, e.g. ``metrics.REGISTRY``
+        """
+        for field, help in (("hits", "Searches answered from the query cache."),
+                            ("misses", "Searches the query cache had to run."),
+                            ("evictions", "Cached queries dropped to stay within maxsize."),
+                            ("invalidations", "Cached queries dropped because the catalog changed.")):
+            registry.watch(f"lms_query_cache_{field}_total", help, "counter",
+                           lambda field=field: getattr(self, field))
+        registry.watch("lms_query_cache_entries", "Queries currently cached.", "gauge", self.__len__)
+
+    def clear(self):
+        """Drop every entry; the counters are kept."""
+        with self._lock:
+            self._entries.clear()
+
+    def info(self):
+        """
+        Report the counters, e.g. for choosing ``maxsize``.
+
+        Returns:
+            CacheInfo: hits, misses, evictions, invalidations, current size and maxsize
+        """
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.evictions, self.invalidations,
+                             len(self._entries), self.maxsize)
@@ -1,12 +1,50 @@
 # search.py
 
 from book import BookManager, Book
-from typing import List, Optional
+from metrics import instrumented
+from parallel_scan import FIELDS, compile_pattern, normalize
+from text_index import tokenize
+from typing import List, NamedTuple, Optional, Tuple
 
 
+class SearchPage(NamedTuple):
+    """One page of ranked full-text results."""
+    total: int  # Books matching any query term, across all pages
+    offset: int
+    books: List[Book]  # Best first
+    scores: List[float]  # BM25 score of each book
+
+
+def _books_for(manager: BookManager, isbns: List[str]) -> List[Book]:
+    """Resolve ISBNs to Book objects, in one round trip when the store supports it.
+
+    ISBNs removed since they were found (e.g. during a scan in another thread) are skipped.
+    """
+    books = manager.books
+    get_many = getattr(books, "get_many", None)
+    if get_many is not None:
+        return get_many(isbns)
+    found = map(books.get, isbns)
+    return [book for book in found if book is not None]
+
+
+def _cached(manager: BookManager, key: tuple, compute):
+    """
+    Answer from the manager's query cache when it has one, else run ``compute``.
+
+    Searches may run on a thread other than the one changing the catalog, so each
+    ``compute`` reads the books and indexes under ``manager.lock``.
+    """
+    cache = manager.query_cache
+    if cache is None:
+        return compute()
+    return cache.get_or_compute(key, manager.generation, compute)
+
+
+@instrumented
 def search_by_title(manager: BookManager, title: str) -> List[Book]:
     """
-    Search books by title.
+    Search books by title using the manager's trigram index.
     
     Args:
         manager (BookManager): The book manager instance.
@@ -15,16 +53,16 @@ def search_by_title(manager: BookManager, title: str) -> List[Book]:
     Returns:
         List[Book]: List of matching Book objects.
     """
-    matches = [
-        book for book in manager.books.values()
-        if title.lower() in book.title.lower()
-    ]
-    return matches
+    def compute():
+        with manager.lock.read():
+            return _books_for(manager, manager.title_index.search(title))
+    return list(_cached(manager, ("title", title.lower()), compute))  # Callers may modify their copy
 
 
+@instrumented
 def search_by_author(manager: BookManager, author: str) -> List[Book]:
     """
-    Search books by author.
+    Search books by author using the manager's trigram index.
 
     Args:
         manager (BookManager): The book manager instance.
@@ -33,13 +71,132 @@ def search_by_author(manager: BookManager, author: str) -> List[Book]:
     Returns:
         List[Book]: List of matching Book objects.
     """
-    matches = [
-        book for book in manager.books.values()
-        if author.lower() in book.author.lower()
-    ]
-    return matches
+    def compute():
+        with manager.lock.read():
+            return _books_for(manager, manager.author_index.search(author))
+    return list(_cached(manager, ("author", author.lower()), compute))
+
+
+@instrumented
+def fuzzy_search_by_title(manager: BookManager, title: str, limit: int = 10,
+                          min_score: float = 0.5) -> List[Book]:
+    """
+    Search books by title, tolerating typos and spelling variants.
+
+    Args:
+        manager (BookManager): The book manager instance.
+        title (str): The (possibly misspelled) title or part of title.
+        limit (int): Maximum number of results.
+        min_score (float): Lowest trigram similarity to accept, between 0 and 1.
+
+    Returns:
+        List[Book]: Up to ``limit`` books, most similar first.
+    """
+    def compute():
+        with manager.lock.read():
+            matches = manager.title_index.similar(title, limit, min_score)
+            return _books_for(manager, [isbn for isbn, _ in matches])
+    return list(_cached(manager, ("fuzzy_title", title.lower(), limit, min_score), compute))
+
+
+@instrumented
+def fuzzy_search_by_author(manager: BookManager, author: str, limit: int = 10,
+                           min_score: float = 0.5) -> List[Book]:
+    """
+    Search books by author, tolerating typos and spelling variants
+    (e.g. "Dostoevsky" finds "Fyodor Dostoyevsky").
+
+    Args:
+        manager (BookManager): The book manager instance.
+        author (str): The (possibly misspelled) author or part of author name.
+        limit (int): Maximum number of results.
+        min_score (float): Lowest trigram similarity to accept, between 0 and 1.
+
+    Returns:
+        List[Book]: Up to ``limit`` books, most similar first.
+    """
+    def compute():
+        with manager.lock.read():
+            matches = manager.author_index.similar(author, limit, min_score)
+            return _books_for(manager, [isbn for isbn, _ in matches])
+    return list(_cached(manager, ("fuzzy_author", author.lower(), limit, min_score), compute))
+
+
+@instrumented
+def full_text_search(manager: BookManager, query: str, limit: int = 20,
+                     offset: int = 0) -> SearchPage:
+    """
+    Search titles and authors for any of the query's words, ranked by BM25.
+
+    Only the requested page is selected and resolved to books, so a broad query
+    like "python" costs a pass over that word's postings, not a sort of every
+    match.
+
+    Args:
+        manager (BookManager): The book manager instance.
+        query (str): Words to search for, in any order.
+        limit (int): Results per page.
+        offset (int): Number of best results to skip.
+
+    Returns:
+        SearchPage: The total match count and this page's books, best first.
+    """
+    def compute():
+        with manager.lock.read():
+            total, page = manager.text_index.search(query, limit, offset)
+            return SearchPage(total, offset, _books_for(manager, [isbn for isbn, _ in page]),
+                              [score for _, score in page])
+    # Word order and repeats do not change the ranking
+    terms = tuple(sorted(set(tokenize(query))))
+    page = _cached(manager, ("text", terms, limit, offset), compute)
+    return page._replace(books=list(page.books), scores=list(page.scores))
+
+
+@instrumented
+def scan_books(manager: BookManager, pattern: str, regex: bool = False,
+               fields: Tuple[str, ...] = FIELDS, limit: Optional[int] = None) -> List[Book]:
+    """
+    Find books whose title or author contains a substring or matches a regex, ignoring case.
+
+    No index serves arbitrary substrings of either field or regexes, so this
+    reads every book. With a ShardedScan attached as ``manager.scan_engine``
+    the read is split across its worker processes; otherwise it runs here.
+
+    Args:
+        manager (BookManager): The book manager instance.
+        pattern (str): Text to find, or a regular expression when ``regex`` is set.
+        regex (bool): Match ``pattern`` as a regular expression against each field.
+        fields (Tuple[str, ...]): Any of "title" and "author".
+        limit (int, optional): Return at most this many, the earliest in catalog order.
+
+    Returns:
+        List[Book]: Matching books in catalog order.
+
+    Raises:
+        re.error: If ``regex`` is set and the pattern is invalid.
+    """
+    engine = manager.scan_engine
+
+    def compute():
+        if engine is not None:
+            # The workers scan their own copy, so changes only wait while the matches are resolved
+            isbns = engine.scan(pattern, regex, fields, limit)
+            with manager.lock.read():
+                return _books_for(manager, isbns)
+        search = compile_pattern(pattern, regex).search
+        books = []
+        with manager.lock.read():
+            for book in manager.books.values():
+                if any(search(normalize(getattr(book, field))) for field in fields):
+                    books.append(book)
+                    if len(books) == limit:
+                        break
+        return books
+    key = ("scan", pattern if regex else pattern.lower(), regex, tuple(fields), limit)
+    return list(_cached(manager, key, compute))
 
 
+@instrumented
 def search_by_isbn(manager: BookManager, isbn: str) -> Optional[Book]:
     """
     Search book by ISBN.
@@ -51,4 +208,5 @@ def search_by_isbn(manager: BookManager, isbn: str) -> Optional[Book]:
     Returns:
         Book if found, else None.
     """
-    return manager.books.get(isbn)
+    with manager.lock.read():
+        return manager.books.get(isbn)
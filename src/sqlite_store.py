@@ -0,0 +1,603 @@
+"""SQLite storage backend for the catalog, members and loans."""
+
+import contextlib
+import json
+import queue
+import sqlite3
+import threading
+from collections.abc import ItemsView, MutableMapping, ValuesView
+
+from book import Book
+from issue_return import Loan
+from member import Member
+from text_index import BM25Index, required_matches, tokenize, top_similar, trigrams
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    seq INTEGER PRIMARY KEY,
+    isbn TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    author TEXT NOT NULL,
+    copies INTEGER NOT NULL,
+    title_norm TEXT NOT NULL,
+    author_norm TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_books_title ON books (title_norm);
+CREATE INDEX IF NOT EXISTS idx_books_author ON books (author_norm);
+
+CREATE TABLE IF NOT EXISTS members (
+    seq INTEGER PRIMARY KEY,
+    member_id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    borrowed_books TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS loans (
+    loan_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    isbn TEXT NOT NULL,
+    member_id TEXT NOT NULL,
+    issue_day INTEGER NOT NULL,
+    due_day INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_loans_member ON loans (member_id, isbn);
+CREATE INDEX IF NOT EXISTS idx_loans_isbn ON loans (isbn);
+CREATE INDEX IF NOT EXISTS idx_loans_due ON loans (due_day);
+CREATE TABLE IF NOT EXISTS borrows (
+    isbn TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Trigram full-text index kept in sync with the books table by triggers.
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5 (
+    title_norm, author_norm,
+    content='books', content_rowid='seq', tokenize='trigram case_sensitive 1'
+);
+CREATE TRIGGER IF NOT EXISTS books_fts_insert AFTER INSERT ON books BEGIN
+    INSERT INTO books_fts (rowid, title_norm, author_norm)
+    VALUES (new.seq, new.title_norm, new.author_norm);
+END;
+CREATE TRIGGER IF NOT EXISTS books_fts_delete AFTER DELETE ON books BEGIN
+    INSERT INTO books_fts (books_fts, rowid, title_norm, author_norm)
+    VALUES ('delete', old.seq, old.title_norm, old.author_norm);
+END;
+CREATE TRIGGER IF NOT EXISTS books_fts_update AFTER UPDATE OF title_norm, author_norm ON books BEGIN
+    INSERT INTO books_fts (books_fts, rowid, title_norm, author_norm)
+    VALUES ('delete', old.seq, old.title_norm, old.author_norm);
+    INSERT INTO books_fts (rowid, title_norm, author_norm)
+    VALUES (new.seq, new.title_norm, new.author_norm);
+END;
+-- Per-column document counts of each trigram, for picking the rarest ones
+CREATE VIRTUAL TABLE IF NOT EXISTS books_fts_vocab USING fts5vocab (books_fts, 'col');
+
+-- Word index over title and author for BM25-ranked full-text search
+CREATE VIRTUAL TABLE IF NOT EXISTS books_text USING fts5 (
+    title, author, content='books', content_rowid='seq'
+);
+CREATE TRIGGER IF NOT EXISTS books_text_insert AFTER INSERT ON books BEGIN
+    INSERT INTO books_text (rowid, title, author) VALUES (new.seq, new.title, new.author);
+END;
+CREATE TRIGGER IF NOT EXISTS books_text_delete AFTER DELETE ON books BEGIN
+    INSERT INTO books_text (books_text, rowid, title, author)
+    VALUES ('delete', old.seq, old.title, old.author);
+END;
+CREATE TRIGGER IF NOT EXISTS books_text_update AFTER UPDATE OF title, author ON books BEGIN
+    INSERT INTO books_text (books_text, rowid, title, author)
+    VALUES ('delete', old.seq, old.title, old.author);
+    INSERT INTO books_text (rowid, title, author) VALUES (new.seq, new.title, new.author);
+END;
+"""
+
+
+class SQLiteStore:
+    """
+    SQLite database holding the catalog, member records and loans.
+
+    The store exposes ``books`` and ``members`` as mappings with the same shape
+    as the dictionaries BookManager and MemberModule use in memory, and ``loans``
+    with the LoanLedger interface IssueReturn uses, so the managers work
+    unchanged on top of it. Reads go through a small pool of connections; writes
+    go through one writer connection and are grouped into transactions inside
+    ``batch()``.
+
+    Attributes:
+        path (str): Path of the database file
+        books (BookTable): ISBN -> Book mapping
+        members (MemberTable): member_id -> member dict mapping
+        loans (SQLiteLoanLedger): Open loans and lifetime borrow counts, with the LoanLedger interface
+        title_index (SQLiteTextIndex): Substring index over titles
+        author_index (SQLiteTextIndex): Substring index over authors
+        text_index (SQLiteRankedIndex): BM25-ranked word index over title and author
+    """
+
+    def __init__(self, path, pool_size=4, batch_size=1000):
+        """
+        Open (or create) the database.
+
+        Args:
+            path (str): Path of the database file; must be a file, not ":memory:"
+            pool_size (int): Number of pooled read connections
+            batch_size (int): Writes per commit inside a batch
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self._write_lock = threading.RLock()
+        self._batch_depth = 0
+        self._batch_owner = None
+        self._pending = 0
+
+        self._writer = self._connect()
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        had_borrows = self._writer.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'borrows'").fetchone()
+        self._writer.executescript(SCHEMA)
+        if not had_borrows:  # Databases created before borrows were counted: start from open loans
+            self._writer.execute(
+                "INSERT OR IGNORE INTO borrows (isbn, count) SELECT isbn, COUNT(*) FROM loans GROUP BY isbn")
+        try:
+            had_text_index = self._writer.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'books_text'").fetchone()
+            self._writer.executescript(FTS_SCHEMA)
+            if not had_text_index:  # Databases created before the word index existed
+                self._writer.execute("INSERT INTO books_text (books_text) VALUES ('rebuild')")
+            self.has_fts = True
+        except sqlite3.OperationalError:  # SQLite built without FTS5 trigram support
+            self.has_fts = False
+
+        self._pool = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(self._connect())
+
+        self.books = BookTable(self)
+        self.members = MemberTable(self)
+        self.loans = SQLiteLoanLedger(self)
+        self.title_index = SQLiteTextIndex(self, "title_norm")
+        self.author_index = SQLiteTextIndex(self, "author_norm")
+        self.text_index = SQLiteRankedIndex(self)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Group writes into transactions until the block exits.
+
+        Writes from other threads wait until the batch ends. Reads made by the
+        batching thread see its own uncommitted writes.
+        """
+        with self._write_lock:
+            if self._batch_depth == 0:
+                self._writer.execute("BEGIN")
+                self._batch_owner = threading.get_ident()
+            self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                if self._batch_depth == 1:
+                    self._writer.execute("ROLLBACK")
+                    self._pending = 0
+                raise
+            else:
+                if self._batch_depth == 1:
+                    self._writer.execute("COMMIT")
+                    self._pending = 0
+            finally:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._batch_owner = None
+
+    def execute(self, sql, params=()):
+        """
+        Run a write statement on the writer connection.
+
+        Outside a batch the statement commits immediately; inside one, the
+        transaction is committed every ``batch_size`` writes.
+
+        Returns:
+            sqlite3.Cursor: Cursor of the executed statement
+        """
+        with self._write_lock:
+            cursor = self._writer.execute(sql, params)
+            if self._batch_depth:
+                self._pending += 1
+                if self._pending >= self.batch_size:
+                    self._writer.execute("COMMIT")
+                    self._writer.execute("BEGIN")
+                    self._pending = 0
+            return cursor
+
+    @contextlib.contextmanager
+    def reader(self):
+        """Borrow a read connection from the pool (or the writer, inside this thread's batch)."""
+        if self._batch_depth and self._batch_owner == threading.get_ident():
+            yield self._writer
+            return
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def query(self, sql, params=()):
+        """Run a read statement and return all rows."""
+        with self.reader() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def iter_query(self, sql, params=(), chunk_size=1000):
+        """Run a read statement and yield its rows in chunks."""
+        with self.reader() as conn:
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield from rows
+
+    def flush(self):
+        """Commit writes pending in an open batch."""
+        with self._write_lock:
+            if self._batch_depth and self._pending:
+                self._writer.execute("COMMIT")
+                self._writer.execute("BEGIN")
+                self._pending = 0
+
+    def close(self):
+        """Close the writer and every pooled connection."""
+        with self._write_lock:
+            self._writer.close()
+        while not self._pool.empty():
+            self._pool.get().close()
+
+
+class _Table(MutableMapping):
+    """Dict-like view of one table, keyed by a unique column and ordered by insertion."""
+
+    table = None
+    key_column = None
+    value_columns = ()
+
+    def __init__(self, store):
+        self.store = store
+        columns = ", ".join(self.value_columns)
+        self._select_one = (f"SELECT {columns} FROM {self.table} "
+                            f"WHERE {self.key_column} = ?")
+        self._select_all = (f"SELECT {self.key_column}, {columns} FROM {self.table} "
+                            f"ORDER BY seq")
+        updates = ", ".join(f"{c} = excluded.{c}" for c in self.value_columns)
+        self._upsert = (f"INSERT INTO {self.table} ({self.key_column}, {columns}) "
+                        f"VALUES ({', '.join('?' * (len(self.value_columns) + 1))}) "
+                        f"ON CONFLICT ({self.key_column}) DO UPDATE SET {updates}")
+
+    def _encode(self, value):
+        raise NotImplementedError
+
+    def _decode(self, key, row):
+        raise NotImplementedError
+
+    def __getitem__(self, key):
+        rows = self.store.query(self._select_one, (key,))
+        if not rows:
+            raise KeyError(key)
+        return self._decode(key, rows[0])
+
+    def __setitem__(self, key, value):
+        # Upsert keeps the row's seq, so overwriting a key keeps its position.
+        self.store.execute(self._upsert, (key, *self._encode(value)))
+
+    def __delitem__(self, key):
+        cursor = self.store.execute(
+            f"DELETE FROM {self.table} WHERE {self.key_column} = ?", (key,))
+        if cursor.rowcount == 0:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return bool(self.store.query(
+            f"SELECT 1 FROM {self.table} WHERE {self.key_column} = ?", (key,)))
+
+    def __iter__(self):
+        for row in self.store.iter_query(
+                f"SELECT {self.key_column} FROM {self.table} ORDER BY seq"):
+            yield row[0]
+
+    def __len__(self):
+        return self.store.query(f"SELECT COUNT(*) FROM {self.table}")[0][0]
+
+    def get_many(self, keys):
+        """Fetch several values in one query, in the order of ``keys``; missing keys are skipped."""
+        found = {}
+        keys = list(keys)
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self.store.query(
+                f"SELECT {self.key_column}, {', '.join(self.value_columns)} "
+                f"FROM {self.table} WHERE {self.key_column} IN "
+                f"({', '.join('?' * len(chunk))})", chunk)
+            for row in rows:
+                found[row[0]] = self._decode(row[0], row[1:])
+        return [found[key] for key in keys if key in found]
+
+    def values(self):
+        return _TableValues(self)
+
+    def items(self):
+        return _TableItems(self)
+
+    def _iter_items(self):
+        for row in self.store.iter_query(self._select_all):
+            yield row[0], self._decode(row[0], row[1:])
+
+
+class _TableValues(ValuesView):
+    def __iter__(self):
+        for _, value in self._mapping._iter_items():
+            yield value
+
+
+class _TableItems(ItemsView):
+    def __iter__(self):
+        yield from self._mapping._iter_items()
+
+
+class BookTable(_Table):
+    """ISBN -> Book mapping backed by the ``books`` table."""
+
+    table = "books"
+    key_column = "isbn"
+    value_columns = ("title", "author", "copies", "title_norm", "author_norm")
+
+    def totals(self):
+        """Return (number of titles, sum of copies) without loading any rows."""
+        count, copies = self.store.query("SELECT COUNT(*), TOTAL(copies) FROM books")[0]
+        return count, int(copies)
+
+    def _encode(self, book):
+        return book.title, book.author, book.copies, book.title.lower(), book.author.lower()
+
+    def _decode(self, isbn, row):
+        return Book(isbn, row[0], row[1], row[2])
+
+
+class MemberTable(_Table):
+    """member_id -> Member mapping backed by the ``members`` table."""
+
+    table = "members"
+    key_column = "member_id"
+    value_columns = ("name", "email", "phone", "borrowed_books")
+
+    def _encode(self, member):
+        # Borrowed books as a JSON object of ISBN -> copies held
+        return member.name, member.email, member.phone, json.dumps(member.borrowed or {})
+
+    def _decode(self, member_id, row):
+        # Rows written before the multiset format hold a JSON list of ISBNs;
+        # Counter accepts either.
+        return Member(member_id, row[0], row[1], row[2], json.loads(row[3]))
+
+
+class SQLiteLoanLedger:
+    """Open loans in the ``loans`` table, with the same interface as LoanLedger."""
+
+    _columns = "loan_id, isbn, member_id, issue_day, due_day"
+
+    def __init__(self, store):
+        self.store = store
+
+    def __len__(self):
+        return self.store.query("SELECT COUNT(*) FROM loans")[0][0]
+
+    def __iter__(self):
+        for row in self.store.iter_query(f"SELECT {self._columns} FROM loans ORDER BY loan_id"):
+            yield Loan(*row)
+
+    def open(self, isbn, member_id, issue_day, due_day, loan_id=None):
+        with self.store.batch():
+            cursor = self.store.execute(
+                "INSERT INTO loans (loan_id, isbn, member_id, issue_day, due_day) "
+                "VALUES (?, ?, ?, ?, ?)", (loan_id, isbn, member_id, issue_day, due_day))
+            self.store.execute(
+                "INSERT INTO borrows (isbn, count) VALUES (?, 1) "
+                "ON CONFLICT (isbn) DO UPDATE SET count = count + 1", (isbn,))
+        return Loan(cursor.lastrowid, isbn, member_id, issue_day, due_day)
+
+    def close(self, loan_id):
+        loan = self.get(loan_id)
+        if loan is not None:
+            self.store.execute("DELETE FROM loans WHERE loan_id = ?", (loan_id,))
+        return loan
+
+    def get(self, loan_id):
+        return self._one("WHERE loan_id = ?", (loan_id,))
+
+    def borrow_count(self, isbn):
+        rows = self.store.query("SELECT count FROM borrows WHERE isbn = ?", (isbn,))
+        return rows[0][0] if rows else 0
+
+    def borrow_counts(self):
+        return dict(self.store.iter_query("SELECT isbn, count FROM borrows"))
+
+    def find(self, member_id, isbn):
+        return self._one("WHERE member_id = ? AND isbn = ? ORDER BY loan_id LIMIT 1",
+                         (member_id, isbn))
+
+    def for_member(self, member_id):
+        return self._many("WHERE member_id = ? ORDER BY loan_id", (member_id,))
+
+    def for_isbn(self, isbn):
+        return self._many("WHERE isbn = ? ORDER BY loan_id", (isbn,))
+
+    def due_before(self, day):
+        return self._many("WHERE due_day < ? ORDER BY due_day, loan_id", (day,))
+
+    def count_due_between(self, start_day, end_day):
+        if start_day is None:
+            return self.store.query("SELECT COUNT(*) FROM loans WHERE due_day < ?",
+                                    (end_day,))[0][0]
+        return self.store.query(
+            "SELECT COUNT(*) FROM loans WHERE due_day >= ? AND due_day < ?",
+            (start_day, end_day))[0][0]
+
+    def _one(self, where, params):
+        rows = self.store.query(f"SELECT {self._columns} FROM loans {where}", params)
+        return Loan(*rows[0]) if rows else None
+
+    def _many(self, where, params):
+        return [Loan(*row) for row in
+                self.store.query(f"SELECT {self._columns} FROM loans {where}", params)]
+
+
+class SQLiteTextIndex:
+    """
+    Substring index over a normalized books column, with the TrigramIndex interface.
+
+    The books table and its triggers keep the index current, so ``add`` and
+    ``discard`` are no-ops. Queries of three or more characters use the FTS5
+    trigram table; every candidate is re-checked with ``instr`` so results match
+    a plain ``in`` test on the lowercased text.
+    """
+
+    def __init__(self, store, column):
+        self.store = store
+        self.column = column
+
+    def __len__(self):
+        return len(self.store.books)
+
+    def add(self, key, text):
+        pass
+
+    def discard(self, key):
+        pass
+
+    def search(self, query):
+        """
+        Find ISBNs whose normalized column contains the query, ignoring case.
+
+        Args:
+            query (str): Substring to look for
+
+        Returns:
+            list: Matching ISBNs in insertion order
+        """
+        query = query.lower()
+        if self.store.has_fts and len(query) >= 3:
+            phrase = '"' + query.replace('"', '""') + '"'
+            rows = self.store.query(
+                f"SELECT b.isbn FROM books_fts f JOIN books b ON b.seq = f.rowid "
+                f"WHERE f.{self.column} MATCH ? AND instr(b.{self.column}, ?) > 0 "
+                f"ORDER BY b.seq", (phrase, query))
+        else:
+            rows = self.store.query(
+                f"SELECT isbn FROM books WHERE instr({self.column}, ?) > 0 ORDER BY seq",
+                (query,))
+        return [row[0] for row in rows]
+
+    def similar(self, query, limit=10, min_score=0.5):
+        """
+        Find the ISBNs whose normalized column best matches the query, tolerating typos.
+
+        Scored like ``TrigramIndex.similar``. With FTS5, the vocabulary table
+        gives each query trigram's document count, and only books containing one
+        of the rarest trigrams are considered. Candidates are grouped by distinct
+        text, so each author is scored once however many titles they have.
+
+        Args:
+            query (str): Text to match, ignoring case
+            limit (int): Maximum number of results
+            min_score (float): Lowest score to return, between 0 and 1
+
+        Returns:
+            list: (ISBN, score) pairs, best first
+        """
+        query = query.lower()
+        grams = trigrams(query)
+        if not grams:
+            return [(isbn, 1.0) for isbn in self.search(query)[:limit]]
+
+        needed = required_matches(grams, min_score)
+        if self.store.has_fts:
+            ordered = sorted(grams)
+            counts = dict(self.store.query(
+                f"SELECT term, doc FROM books_fts_vocab WHERE col = ? AND term IN "
+                f"({', '.join('?' * len(ordered))})", [self.column] + ordered))
+            ranked = sorted(grams, key=lambda gram: counts.get(gram, 0))
+            rare = [gram for gram in ranked[:len(grams) - needed + 1] if gram in counts]
+            if not rare:
+                return []
+            terms = " OR ".join('"' + gram.replace('"', '""') + '"' for gram in rare)
+            rows = self.store.query(
+                f"SELECT b.{self.column}, MIN(b.seq) FROM books_fts f "
+                f"JOIN books b ON b.seq = f.rowid WHERE f.{self.column} MATCH ? "
+                f"GROUP BY b.{self.column}", (terms,))
+        else:
+            rows = self.store.query(f"SELECT {self.column}, MIN(seq) FROM books GROUP BY {self.column}")
+
+        scored = ((text, len(grams & trigrams(text)), len(text), seq) for text, seq in rows)
+        results = []
+        for text, score in top_similar([c for c in scored if c[1] >= needed], len(grams), limit):
+            isbns = self.store.query(
+                f"SELECT isbn FROM books WHERE {self.column} = ? ORDER BY seq LIMIT ?",
+                (text, limit - len(results)))
+            results.extend((row[0], score) for row in isbns)
+            if len(results) >= limit:
+                break
+        return results
+
+
+class SQLiteRankedIndex:
+    """
+    BM25-ranked full-text search over title and author, with the BM25Index interface.
+
+    The ``books_text`` FTS5 table is kept current by triggers and ranks with its
+    built-in ``bm25()``; SQLite selects the requested page itself. Without FTS5
+    each query indexes the catalog in memory, like the substring scan fallback.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def __len__(self):
+        return len(self.store.books)
+
+    def add(self, key, text):
+        pass
+
+    def discard(self, key, text):
+        pass
+
+    def search(self, query, limit=20, offset=0):
+        """
+        Rank ISBNs by BM25 relevance to any of the query's terms.
+
+        Args:
+            query (str): Words to look for, in any order
+            limit (int): Results per page
+            offset (int): Number of best results to skip
+
+        Returns:
+            tuple: (number of matching ISBNs, list of (ISBN, score) pairs for the page, best first)
+        """
+        terms = sorted(set(tokenize(query)))
+        if not terms:
+            return 0, []
+        if not self.store.has_fts:
+            return self._scan(query, limit, offset)
+        match = " OR ".join('"' + term.replace('"', '""') + '"' for term in terms)
+        total = self.store.query("SELECT COUNT(*) FROM books_text WHERE books_text MATCH ?",
+                                 (match,))[0][0]
+        # bm25() is lower-is-better; flip it so scores read like BM25Index's
+        rows = self.store.query(
+            "SELECT b.isbn, -t.rank FROM books_text t JOIN books b ON b.seq = t.rowid "
+            "WHERE books_text MATCH ? ORDER BY t.rank LIMIT ? OFFSET ?", (match, limit, offset))
+        return total, rows
+
+    def _scan(self, query, limit, offset):
+        index = BM25Index()
+        for isbn, title, author in self.store.iter_query("SELECT isbn, title, author FROM books"):
+            index.add(isbn, f"{title} {author}")
+        return index.search(query, limit, offset)
@@ -0,0 +1,116 @@
+"""Running library statistics maintained by the managers as they mutate."""
+
+import threading
+from datetime import date
+
+
+class LibraryStats:
+    """
+    Constant-time counters for the library overview.
+
+    ``attach`` takes one baseline scan of the managers; from then on BookManager,
+    MemberModule and IssueReturn update the counters in every mutation. Overdue
+    loans are tracked against a reference day: moving to a later day adds the
+    loans that fell due in between, using the ledger's due-date index. Updates
+    are thread-safe.
+
+    Attributes:
+        titles (int): Distinct ISBNs in the catalog
+        available_copies (int): Copies on the shelf (sum of Book.copies)
+        members (int): Registered members
+        active_loans (int): Open loans, one per copy lent
+        overdue_loans (int): Open loans due before ``overdue_day``
+        overdue_day (int): Ordinal day that ``overdue_loans`` refers to
+    """
+
+    def __init__(self):
+        """Initialize all counters to zero."""
+        self.titles = 0
+        self.available_copies = 0
+        self.members = 0
+        self.active_loans = 0
+        self.overdue_loans = 0
+        self.overdue_day = date.today().toordinal()
+        self._loans = None
+        self._lock = threading.Lock()
+
+    @property
+    def total_copies(self):
+        """Copies owned: on the shelf plus out on loan."""
+        return self.available_copies + self.active_loans
+
+    def attach(self, book_manager, member_module, issue_return):
+        """
+        Compute baseline counters and have the managers keep them current.
+
+        Args:
+            book_manager (BookManager): Catalog to count
+            member_module (MemberModule): Members to count
+            issue_return (IssueReturn): Loans to count
+        """
+        totals = getattr(book_manager.books, "totals", None)
+        if totals is not None:
+            self.titles, self.available_copies = totals()  # Aggregated by the store
+        else:
+            self.titles = 0
+            self.available_copies = 0
+            for book in book_manager.books.values():
+                self.titles += 1
+                self.available_copies += book.copies
+        self.members = len(member_module.members)
+        self._loans = issue_return.loans
+        self.active_loans = len(self._loans)
+        self.overdue_loans = self._loans.count_due_between(None, self.overdue_day)
+        book_manager.stats = self
+        member_module.stats = self
+        issue_return.stats = self
+
+    def add_titles(self, titles, copies):
+        """Record titles added (negative when removed) along with their shelf copies."""
+        with self._lock:
+            self.titles += titles
+            self.available_copies += copies
+
+    def add_copies(self, copies):
+        """Record shelf copies added to (or taken from) existing titles."""
+        with self._lock:
+            self.available_copies += copies
+
+    def add_members(self, count):
+        """Record members registered (negative when removed)."""
+        with self._lock:
+            self.members += count
+
+    def loan_opened(self, loan):
+        """Record a new loan."""
+        with self._lock:
+            self.active_loans += 1
+            if loan.due_day < self.overdue_day:
+                self.overdue_loans += 1
+
+    def loan_closed(self, loan):
+        """Record a returned loan."""
+        with self._lock:
+            self.active_loans -= 1
+            if loan.due_day < self.overdue_day:
+                self.overdue_loans -= 1
+
+    def overdue_as_of(self, day=None):
+        """
+        Return the number of open loans due before a day, advancing the reference day.
+
+        Args:
+            day (int, optional): Ordinal day; defaults to today
+
+        Returns:
+            int: Overdue loan count
+        """
+        if day is None:
+            day = date.today().toordinal()
+        with self._lock:
+            if day > self.overdue_day:
+                self.overdue_loans += self._loans.count_due_between(self.overdue_day, day)
+            elif day < self.overdue_day:
+                self.overdue_loans -= self._loans.count_due_between(day, self.overdue_day)
+            self.overdue_day = day
+            return self.overdue_loans
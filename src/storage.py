@@ -0,0 +1,57 @@
+"""Select and open the storage backend the library managers run on."""
+
+import os
+
+from book import BookManager
+from issue_return import IssueReturn
+from member import MemberModule
+from stats import LibraryStats
+
+DEFAULT_DATA_DIR = "library_data"
+
+
+def open_library(data_dir=None, backend=None):
+    """
+    Create the managers on top of a durable storage backend.
+
+    Args:
+        data_dir (str, optional): Directory for the data files; defaults to
+            $LMS_DATA_DIR or "library_data"
+        backend (str, optional): "journal" (in-memory state with an operation
+            journal, the default), "mapped" (the journal, with books read from a
+            memory-mapped catalog file) or "sqlite"; defaults to $LMS_STORAGE
+
+    Returns:
+        tuple: (store, BookManager, MemberModule, IssueReturn); ``store`` has
+            ``flush()`` and ``close()`` methods
+    """
+    data_dir = data_dir or os.environ.get("LMS_DATA_DIR", DEFAULT_DATA_DIR)
+    backend = backend or os.environ.get("LMS_STORAGE", "journal")
+
+    if backend == "sqlite":
+        from sqlite_store import SQLiteStore
+
+        os.makedirs(data_dir, exist_ok=True)
+        store = SQLiteStore(os.path.join(data_dir, "library.db"))
+        book_manager, member_module, issue_return = (
+            BookManager(store), MemberModule(store), IssueReturn(store))
+    elif backend == "journal":
+        from journal import LibraryJournal
+
+        book_manager, member_module, issue_return = BookManager(), MemberModule(), IssueReturn()
+        store = LibraryJournal(data_dir)
+        store.open(book_manager, member_module, issue_return)
+    elif backend == "mapped":
+        from journal import LibraryJournal
+        from mapped_catalog import CATALOG_FILE, MappedBookStore
+
+        os.makedirs(data_dir, exist_ok=True)
+        catalog = MappedBookStore(os.path.join(data_dir, CATALOG_FILE))
+        book_manager, member_module, issue_return = BookManager(catalog), MemberModule(), IssueReturn()
+        store = LibraryJournal(data_dir, catalog=catalog)
+        store.open(book_manager, member_module, issue_return)
+    else:
+        raise ValueError(f"Unknown storage backend: {backend}")
+
+    LibraryStats().attach(book_manager, member_module, issue_return)
+    return store, book_manager, member_module, issue_return
@@ -0,0 +1,339 @@
+"""Text indexes over book titles and authors: trigrams for substring and
+typo-tolerant search, tokens for BM25-ranked full-text search."""
+
+import heapq
+import math
+import re
+from collections import Counter
+from operator import itemgetter
+
+_TOKEN = re.compile(r"\w+")
+
+
+def trigrams(text):
+    """
+    Split normalized text into its set of overlapping three-character grams.
+
+    Args:
+        text (str): Normalized (lowercased) text
+
+    Returns:
+        set: Distinct trigrams of the text, empty if it is shorter than three characters
+    """
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def required_matches(grams, min_score):
+    """Return how many of the query's ``grams`` a text must share to score at least ``min_score``."""
+    return max(1, math.ceil(min_score * len(grams) - 1e-9))
+
+
+def top_similar(candidates, query_grams, limit):
+    """
+    Rank scored candidates for ``similar``.
+
+    Args:
+        candidates (iterable): (item, shared trigram count, text length, insertion order) tuples
+        query_grams (int): Number of distinct trigrams in the query
+        limit (int): Number of results to keep
+
+    Returns:
+        list: (item, score) pairs, best first; equal scores favour shorter, then older, texts
+    """
+    best = heapq.nsmallest(limit, candidates, key=lambda c: (-c[1], c[2], c[3]))
+    return [(item, shared / query_grams) for item, shared, _, _ in best]
+
+
+class TrigramIndex:
+    """
+    Incrementally maintained trigram index supporting case-insensitive substring
+    and typo-tolerant queries.
+
+    Text is normalized with ``str.lower`` once when it is added, so a query never
+    re-lowers the indexed values. Posting lists hold distinct normalized texts,
+    not keys: an author with hundreds of titles is indexed, matched and scored
+    once. Queries of three or more characters only look at texts that contain
+    every trigram of the query; the more trigrams a query has, the smaller that
+    candidate set becomes.
+
+    Attributes:
+        texts (Dict[str, str]): Normalized text for each key, in insertion order
+        keys_by_text (Dict[str, Union[str, List[str]]]): Key, or keys in insertion
+            order, indexed under each distinct normalized text
+        postings (Dict[str, Set[str]]): Distinct texts containing each trigram
+    """
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self.texts = {}
+        self.keys_by_text = {}
+        self.postings = {}
+        self._order = {}  # key -> insertion sequence, used to keep results stable
+        self._next_order = 0
+
+    def __len__(self):
+        return len(self.texts)
+
+    def add(self, key, text):
+        """
+        Index text under a key, replacing any text already indexed for it.
+
+        Args:
+            key (str): Identifier returned by searches (e.g. ISBN)
+            text (str): Raw text to index
+        """
+        if key in self.texts:
+            self.discard(key)
+        normalized = text.lower()
+        self.texts[key] = normalized
+        self._order[key] = self._next_order
+        self._next_order += 1
+
+        keys = self.keys_by_text.get(normalized)
+        if keys is not None:
+            # Most texts belong to one key; only shared texts pay for a list
+            if isinstance(keys, str):
+                self.keys_by_text[normalized] = [keys, key]
+            else:
+                keys.append(key)
+            return
+        self.keys_by_text[normalized] = key
+        for gram in trigrams(normalized):
+            texts = self.postings.get(gram)
+            if texts is None:
+                self.postings[gram] = {normalized}
+            else:
+                texts.add(normalized)
+
+    def discard(self, key):
+        """
+        Remove a key from the index if present.
+
+        Args:
+            key (str): Identifier to remove
+        """
+        normalized = self.texts.pop(key, None)
+        if normalized is None:
+            return
+        del self._order[key]
+        keys = self.keys_by_text[normalized]
+        if not isinstance(keys, str):
+            keys.remove(key)
+            if len(keys) == 1:
+                self.keys_by_text[normalized] = keys[0]
+            return
+        del self.keys_by_text[normalized]
+        for gram in trigrams(normalized):
+            texts = self.postings[gram]
+            texts.discard(normalized)
+            if not texts:
+                del self.postings[gram]
+
+    def _expand(self, texts):
+        """Yield the keys indexed under each of ``texts``, in turn."""
+        keys_by_text = self.keys_by_text
+        for text in texts:
+            keys = keys_by_text[text]
+            if isinstance(keys, str):
+                yield keys
+            else:
+                yield from keys
+
+    def search(self, query):
+        """
+        Find keys whose text contains the query, ignoring case.
+
+        Args:
+            query (str): Substring to look for
+
+        Returns:
+            list: Matching keys in the order they were added
+        """
+        query = query.lower()
+        grams = trigrams(query)
+        if not grams:
+            # Too short to use the postings; scan the distinct normalized texts instead.
+            matches = list(self._expand(text for text in self.keys_by_text if query in text))
+        else:
+            posting_lists = []
+            for gram in grams:
+                texts = self.postings.get(gram)
+                if not texts:
+                    return []
+                posting_lists.append(texts)
+            posting_lists.sort(key=len)
+
+            candidates = set(posting_lists[0])
+            for texts in posting_lists[1:]:
+                candidates &= texts
+                if not candidates:
+                    return []
+            matches = list(self._expand(text for text in candidates if query in text))
+        matches.sort(key=self._order.__getitem__)
+        return matches
+
+    def similar(self, query, limit=10, min_score=0.5):
+        """
+        Find the keys whose text best matches the query, tolerating typos and
+        variant spellings ("dostoevsky" finds "Dostoyevsky").
+
+        A text's score is the fraction of the query's trigrams it contains. A
+        text reaching ``min_score`` must share some number ``m`` of the query's
+        ``n`` trigrams, so it appears in at least one of the ``n - m + 1`` rarest
+        posting lists; only those lists are enumerated, and the common trigrams
+        are merely probed for the candidates they produced. Nothing is compared
+        against the whole catalog.
+
+        Args:
+            query (str): Text to match, ignoring case
+            limit (int): Maximum number of results
+            min_score (float): Lowest score to return, between 0 and 1
+
+        Returns:
+            list: (key, score) pairs, best first; keys sharing a text keep insertion order
+        """
+        query = query.lower()
+        grams = trigrams(query)
+        if not grams:
+            return [(key, 1.0) for key in self.search(query)[:limit]]
+
+        needed = required_matches(grams, min_score)
+        posting_lists = sorted((self.postings.get(gram, ()) for gram in grams), key=len)
+        rare = len(grams) - needed + 1
+        shared = Counter()
+        for texts in posting_lists[:rare]:
+            shared.update(texts)
+        for texts in posting_lists[rare:]:
+            for text in shared:
+                if text in texts:
+                    shared[text] += 1
+
+        order, keys_by_text = self._order, self.keys_by_text
+
+        def first_order(text):
+            keys = keys_by_text[text]
+            return order[keys if isinstance(keys, str) else keys[0]]
+
+        # Every text has at least one key, so the best ``limit`` texts are enough
+        best = top_similar(((text, count, len(text), first_order(text))
+                            for text, count in shared.items() if count >= needed),
+                           len(grams), limit)
+        results = []
+        for text, score in best:
+            results.extend((key, score) for key in self._expand((text,)))
+            if len(results) >= limit:
+                break
+        return results[:limit]
+
+
+def tokenize(text):
+    """
+    Split text into lowercased word tokens.
+
+    Args:
+        text (str): Raw text
+
+    Returns:
+        list: Tokens in order, with repeats
+    """
+    return _TOKEN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Incrementally maintained inverted index of word tokens with Okapi BM25 ranking.
+
+    A query only touches the postings of its own terms, so its cost grows with
+    how many documents contain those terms, not with the size of the catalog.
+    Terms are not stored per key, so removing a key takes the text it was
+    indexed with.
+
+    Attributes:
+        postings (Dict[str, Dict[str, int]]): Term frequency of each term, by key
+        lengths (Dict[str, int]): Token count of each key's text
+        k1 (float): Term-frequency saturation
+        b (float): Document-length normalization, between 0 and 1
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        """Initialize an empty index with the usual BM25 parameters."""
+        self.postings = {}
+        self.lengths = {}
+        self.k1 = k1
+        self.b = b
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def add(self, key, text):
+        """
+        Index text under a key that is not indexed yet.
+
+        Args:
+            key (str): Identifier returned by searches (e.g. ISBN)
+            text (str): Raw text to index, e.g. title and author together
+        """
+        tokens = tokenize(text)
+        self.lengths[key] = len(tokens)
+        self._total_length += len(tokens)
+        postings = self.postings
+        for term in tokens:
+            keys = postings.get(term)
+            if keys is None:
+                postings[term] = {key: 1}
+            else:
+                keys[key] = keys.get(key, 0) + 1
+
+    def discard(self, key, text):
+        """
+        Remove a key from the index if present.
+
+        Args:
+            key (str): Identifier to remove
+            text (str): The text it was indexed with
+        """
+        length = self.lengths.pop(key, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for term in set(tokenize(text)):
+            keys = self.postings.get(term)
+            if keys is not None and keys.pop(key, None) is not None and not keys:
+                del self.postings[term]
+
+    def search(self, query, limit=20, offset=0):
+        """
+        Rank keys by BM25 relevance to any of the query's terms.
+
+        Scores are accumulated over the postings of each query term, then the
+        ``offset + limit`` best are picked with a heap rather than sorting every
+        match.
+
+        Args:
+            query (str): Words to look for, in any order
+            limit (int): Results per page
+            offset (int): Number of best results to skip
+
+        Returns:
+            tuple: (number of matching keys, list of (key, score) pairs for the page, best first)
+        """
+        count = len(self.lengths)
+        if not count:
+            return 0, []
+        k1, b = self.k1, self.b
+        average = self._total_length / count or 1
+        lengths = self.lengths
+        scores = {}
+        for term in set(tokenize(query)):
+            keys = self.postings.get(term)
+            if not keys:
+                continue
+            idf = math.log(1 + (count - len(keys) + 0.5) / (len(keys) + 0.5))
+            base = k1 * (1 - b)
+            per_length = k1 * b / average
+            get = scores.get
+            for key, tf in keys.items():
+                scores[key] = get(key, 0.0) + idf * tf * (k1 + 1) / (tf + base + per_length * lengths[key])
+        page = heapq.nlargest(offset + limit, scores.items(), key=itemgetter(1))[offset:]
+        return len(scores), page
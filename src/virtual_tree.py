@@ -0,0 +1,164 @@
+"""Virtualized Treeview that only creates rows around the visible part of a long list."""
+
+from tkinter import ttk
+
+
+class VirtualTreeview:
+    """
+    A ttk.Treeview over an ordered list of keys that materializes a sliding window of rows.
+
+    Only ``window`` rows exist in the Treeview at a time. The scrollbar maps to the
+    whole list; scrolling near either edge of the window slides it and pages rows
+    in and out. Mutations (``insert``, ``refresh``, ``delete``) touch only the
+    affected row instead of rebuilding the list. Each row's item id is its key.
+
+    Attributes:
+        tree (ttk.Treeview): The underlying Treeview widget
+        keys (list): Keys of every row, in display order
+    """
+
+    def __init__(self, parent, columns, headings, row_values, window=200, margin=50):
+        """
+        Create the Treeview and its scrollbar inside ``parent``.
+
+        Args:
+            parent: Container widget; the tree and scrollbar are packed into it
+            columns (tuple): Column identifiers
+            headings (tuple): Heading text for each column
+            row_values (callable): Returns the column values for a key
+            window (int): Number of rows kept materialized
+            margin (int): Rows from either window edge at which the window slides
+        """
+        self.tree = ttk.Treeview(parent, columns=columns, show="headings")
+        for column, heading in zip(columns, headings):
+            self.tree.heading(column, text=heading)
+        self.tree.pack(side="left", fill="both", expand=True)
+
+        self.scrollbar = ttk.Scrollbar(parent, orient="vertical",
+                                       command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.tree.configure(yscrollcommand=self._on_tree_scroll)
+
+        self.row_values = row_values
+        self.window = window
+        self.margin = margin
+        self.keys = []
+        self._start = 0  # Index in keys of the first materialized row
+        self._sliding = False
+
+    def set_keys(self, keys):
+        """
+        Replace every row, e.g. when a screen opens or new search results arrive.
+
+        Args:
+            keys (Iterable): Keys of the rows to show, in display order
+        """
+        self.keys = list(keys)
+        self._start = 0
+        self._sync()
+        self.tree.yview_moveto(0)
+
+    def insert(self, key, index=None):
+        """
+        Add a row without touching the others.
+
+        Args:
+            key: Key of the new row
+            index (int, optional): Position in the list; appended if omitted
+        """
+        if index is None:
+            index = len(self.keys)
+        self.keys.insert(index, key)
+        if index < self._start:
+            self._start += 1  # Keep the same rows on screen
+        self._sync()
+
+    def refresh(self, key):
+        """Redraw one row after its values changed; a no-op if it is not materialized."""
+        if self.tree.exists(key):
+            self.tree.item(key, values=self.row_values(key))
+
+    def delete(self, key):
+        """Remove one row if present."""
+        try:
+            index = self.keys.index(key)
+        except ValueError:
+            return
+        del self.keys[index]
+        if index < self._start:
+            self._start -= 1
+        if self.tree.exists(key):
+            self.tree.delete(key)
+        self._sync()
+
+    def selected_key(self):
+        """Return the key of the first selected row, or None."""
+        selected = self.tree.selection()
+        return selected[0] if selected else None
+
+    def _sync(self):
+        """Make the Treeview hold exactly keys[start:start + window], changing only what differs."""
+        total = len(self.keys)
+        self._start = max(0, min(self._start, total - self.window))
+        wanted = self.keys[self._start:self._start + self.window]
+        wanted_set = set(wanted)
+
+        present = set()
+        for iid in self.tree.get_children():
+            if iid in wanted_set:
+                present.add(iid)
+            else:
+                self.tree.delete(iid)
+        # Rows still present are already in list order, so inserting each missing
+        # key at its window position rebuilds the window in order.
+        for position, key in enumerate(wanted):
+            if key not in present:
+                self.tree.insert("", position, iid=key, values=self.row_values(key))
+        self._update_scrollbar(*self.tree.yview())
+
+    def _update_scrollbar(self, first, last):
+        total = len(self.keys)
+        if not total:
+            self.scrollbar.set(0, 1)
+            return
+        shown = len(self.tree.get_children())
+        self.scrollbar.set((self._start + float(first) * shown) / total,
+                           (self._start + float(last) * shown) / total)
+
+    def _on_tree_scroll(self, first, last):
+        """Track the Treeview's own scrolling and slide the window near its edges."""
+        self._update_scrollbar(first, last)
+        if self._sliding:
+            return
+        shown = len(self.tree.get_children())
+        if not shown:
+            return
+        top = float(first) * shown
+        bottom = float(last) * shown
+        near_end = bottom > shown - self.margin and self._start + shown < len(self.keys)
+        near_start = top < self.margin and self._start > 0
+        if near_end or near_start:
+            self._slide_to(self._start + int(top))
+
+    def _on_scrollbar(self, *args):
+        """Handle scrollbar drags and clicks in terms of the whole list."""
+        if args[0] == "moveto":
+            target = int(float(args[1]) * len(self.keys))
+            shown = len(self.tree.get_children())
+            if self._start <= target < self._start + shown - self.margin or not shown:
+                self.tree.yview_moveto((target - self._start) / max(shown, 1))
+            else:
+                self._slide_to(target)
+        else:
+            self.tree.yview(*args)
+
+    def _slide_to(self, top_index):
+        """Re-center the window so the row at ``top_index`` is at the top of the view."""
+        self._sliding = True
+        try:
+            self._start = top_index - self.margin
+            self._sync()
+            shown = len(self.tree.get_children())
+            self.tree.yview_moveto((top_index - self._start) / max(shown, 1))
+        finally:
+            self._sliding = False
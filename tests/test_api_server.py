@@ -0,0 +1,143 @@
+import asyncio
+import threading
+
+import pytest
+
+from api_server import HTTPError, HTTPServer, LibraryAPI
+from book import Book, BookManager
+from issue_return import IssueReturn
+from member import MemberModule
+
+
+@pytest.fixture
+def api():
+    return LibraryAPI(BookManager(), MemberModule(), IssueReturn())
+
+
+def status(api, method, target, body=None):
+    try:
+        return api.dispatch(method, target, body)[0]
+    except HTTPError as error:
+        return error.status
+
+
+@pytest.mark.parametrize("body", [
+    {"isbn": "1", "title": 5, "author": "A", "copies": 1},
+    {"isbn": 1, "title": "T", "author": "A", "copies": 1},
+    {"isbn": "1", "title": "T", "author": ["A"], "copies": 1},
+    {"isbn": "1", "title": "T", "author": "A", "copies": -5},
+    {"isbn": "1", "title": "T", "author": "A", "copies": "3"},
+    {"isbn": "1", "title": "T", "author": "A", "copies": True},
+])
+def test_add_book_rejects_wrong_types(api, body):
+    assert status(api, "POST", "/books", body) == 400
+    assert "1" not in api.book_manager.books
+
+
+def test_add_book(api):
+    assert status(api, "POST", "/books", {"isbn": "1", "title": "T", "author": "A", "copies": 0}) == 201
+    assert api.book_manager.books["1"].copies == 0
+
+
+@pytest.mark.parametrize("field", ["member_id", "name", "email", "phone"])
+def test_register_member_rejects_non_strings(api, field):
+    body = {"member_id": "m1", "name": "N", "email": "n@example.com", "phone": "1"}
+    body[field] = 7
+    assert status(api, "POST", "/members", body) == 400
+    assert status(api, "GET", "/members?q=n") == 200
+
+
+def test_update_member_rejects_non_strings(api):
+    api.member_module.register_member("m1", "N", "n@example.com", "1")
+    assert status(api, "PATCH", "/members/m1", {"email": 3}) == 400
+    assert status(api, "PATCH", "/members/m1", ["x"]) == 400
+
+
+def test_book_manager_does_not_publish_a_book_it_cannot_index():
+    manager = BookManager()
+    with pytest.raises(AttributeError):
+        manager.add_book(Book("1", 5, "A", 1))
+    assert "1" not in manager.books
+
+
+async def exchange_on(address, request):
+    reader, writer = await asyncio.open_connection(*address)
+    writer.write(request)
+    await writer.drain()
+    response = await asyncio.wait_for(reader.read(), 5)
+    writer.close()
+    return response
+
+
+async def exchange(api, request):
+    server = await asyncio.start_server(HTTPServer(api).handle_connection, "127.0.0.1", 0)
+    async with server:
+        return await exchange_on(server.sockets[0].getsockname()[:2], request)
+
+
+@pytest.mark.parametrize("length", [b"abc", b"-1"])
+def test_bad_content_length_gets_400(api, length):
+    request = b"POST /books HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n{}"
+    response = asyncio.run(exchange(api, request))
+    assert response.startswith(b"HTTP/1.1 400 ")
+    assert b"Content-Length" in response
+
+
+class BlockedScan:
+    """Scan engine whose scans wait until released, standing in for busy workers."""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def scan(self, pattern, regex=False, fields=(), limit=None):
+        assert self.release.wait(5)
+        return ["1"]
+
+
+def test_sharded_scan_does_not_block_other_requests(api):
+    api.book_manager.add_book(Book("1", "Python", "A", 1))
+    api.book_manager.scan_engine = engine = BlockedScan()
+
+    async def run():
+        server = await asyncio.start_server(HTTPServer(api).handle_connection, "127.0.0.1", 0)
+        async with server:
+            address = server.sockets[0].getsockname()[:2]
+            scan_reader, scan_writer = await asyncio.open_connection(*address)
+            scan_writer.write(b"GET /search?pattern=py HTTP/1.1\r\nConnection: close\r\n\r\n")
+            await scan_writer.drain()
+            other = await exchange_on(address, b"GET /books/1 HTTP/1.1\r\nConnection: close\r\n\r\n")
+            engine.release.set()
+            scanned = await asyncio.wait_for(scan_reader.read(), 5)
+            scan_writer.close()
+            return other, scanned
+
+    other, scanned = asyncio.run(run())
+    assert other.startswith(b"HTTP/1.1 200 ")
+    assert scanned.startswith(b"HTTP/1.1 200 ") and b'"isbn": "1"' in scanned
+
+
+
+def test_scan_without_engine_runs_off_the_loop(api):
+    api.book_manager.add_book(Book("1", "Python", "A", 1))
+    response = asyncio.run(exchange(api, b"GET /search?pattern=yth HTTP/1.1\r\nConnection: close\r\n\r\n"))
+    assert response.startswith(b"HTTP/1.1 200 ") and b'"isbn": "1"' in response
+
+
+def test_long_scan_pattern_gets_400(api):
+    assert status(api, "GET", "/search?pattern=" + "a" * 257) == 400
+    scan = api.dispatch("GET", "/search?pattern=" + "a" * 256, None)
+    assert asyncio.iscoroutine(scan)
+    scan.close()
+
+
+@pytest.mark.parametrize("atomic", ["false", "0", 1])
+@pytest.mark.parametrize("target", ["/loans/batch", "/returns/batch"])
+def test_batch_atomic_must_be_a_boolean(api, target, atomic):
+    api.member_module.register_member("m1", "N", "n@example.com", "1")
+    assert status(api, "POST", target, {"member_id": "m1", "isbns": ["1"], "atomic": atomic}) == 400
+
+
+@pytest.mark.parametrize("atomic", [True, False, None])
+def test_batch_accepts_boolean_atomic(api, atomic):
+    api.member_module.register_member("m1", "N", "n@example.com", "1")
+    assert status(api, "POST", "/returns/batch", {"member_id": "m1", "isbns": ["1"], "atomic": atomic}) == 200
@@ -0,0 +1,75 @@
+import pytest
+
+import authent
+from authent import CredentialStore
+
+
+@pytest.fixture
+def hashes(monkeypatch):
+    """Count password hashes, made cheap for the test."""
+    calls = []
+    real = authent.hash_password
+    monkeypatch.setattr(authent, "SCRYPT_N", 2 ** 4)
+
+    def counting(password, salt):
+        calls.append(password)
+        return real(password, salt)
+    monkeypatch.setattr(authent, "hash_password", counting)
+    return calls
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(authent.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_seed_accounts_log_in():
+    assert authent.authenticate_user("john@example.com", "", "password123")
+    assert authent.authenticate_user("", "jane_smith", "secure456")
+    assert not authent.authenticate_user("", "jane_smith", "password123")
+
+
+def test_cached_session_skips_the_hash_until_it_expires(hashes, clock):
+    store = CredentialStore(session_cache_size=4, session_ttl=60)
+    store.add_user("ann", "ann@example.com", "pw")
+    assert store.verify("ann@example.com", "", "pw")
+    hashes.clear()
+    clock[0] += 59
+    assert store.verify("", "ann", "pw")  # Same account by username hits the cache
+    assert hashes == []
+    clock[0] += 2
+    assert store.verify("ann@example.com", "", "pw")
+    assert hashes == ["pw"]
+
+
+def test_wrong_password_is_never_cached(hashes, clock):
+    store = CredentialStore(session_cache_size=4)
+    store.add_user("ann", "ann@example.com", "pw")
+    hashes.clear()
+    assert not store.verify("ann@example.com", "", "nope")
+    assert not store.verify("ann@example.com", "", "nope")
+    assert hashes == ["nope", "nope"]
+
+
+def test_session_cache_is_bounded(hashes, clock):
+    store = CredentialStore(session_cache_size=1)
+    store.add_user("ann", "ann@example.com", "pw")
+    store.add_user("bob", "bob@example.com", "pw2")
+    assert store.verify("", "ann", "pw")
+    assert store.verify("", "bob", "pw2")  # Evicts ann's session
+    hashes.clear()
+    assert store.verify("", "ann", "pw")
+    assert hashes == ["pw"]
+
+
+def test_unknown_account_still_hashes(hashes):
+    store = CredentialStore(session_cache_size=4)
+    store.add_user("ann", "ann@example.com", "pw")
+    hashes.clear()
+    # An unknown account costs one hash, like a wrong password, so timing does not reveal it
+    assert not store.verify("nobody@example.com", "", "pw")
+    assert hashes == ["pw"]
+    assert not store.verify("", "ann", "wrong")
+    assert hashes == ["pw", "wrong"]
@@ -0,0 +1,58 @@
+import threading
+
+import pytest
+
+from autocomplete import Autocomplete
+from book import Book
+from storage import open_library
+
+QUERIES = ["py", "python b", "war", "tol", "new", "zzz"]
+
+
+@pytest.fixture(params=["journal", "mapped"])
+def library(request, tmp_path):
+    store, book_manager, _, issue_return = open_library(str(tmp_path / "lib"), request.param)
+    book_manager.add_books([Book("1", "Python Basics", "Ann Lee", 1), Book("2", "War and Peace", "Leo Tolstoy", 1),
+                            Book("3", "Python Cookbook", "Ann Lee", 1), Book("4", "Warlock", "Zed", 1)])
+    issue_return.issue_book("m1", "2")
+    if request.param == "mapped":
+        store.snapshot()  # Most of the books come from the mapped file
+    yield book_manager, issue_return
+    store.close()
+
+
+def expected(book_manager, issue_return):
+    fresh = Autocomplete()
+    fresh.book_manager, fresh.loans = book_manager, issue_return.loans
+    fresh._build(book_manager.books.values(), issue_return.loans.borrow_counts())
+    return {query: fresh.suggest(query) for query in QUERIES}
+
+
+def test_background_build_applies_changes_made_meanwhile(library):
+    book_manager, issue_return = library
+    suggestions = Autocomplete()
+    with suggestions._lock:  # Holds the build back until the changes below are queued
+        suggestions.attach(book_manager, issue_return, background=True)
+        assert suggestions.suggest("py") == []
+        book_manager.add_book(Book("5", "New Python", "Ann Lee", 1))
+        issue_return.issue_book("m1", "5")
+        issue_return.issue_book("m2", "5")
+        book_manager.remove_book("4")
+        issue_return.issue_book("m1", "1")
+        assert not suggestions.ready
+    for _ in range(500):
+        if suggestions.ready:
+            break
+        threading.Event().wait(0.01)
+    assert suggestions.ready
+    assert {query: suggestions.suggest(query) for query in QUERIES} == expected(book_manager, issue_return)
+    assert [s.text for s in suggestions.suggest("py")][0] == "New Python"
+
+
+def test_changes_after_the_build_apply_directly(library):
+    book_manager, issue_return = library
+    suggestions = Autocomplete()
+    suggestions.attach(book_manager, issue_return)
+    book_manager.add_book(Book("6", "Warriors", "Zed", 1))
+    book_manager.remove_book("1")
+    assert {query: suggestions.suggest(query) for query in QUERIES} == expected(book_manager, issue_return)
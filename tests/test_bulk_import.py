@@ -0,0 +1,18 @@
+from bulk_import import parse_books, read_records
+
+
+def test_csv_with_byte_order_mark(tmp_path):
+    path = tmp_path / "books.csv"
+    path.write_bytes("isbn,title,author,copies\r\n1,Émile,Zola,2\r\n".encode("utf-8-sig"))
+    rejected = []
+    books = list(parse_books(read_records(str(path)), rejected))
+    assert rejected == []
+    assert [(book.isbn, book.title, book.copies) for book in books] == [("1", "Émile", 2)]
+
+
+def test_jsonl_with_byte_order_mark(tmp_path):
+    path = tmp_path / "books.jsonl"
+    path.write_bytes('{"isbn": "1", "title": "T", "author": "A", "copies": 1}\n'.encode("utf-8-sig"))
+    rejected = []
+    assert [book.isbn for book in parse_books(read_records(str(path)), rejected)] == ["1"]
+    assert rejected == []
@@ -0,0 +1,78 @@
+import pytest
+
+from book import Book, BookManager
+from circulation import Circulation, CirculationError
+from issue_return import IssueReturn
+from member import MemberModule
+
+
+@pytest.fixture
+def circulation():
+    book_manager = BookManager()
+    book_manager.add_book(Book("1", "One", "A", 1))
+    book_manager.add_book(Book("2", "Two", "B", 2))
+    member_module = MemberModule()
+    member_module.register_member("m1", "Ann", "ann@example.com", "555")
+    return Circulation(book_manager, member_module, IssueReturn())
+
+
+def outcome(report):
+    return [(item.isbn, item.reason or "ok") for item in report.items]
+
+
+def copies(circulation):
+    return {isbn: book.copies for isbn, book in circulation.book_manager.books.items()}
+
+
+def test_atomic_checkout_applies_nothing_when_an_item_is_refused(circulation):
+    report = circulation.checkout_batch("m1", ["1", "1", "2", "x"], atomic=True)
+    assert outcome(report) == [("1", "skipped"), ("1", "no_copies"), ("2", "skipped"),
+                               ("x", "book_not_found")]
+    assert copies(circulation) == {"1": 1, "2": 2}
+    assert circulation.member_module.borrowed_count("m1", "1") == 0
+    assert list(circulation.issue_return.loans) == []
+
+
+def test_partial_checkout_applies_the_valid_items(circulation):
+    report = circulation.checkout_batch("m1", ["1", "1", "2", "x"])
+    # The second scan of "1" counts the copy claimed by the first
+    assert outcome(report) == [("1", "ok"), ("1", "no_copies"), ("2", "ok"),
+                               ("x", "book_not_found")]
+    assert [item.loan.isbn for item in report.succeeded] == ["1", "2"]
+    assert copies(circulation) == {"1": 0, "2": 1}
+    assert circulation.member_module.borrowed_count("m1", "1") == 1
+    assert circulation.member_module.borrowed_count("m1", "2") == 1
+    assert report.summary().splitlines()[0] == "2 of 4 items processed for member m1."
+
+
+def test_checkout_batch_for_an_unknown_member(circulation):
+    report = circulation.checkout_batch("nobody", ["1", "2"])
+    assert outcome(report) == [("1", "member_not_found"), ("2", "member_not_found")]
+    assert copies(circulation) == {"1": 1, "2": 2}
+
+
+def test_checkin_batch_counts_earlier_scans(circulation):
+    circulation.checkout_batch("m1", ["2", "2"])
+    report = circulation.checkin_batch("m1", ["2", "2", "2", "1"])
+    assert outcome(report) == [("2", "ok"), ("2", "ok"), ("2", "not_borrowed"),
+                               ("1", "not_borrowed")]
+    assert copies(circulation) == {"1": 1, "2": 2}
+    assert circulation.member_module.borrowed_count("m1", "2") == 0
+
+
+def test_atomic_checkin_applies_nothing_when_an_item_is_refused(circulation):
+    circulation.checkout("m1", "2")
+    report = circulation.checkin_batch("m1", ["2", "x"], atomic=True)
+    assert outcome(report) == [("2", "skipped"), ("x", "book_not_found")]
+    assert copies(circulation) == {"1": 1, "2": 1}
+    assert circulation.member_module.borrowed_count("m1", "2") == 1
+
+
+def test_single_checkout_raises_with_a_reason(circulation):
+    circulation.checkout("m1", "1")
+    with pytest.raises(CirculationError) as error:
+        circulation.checkout("m1", "1")
+    assert error.value.reason == CirculationError.NO_COPIES
+    with pytest.raises(CirculationError) as error:
+        circulation.checkin("m1", "2")
+    assert error.value.reason == CirculationError.NOT_BORROWED
@@ -0,0 +1,180 @@
+import json
+import logging
+import shutil
+
+import pytest
+
+from book import Book, BookManager
+from issue_return import IssueReturn
+from journal import LibraryJournal
+from member import MemberModule
+from storage import open_library
+
+
+def state(book_manager, member_module, issue_return):
+    return ([(book.isbn, book.title, book.author, book.copies) for book in book_manager.books.values()],
+            [(m.member_id, m.name, m.email, m.phone) for m in member_module.list_members()],
+            sorted(tuple(loan) for loan in issue_return.loans))
+
+
+def populate(book_manager, member_module, issue_return):
+    book_manager.add_books([Book(str(index), f"Title {index}", "Author", 2) for index in range(5)])
+    book_manager.remove_book("3")
+    book_manager.adjust_copies("1", -1)
+    member_module.register_member("m1", "Ann", "ann@example.com", "555")
+    member_module.update_member("m1", name="Ann Lee")
+    issue_return.issue_book("m1", "1", "2024-01-02")
+
+
+@pytest.mark.parametrize("backend", ["journal", "mapped"])
+def test_replays_records_after_a_crash(tmp_path, backend):
+    store, *managers = open_library(str(tmp_path), backend)
+    populate(*managers)
+    store.flush()  # Crash: never closed or snapshotted
+    before = state(*managers)
+
+    store, *managers = open_library(str(tmp_path), backend)
+    assert state(*managers) == before
+    store.close()
+
+
+def test_torn_tail_is_ignored_and_truncated(tmp_path):
+    store, *managers = open_library(str(tmp_path), "journal")
+    populate(*managers)
+    store.flush()
+    before = state(*managers)
+    journal_log = tmp_path / "journal.log"
+    good = journal_log.read_bytes()
+    with open(journal_log, "ab") as f:
+        f.write(b'{"seq": 99, "op": "add_bo')
+
+    store, *managers = open_library(str(tmp_path), "journal")
+    assert state(*managers) == before
+    assert journal_log.read_bytes() == good
+    assert not list(tmp_path.glob("journal.log.corrupt-*"))  # A torn write is not set aside
+    managers[0].add_book(Book("9", "After", "Author", 1))
+    store.close()
+
+    store, *managers = open_library(str(tmp_path), "journal")
+    assert "9" in managers[0].books
+    store.close()
+
+
+def test_corrupt_line_stops_replay_and_keeps_the_rest(tmp_path, caplog):
+    store, book_manager, _, _ = open_library(str(tmp_path), "journal")
+    book_manager.add_book(Book("1", "T", "A", 1))
+    store.close()
+    good = (tmp_path / "journal.log").read_bytes()
+    tail = (b"not json\n"
+            + json.dumps({"seq": 2, "op": "add_book", "args": ["2", "U", "B", 1]}).encode() + b"\n")
+    with open(tmp_path / "journal.log", "ab") as f:
+        f.write(tail)
+
+    with caplog.at_level(logging.ERROR, logger="lms.journal"):
+        store, book_manager, _, _ = open_library(str(tmp_path), "journal")
+    assert list(book_manager.books) == ["1"]
+    assert f"byte {len(good)}" in caplog.text
+    # The unreadable record and everything after it are moved aside, not deleted
+    assert (tmp_path / "journal.log.corrupt-1").read_bytes() == tail
+    assert (tmp_path / "journal.log").read_bytes() == good
+    book_manager.add_book(Book("3", "V", "C", 1))
+    store.close()
+
+    store, book_manager, _, _ = open_library(str(tmp_path), "journal")
+    assert list(book_manager.books) == ["1", "3"]
+    store.close()
+
+
+def test_records_already_in_the_snapshot_are_skipped(tmp_path):
+    store, *managers = open_library(str(tmp_path), "journal")
+    populate(*managers)
+    store.flush()
+    old_log = (tmp_path / "journal.log").read_bytes()
+    store.snapshot()
+    before = state(*managers)
+    store.close()
+    # Crash between replacing the snapshot and truncating the journal
+    (tmp_path / "journal.log").write_bytes(old_log)
+
+    store, *managers = open_library(str(tmp_path), "journal")
+    assert state(*managers) == before
+    store.close()
+
+
+def test_crash_between_catalog_and_json_snapshot(tmp_path):
+    store, *managers = open_library(str(tmp_path), "mapped")
+    populate(*managers)
+    store.snapshot()
+    book_manager, member_module, _ = managers
+    book_manager.adjust_copies("0", 5)
+    book_manager.add_book(Book("7", "New", "Author", 1))
+    member_module.register_member("m2", "Bo", "bo@example.com", "556")
+    store.flush()
+    store.catalog.write(store.seq)  # The catalog is written, then the process dies
+    before = state(*managers)
+
+    store, *managers = open_library(str(tmp_path), "mapped")
+    assert state(*managers) == before
+    assert managers[0].books["0"].copies == 7
+    store.close()
+
+    # The same files opened by the journal backend must not apply the book records twice either
+    store, *managers = open_library(str(tmp_path), "journal")
+    assert state(*managers) == before
+    store.close()
+
+
+def test_migrates_between_journal_and_mapped(tmp_path):
+    store, *managers = open_library(str(tmp_path), "journal")
+    populate(*managers)
+    store.snapshot()
+    managers[0].add_book(Book("8", "Tail", "Author", 1))
+    store.close()
+    before = state(*managers)
+
+    store, *managers = open_library(str(tmp_path), "mapped")
+    assert state(*managers) == before
+    store.snapshot()
+    assert "books" not in json.loads((tmp_path / "snapshot.json").read_text())
+    managers[0].remove_book("0")
+    store.close()
+    before = state(*managers)
+
+    store, *managers = open_library(str(tmp_path), "journal")
+    assert state(*managers) == before
+    store.snapshot()
+    managers[0].add_book(Book("0", "Back", "Author", 1))
+    store.close()
+    before = state(*managers)
+
+    # The catalog file left from the first mapped run is superseded by the JSON books
+    store, *managers = open_library(str(tmp_path), "mapped")
+    assert state(*managers) == before
+    store.close()
+
+
+def test_snapshot_policy_compacts_the_journal(tmp_path):
+    managers = BookManager(), MemberModule(), IssueReturn()
+    journal = LibraryJournal(str(tmp_path), snapshot_every=10)
+    journal.open(*managers)
+    managers[0].add_books([Book(str(index), "T", "A", 1) for index in range(25)])
+    assert (tmp_path / "snapshot.json").exists()
+    assert json.loads((tmp_path / "snapshot.json").read_text())["seq"] > 0
+    journal.close()
+    tail = (tmp_path / "journal.log").read_text().splitlines()
+    assert 0 < len(tail) < 25
+
+    restored = BookManager(), MemberModule(), IssueReturn()
+    replayed = LibraryJournal(str(tmp_path)).open(*restored)
+    assert replayed == len(tail)
+    assert list(restored[0].books) == [str(index) for index in range(25)]
+
+
+def test_copy_of_a_closed_library_opens_the_same(tmp_path):
+    store, *managers = open_library(str(tmp_path / "a"), "mapped")
+    populate(*managers)
+    store.close()
+    shutil.copytree(tmp_path / "a", tmp_path / "b")
+    store, *copied = open_library(str(tmp_path / "b"), "mapped")
+    assert state(*copied) == state(*managers)
+    store.close()
@@ -0,0 +1,16 @@
+import logging
+
+from live_search import LiveSearch
+
+
+def test_failed_search_is_logged(caplog):
+    live_search = LiveSearch(root=None)
+
+    def broken():
+        raise ValueError("bad query")
+
+    with caplog.at_level(logging.ERROR, logger="lms.live_search"):
+        live_search._run(live_search._generation, broken, on_results=None)
+    live_search.close()
+    assert live_search._results.empty()
+    assert "bad query" in caplog.text
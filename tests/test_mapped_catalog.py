@@ -0,0 +1,67 @@
+import pytest
+
+from book import Book
+from mapped_catalog import MappedCatalog, write_catalog
+from storage import open_library
+
+
+def test_write_and_reopen_round_trip(tmp_path):
+    books = [Book("978-2", "Émile et les Ñandús", "Zola", 3),
+             Book("978-1", "Python Basics", "John Doe", 0),
+             Book("978-3", "Lost", "Nobody", -2)]
+    path = str(tmp_path / "catalog.bin")
+    assert write_catalog(path, books, seq=7) == 3
+
+    catalog = MappedCatalog(path)
+    assert (len(catalog), catalog.seq, catalog.total_copies) == (3, 7, 1)
+    for record, book in enumerate(books):
+        found = catalog.book(catalog.find(book.isbn))
+        assert (found.isbn, found.title, found.author, found.copies) == \
+            (book.isbn, book.title, book.author, book.copies)
+        assert catalog.find(book.isbn) == record
+    assert catalog.find("missing") == -1
+
+
+def test_empty_catalog(tmp_path):
+    path = str(tmp_path / "catalog.bin")
+    write_catalog(path, [])
+    catalog = MappedCatalog(path)
+    assert len(catalog) == 0 and catalog.find("1") == -1
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "catalog.bin"
+    path.write_bytes(b"not a catalog" * 10)
+    with pytest.raises(ValueError):
+        MappedCatalog(str(path))
+
+
+def test_negative_copies_survive_snapshot_and_reopen(tmp_path):
+    data_dir = str(tmp_path / "lib")
+    store, book_manager, _, _ = open_library(data_dir, "mapped")
+    book_manager.add_book(Book("1", "T", "A", -1))
+    book_manager.add_book(Book("2", "U", "B", 2))
+    book_manager.adjust_copies("2", -5)
+    store.snapshot()
+    store.close()
+
+    store, book_manager, _, _ = open_library(data_dir, "mapped")
+    assert [(book.isbn, book.copies) for book in book_manager.books.values()] == [("1", -1), ("2", -3)]
+    assert book_manager.books.totals() == (2, -4)
+    store.close()
+
+
+def test_close_keeps_the_catalog_file_and_replays_the_tail(tmp_path):
+    data_dir = tmp_path / "lib"
+    store, book_manager, _, _ = open_library(str(data_dir), "mapped")
+    book_manager.add_book(Book("1", "T", "A", 1))
+    store.snapshot()
+    written = (data_dir / "catalog.bin").stat()
+    book_manager.add_book(Book("2", "U", "B", 1))
+    book_manager.remove_book("1")
+    store.close()
+    assert (data_dir / "catalog.bin").stat().st_mtime_ns == written.st_mtime_ns
+
+    store, book_manager, _, _ = open_library(str(data_dir), "mapped")
+    assert list(book_manager.books) == ["2"]
+    store.close()
@@ -0,0 +1,52 @@
+import pytest
+
+from book import Book, BookManager
+from parallel_scan import ShardedScan
+from search import scan_books
+
+TITLES = ["Python Basics", "Advanced Python", "Learning Python the Hard Way", "b", "Bob", "Lamb",
+          "A\\Z Guide", "Zen of b"]
+
+PATTERNS = [r"b\Z", r"\Ab", r"\Apython", r"python\Z", r"^b$", r"\Ab\Z", r"b$", r"\\Z", r"[ab]\Z",
+            r"python(?=\Z)", r"\bb\b"]
+
+
+@pytest.fixture(params=[0, 2], ids=["in-process", "workers"])
+def managers(request):
+    plain, sharded = BookManager(), BookManager()
+    for index in range(60):
+        title = TITLES[index % len(TITLES)]
+        for manager in (plain, sharded):
+            manager.add_book(Book(str(index), f"{title} {index}" if index % 3 else title, "Ann Lamb", 1))
+    with ShardedScan(request.param) as engine:
+        engine.attach(sharded)
+        sharded.remove_book("4")
+        plain.remove_book("4")
+        yield plain, sharded
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_regex_scan_agrees_with_and_without_engine(managers, pattern):
+    plain, sharded = managers
+    expected = [book.isbn for book in scan_books(plain, pattern, regex=True)]
+    assert [book.isbn for book in scan_books(sharded, pattern, regex=True)] == expected
+
+
+def test_string_anchors_match_each_field(managers):
+    plain, _ = managers
+    assert {book.title for book in scan_books(plain, r"b\Z", regex=True, fields=("title",))} == \
+        {"b", "Bob", "Lamb", "Zen of b"}
+
+
+def test_removed_and_re_added_books():
+    manager = BookManager()
+    manager.add_books([Book(str(index), f"Title {index}", "A", 1) for index in range(10)])
+    with ShardedScan(0) as engine:
+        engine.attach(manager)
+        manager.remove_book("3")
+        manager.add_book(Book("3", "Title 3 again", "A", 1))
+        assert [book.isbn for book in scan_books(manager, "title 3")] == ["3"]
+        manager.remove_book("3")
+        manager.remove_book("missing")
+        assert scan_books(manager, "title 3") == []
+        assert len(scan_books(manager, "title")) == 9
@@ -0,0 +1,70 @@
+import threading
+
+from book import Book, BookManager
+from search import (full_text_search, fuzzy_search_by_title, scan_books, search_by_author,
+                    search_by_title)
+
+
+def test_searches_run_safely_while_the_catalog_changes():
+    book_manager = BookManager()
+    book_manager.query_cache = None  # Every search reads the books and indexes
+    for n in range(500):
+        book_manager.add_book(Book(str(n), f"Title {n} ab", f"Author {n % 7}", 1))
+    done = threading.Event()
+    errors = []
+
+    def mutate():
+        n = 500
+        while not done.is_set():
+            book_manager.add_book(Book(str(n), f"Title {n} ab", f"Author {n % 7}", 1))
+            book_manager.remove_book(str(n - 400))
+            book_manager.adjust_copies(str(n), 1)
+            n += 1
+
+    def search():
+        try:
+            for _ in range(60):
+                search_by_title(book_manager, "a")  # Short queries walk every indexed title
+                search_by_title(book_manager, "ab")
+                search_by_author(book_manager, "au")
+                fuzzy_search_by_title(book_manager, "Titel 1")
+                full_text_search(book_manager, "title ab")
+                scan_books(book_manager, "ab")
+        except Exception as error:
+            errors.append(error)
+
+    writer = threading.Thread(target=mutate)
+    readers = [threading.Thread(target=search) for _ in range(2)]
+    writer.start()
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join()
+    done.set()
+    writer.join()
+    assert errors == []
+
+
+def test_a_change_waits_for_a_running_search():
+    book_manager = BookManager()
+    reading = threading.Event()
+    release = threading.Event()
+    added = threading.Event()
+
+    def search():
+        with book_manager.lock.read():
+            reading.set()
+            release.wait(5)
+
+    reader = threading.Thread(target=search)
+    reader.start()
+    reading.wait(5)
+    writer = threading.Thread(
+        target=lambda: (book_manager.add_book(Book("1", "T", "A", 1)), added.set()))
+    writer.start()
+    assert not added.wait(0.2)
+    release.set()
+    assert added.wait(5)
+    reader.join()
+    writer.join()
+    assert "1" in book_manager.books